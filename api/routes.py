@@ -1,18 +1,126 @@
 """
-Flask blueprint with API endpoints: /api/solve, /api/simulate, /api/personas.
+Flask blueprint with API endpoints: /api/solve, /api/solve_batch,
+/api/simulate, /api/model, /api/population, /api/inference,
+/api/personas, and the Server-Sent Events progress streams
+/api/stream/solve and /api/stream/simulate.
+
+Cold solves, simulation batches, population dynamics and persona
+inference run in the dispatcher's worker processes (engine/dispatch.py);
+handlers only wait for them, so cache hits stay fast while other solves
+run. The stream endpoints relay their pooled jobs' progress events.
 """
-from flask import Blueprint, request, jsonify
-from config import N_BELIEFS, DELTA
-from engine.personas import list_personas, get_persona_weights
-from engine.solver import ibr_solve, policy_to_serializable
-from engine.simulation import run_batch
+import json
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import TimeoutError
+
+import numpy as np
+from flask import Blueprint, Response, request, jsonify
+from config import N_BELIEFS, DELTA, SOFTMAX_BETA
+from engine.personas import PERSONAS, list_personas, resolve_persona
+from engine.solver import policy_to_serializable
+from engine.simulation import STAT_KEYS
+from engine.service import SolverService
+from engine.dispatch import Dispatcher, Overloaded
+from engine.shared_store import default_store
+from engine.model import compile_model
+from engine.population import run_population
+from engine.inference import infer_matchup, inference_pairs
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
-# In-memory cache: keyed by (persona1, persona2) -> solver result
-_cache = {}
-# Store episodes for replay
-_last_episodes = {}
+# Bounded in-memory solver cache keyed by canonical persona weights,
+# backed by the host-wide store when MAS_SHARED_STORE is set
+_solver = SolverService(store=default_store())
+# Process pool for cold solves and simulations, with admission control
+_dispatcher = Dispatcher(_solver)
+# Store episodes for replay (most recent pairs only)
+_last_episodes = OrderedDict()
+MAX_STORED_EPISODE_SETS = 8
+
+# Accepted range for a requested softmax beta
+MAX_BETA = 50.0
+# Seconds between SSE keep-alive comments while waiting for progress
+SSE_KEEPALIVE = 15.0
+# Limits for /api/population: personas, generations, agent episodes
+# (population_size / 2 * generations) and recorded trajectory points
+MAX_POPULATION_PERSONAS = 6
+MAX_GENERATIONS = 100000
+MAX_AGENT_EPISODES = 10 ** 7
+MAX_RECORDED = 1000
+# Episode cap for /api/inference (vectorised, stats only)
+MAX_INFERENCE_EPISODES = 100000
+
+
+def _requested_number(data, key, default=None, cast=float):
+    """
+    data[key] converted with cast (float or int); default when it is
+    missing or null. Raises ValueError unless it is a finite number.
+    """
+    value = data.get(key)
+    if value is None:
+        return default
+    try:
+        number = cast(value)
+    except (TypeError, ValueError, OverflowError):
+        number = None
+    if number is None or isinstance(number, float) and \
+            not np.isfinite(number):
+        raise ValueError('%s must be %s' % (
+            key, 'an integer' if cast is int else 'a number'))
+    return number
+
+
+def _requested_beta(data):
+    """
+    Softmax beta from the request body, clamped to (0, MAX_BETA]. Raises
+    ValueError if it is not a number.
+    """
+    beta = _requested_number(data, 'beta', SOFTMAX_BETA)
+    return min(max(beta, 0.01), MAX_BETA)
+
+
+def _requested_personas(data):
+    """
+    (label1, weights1, label2, weights2) from the request body. Each of
+    persona1/persona2 is a persona id, [w_win, w_lose, w_tie] or a
+    {'w_win', 'w_lose', 'w_tie'} object. Raises ValueError if invalid.
+    """
+    label1, w1 = resolve_persona(data.get('persona1', 'balanced'))
+    label2, w2 = resolve_persona(data.get('persona2', 'balanced'))
+    return label1, w1, label2, w2
+
+
+def _requested_timeout(data):
+    """
+    Optional per-request 'timeout' (seconds, capped by SERVE_TIMEOUT).
+    Raises ValueError if it is not a number.
+    """
+    timeout = _requested_number(data, 'timeout')
+    return None if timeout is None else max(timeout, 0.0)
+
+
+def _bad_request(message):
+    return jsonify({'status': 'error', 'error': message}), 400
+
+
+@api_bp.errorhandler(Overloaded)
+def _overloaded(e):
+    """Admission limit reached: the client should retry later."""
+    response = jsonify({'status': 'error', 'error': 'server busy: %s' % e})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+
+@api_bp.errorhandler(TimeoutError)
+def _timed_out(e):
+    """
+    The job outlived the request's timeout. Solves keep running and are
+    cached, so repeating the request later returns at once.
+    """
+    return jsonify({'status': 'error',
+                    'error': 'timed out waiting for the solver'}), 504
 
 
 @api_bp.route('/personas', methods=['GET'])
@@ -25,101 +133,498 @@ def get_personas():
 def solve():
     """
     Run IBR solver for a persona pair.
-    Body: { "persona1": "balanced", "persona2": "aggressive" }
+    Body: { "persona1": "balanced", "persona2": [1.2, 1.0, 1.0], "beta": 3.0 }
+    Personas are ids or custom (w_win, w_lose, w_tie) weights; weights are
+    rounded to WEIGHT_QUANTUM, so equivalent requests share one solve.
+    Betas above SOFTMAX_BETA are solved by beta continuation.
+    Optional "timeout" (seconds, also on /api/simulate, /api/model and
+    /api/solve_batch): HTTP 504 when a cold solve takes longer; it keeps
+    running and is cached. HTTP 503 when the worker pool is saturated.
     Returns: policies + solver metadata.
     """
     data = request.get_json(force=True)
-    p1_name = data.get('persona1', 'balanced')
-    p2_name = data.get('persona2', 'balanced')
-
-    cache_key = (p1_name, p2_name)
-    if cache_key in _cache:
-        cached = _cache[cache_key]
-        return jsonify({
-            'status': 'ok',
-            'cached': True,
-            'iterations': cached['iterations'],
-            'converged': cached['converged'],
-            'policy1': policy_to_serializable(cached['policy1']),
-            'policy2': policy_to_serializable(cached['policy2']),
-            'n_beliefs': N_BELIEFS,
-            'delta': DELTA,
-            'computation_log': cached.get('computation_log', []),
-        })
-
-    w1 = get_persona_weights(p1_name)
-    w2 = get_persona_weights(p2_name)
-
-    result = ibr_solve(persona1_weights=w1, persona2_weights=w2)
-    _cache[cache_key] = result
+    try:
+        p1_name, w1, p2_name, w2 = _requested_personas(data)
+        beta = _requested_beta(data)
+        timeout = _requested_timeout(data)
+    except ValueError as e:
+        return _bad_request(str(e))
+
+    cached = _solver.get(w1, w2, beta) is not None
+    result = _dispatcher.solve(w1, w2, beta, timeout)
 
     return jsonify({
         'status': 'ok',
-        'cached': False,
+        'cached': cached,
+        'persona1': p1_name,
+        'persona2': p2_name,
+        'persona1_weights': w1,
+        'persona2_weights': w2,
         'iterations': result['iterations'],
         'converged': result['converged'],
+        'residuals': result['residuals'],
+        'exploitability': result['exploitability'],
+        'beta': beta,
+        'continuation_path': result.get('continuation_path'),
         'policy1': policy_to_serializable(result['policy1']),
         'policy2': policy_to_serializable(result['policy2']),
+        'policy_summary1': result['policy_index1'].summary(),
+        'policy_summary2': result['policy_index2'].summary(),
         'n_beliefs': N_BELIEFS,
         'delta': DELTA,
         'computation_log': result.get('computation_log', []),
     })
 
 
+@api_bp.route('/solve_batch', methods=['POST'])
+def solve_batch():
+    """
+    Solve several persona pairs at once, in parallel across processes.
+    Body: { "matchups": [["balanced", "aggressive"], ...], "beta": 3.0 }
+    (personas as in /api/solve)
+    Returns: how many pairs were solved vs already cached.
+    """
+    data = request.get_json(force=True)
+    pairs = []
+    try:
+        beta = _requested_beta(data)
+        timeout = _requested_timeout(data)
+        for p1, p2 in data.get('matchups', []):
+            _, w1, _, w2 = _requested_personas({'persona1': p1,
+                                                'persona2': p2})
+            pairs.append((w1, w2))
+    except ValueError as e:
+        return _bad_request(str(e))
+
+    solved = _dispatcher.solve_many(pairs, beta, timeout=timeout)
+
+    return jsonify({
+        'status': 'ok',
+        'solved': solved,
+        'cached': len(pairs) - solved,
+    })
+
+
 @api_bp.route('/simulate', methods=['POST'])
 def simulate():
     """
     Run N episodes for a persona pair.
-    Body: { "persona1": "balanced", "persona2": "balanced", "n_episodes": 500 }
-    Returns: aggregate stats + episode list for replay.
+    Body: { "persona1": "balanced", "persona2": "balanced", "n_episodes": 500,
+            "beta": 3.0 }
+    (personas as in /api/solve)
+    Optional variance reduction (see run_batch): "crn_seed": 7,
+    "antithetic": true, "ci_width": 0.05, "ci_metric": "p1_win_rate";
+    with ci_width, n_episodes is the cap.
+    Returns: aggregate stats (with standard errors) + episode list for replay.
     """
     data = request.get_json(force=True)
-    p1_name = data.get('persona1', 'balanced')
-    p2_name = data.get('persona2', 'balanced')
-    n_episodes = data.get('n_episodes', 500)
+    try:
+        p1_name, w1, p2_name, w2 = _requested_personas(data)
+        beta = _requested_beta(data)
+        timeout = _requested_timeout(data)
+        n_episodes = _requested_number(data, 'n_episodes', 500, int)
+        crn_seed = _requested_number(data, 'crn_seed', cast=int)
+        ci_width = _requested_number(data, 'ci_width')
+    except ValueError as e:
+        return _bad_request(str(e))
     n_episodes = max(1, min(n_episodes, 10000))
     include_episodes = data.get('include_episodes', True)
+    include_log = data.get('include_log', include_episodes)
     optimal_p1 = data.get('optimal_p1', True)
     optimal_p2 = data.get('optimal_p2', True)
-
-    cache_key = (p1_name, p2_name)
+    antithetic = bool(data.get('antithetic', False))
+    ci_metric = data.get('ci_metric', 'p1_win_rate')
+    if ci_metric not in STAT_KEYS:
+        return _bad_request('ci_metric must be one of %s'
+                            % ', '.join(STAT_KEYS))
+    if ci_width is not None and not ci_width > 0:
+        return _bad_request('ci_width must be positive')
+    if crn_seed is not None and not 0 <= crn_seed < 2 ** 32:
+        return _bad_request('crn_seed must be in [0, 2**32)')
 
     # Solve if not cached
-    if cache_key not in _cache:
-        w1 = get_persona_weights(p1_name)
-        w2 = get_persona_weights(p2_name)
-        result = ibr_solve(persona1_weights=w1, persona2_weights=w2)
-        _cache[cache_key] = result
-
-    solver_result = _cache[cache_key]
+    solver_result = _dispatcher.solve(w1, w2, beta, timeout)
     policy1 = solver_result['policy1']
     policy2 = solver_result['policy2']
 
-    q_table1 = solver_result.get('q_table1')
-    q_table2 = solver_result.get('q_table2')
+    index1 = solver_result['policy_index1']
+    index2 = solver_result['policy_index2']
 
-    stats, episodes = run_batch(policy1, policy2, n_episodes,
-                                q_table1=q_table1, q_table2=q_table2,
-                                optimal_p1=optimal_p1,
-                                optimal_p2=optimal_p2)
+    stats, episodes = _dispatcher.simulate(solver_result, n_episodes,
+                                           timeout,
+                                           optimal_p1=optimal_p1,
+                                           optimal_p2=optimal_p2,
+                                           crn_seed=crn_seed,
+                                           antithetic=antithetic,
+                                           ci_width=ci_width,
+                                           ci_metric=ci_metric,
+                                           keep_episodes=include_episodes)
 
-    # Store episodes for replay
-    _last_episodes[cache_key] = episodes
+    # Store episodes for replay (stats-only runs keep none)
+    if include_episodes:
+        cache_key = (w1, w2)
+        _last_episodes.pop(cache_key, None)
+        _last_episodes[cache_key] = episodes
+        while len(_last_episodes) > MAX_STORED_EPISODE_SETS:
+            _last_episodes.popitem(last=False)
 
     response = {
         'status': 'ok',
+        'persona1': p1_name,
+        'persona2': p2_name,
+        'persona1_weights': w1,
+        'persona2_weights': w2,
         'solver_iterations': solver_result['iterations'],
         'solver_converged': solver_result['converged'],
+        'solver_exploitability': solver_result['exploitability'],
+        'beta': beta,
         'stats': stats,
         'policy1': policy_to_serializable(policy1),
         'policy2': policy_to_serializable(policy2),
+        'policy_summary1': index1.summary(),
+        'policy_summary2': index2.summary(),
         'n_beliefs': N_BELIEFS,
         'delta': DELTA,
         'optimal_p1': optimal_p1,
         'optimal_p2': optimal_p2,
-        'computation_log': solver_result.get('computation_log', []),
     }
+    # The computation log is built lazily; stats-only runs skip it
+    if include_log:
+        response['computation_log'] = solver_result.get('computation_log', [])
     if include_episodes:
         response['episodes'] = episodes
 
     return jsonify(response)
+
+
+@api_bp.route('/model', methods=['POST'])
+def model():
+    """
+    Compiled policy model for a persona pair (see engine/model.py).
+    Body: { "persona1": "balanced", "persona2": "balanced", "beta": 3.0 }
+    (personas as in /api/solve; optional "include_policies" and
+    "include_log" add the policies and computation log as /api/simulate
+    returns them)
+    Returns: lookup tables the dashboard uses to generate and replay
+    episodes locally, identical in distribution to /api/simulate.
+    """
+    data = request.get_json(force=True)
+    try:
+        p1_name, w1, p2_name, w2 = _requested_personas(data)
+        beta = _requested_beta(data)
+        timeout = _requested_timeout(data)
+    except ValueError as e:
+        return _bad_request(str(e))
+
+    result = _dispatcher.solve(w1, w2, beta, timeout)
+
+    response = dict(compile_model(result),
+                    status='ok',
+                    persona1=p1_name,
+                    persona2=p2_name,
+                    beta=beta,
+                    policy_summary1=result['policy_index1'].summary(),
+                    policy_summary2=result['policy_index2'].summary())
+    if data.get('include_policies'):
+        response.update(policy1=policy_to_serializable(result['policy1']),
+                        policy2=policy_to_serializable(result['policy2']),
+                        n_beliefs=N_BELIEFS, delta=DELTA)
+    if data.get('include_log'):
+        response['computation_log'] = result.get('computation_log', [])
+    return jsonify(response)
+
+
+@api_bp.route('/population', methods=['POST'])
+def population():
+    """
+    Population dynamics over personas (see engine/population.py).
+    Body: { "personas": ["balanced", "aggressive", "cautious"],
+            "mode": "replicator", "shares": [0.2, 0.3, 0.5],
+            "generations": 2000, "record_every": 20, "beta": 3.0,
+            "optimal": true }
+    (personas as in /api/solve; default: every persona). Replicator mode
+    also accepts a list of share vectors, evolved side by side. Agent mode
+    ("mode": "agents") takes "population_size" (even, default 10000) and
+    an optional "seed", and plays one episode per pair and generation.
+    Returns: the exact payoff matrix and the share trajectory.
+    """
+    data = request.get_json(force=True)
+    mode = data.get('mode', 'replicator')
+    if mode not in ('replicator', 'agents'):
+        return _bad_request("mode must be 'replicator' or 'agents'")
+    personas = data.get('personas') or None
+    if personas is not None and \
+            not 2 <= len(personas) <= MAX_POPULATION_PERSONAS:
+        return _bad_request('personas must list 2 to %d personas'
+                            % MAX_POPULATION_PERSONAS)
+    try:
+        generations = _requested_number(data, 'generations', 1000, int)
+        record_every = _requested_number(data, 'record_every', 1, int)
+        population_size = _requested_number(data, 'population_size', 10000,
+                                            int)
+        seed = _requested_number(data, 'seed', cast=int)
+    except ValueError as e:
+        return _bad_request(str(e))
+    generations = max(1, min(generations, MAX_GENERATIONS))
+    record_every = max(record_every, -(-generations // MAX_RECORDED))
+    if seed is not None and not 0 <= seed < 2 ** 32:
+        return _bad_request('seed must be in [0, 2**32)')
+    if mode == 'agents' and \
+            population_size // 2 * generations > MAX_AGENT_EPISODES:
+        return _bad_request('population_size * generations / 2 must be at '
+                            'most %d' % MAX_AGENT_EPISODES)
+    optimal = bool(data.get('optimal', True))
+
+    try:
+        beta = _requested_beta(data)
+        timeout = _requested_timeout(data)
+        weights = [w for _, w in (resolve_persona(p)
+                                  for p in personas or list(PERSONAS))]
+        # Solves run in the pool first, the game and its dynamics in a
+        # worker process
+        game = _dispatcher.call(
+            run_population, [(wi, wj) for wi in weights for wj in weights],
+            beta, kwargs=dict(personas=personas, beta=beta, optimal=optimal,
+                              mode=mode, shares=data.get('shares'),
+                              generations=generations,
+                              record_every=record_every,
+                              population_size=population_size,
+                              seed=seed),
+            timeout=timeout)
+    except ValueError as e:
+        return _bad_request(str(e))
+    run = game['run']
+
+    response = {
+        'status': 'ok',
+        'mode': mode,
+        'personas': game['labels'],
+        'beta': beta,
+        'optimal': optimal,
+        'payoffs': game['payoffs'].tolist(),
+        'seat_payoffs': game['seat_payoffs'].tolist(),
+        'background': game['background'],
+        'generations': run['generations'],
+        'trajectory': run['trajectory'].tolist(),
+        'final': run['final'].tolist(),
+    }
+    if mode == 'agents':
+        response['population_size'] = population_size
+        # Extinct personas have no mean reward
+        response['mean_reward'] = [
+            [None if np.isnan(r) else r for r in row]
+            for row in run['mean_reward'].tolist()]
+    return jsonify(response)
+
+
+@api_bp.route('/inference', methods=['POST'])
+def inference():
+    """
+    Simulate a persona pair in which players do not know the opponent's
+    persona and infer it from the game (see engine/inference.py).
+    Body: { "persona1": "balanced", "persona2": "aggressive",
+            "candidates": ["balanced", "aggressive", "cautious"],
+            "infer_p1": true, "infer_p2": true, "n_episodes": 10000,
+            "optimal_p1": true, "optimal_p2": true, "beta": 3.0,
+            "seed": 0 }
+    (personas as in /api/solve; candidates default to every persona)
+    Returns: aggregate stats and, per inferring player, the mean persona
+    weights at the end and at the start of each round, and how often the
+    most likely candidate is the true persona.
+    """
+    data = request.get_json(force=True)
+    try:
+        p1_name, w1, p2_name, w2 = _requested_personas(data)
+        resolved = [resolve_persona(c)
+                    for c in data.get('candidates') or list(PERSONAS)]
+        beta = _requested_beta(data)
+        timeout = _requested_timeout(data)
+        n_episodes = _requested_number(data, 'n_episodes', 10000, int)
+        seed = _requested_number(data, 'seed', cast=int)
+    except ValueError as e:
+        return _bad_request(str(e))
+    labels = [label for label, _ in resolved]
+    candidates = [w for _, w in resolved]
+    if not 1 <= len(candidates) <= MAX_POPULATION_PERSONAS or \
+            len(set(candidates)) != len(candidates):
+        return _bad_request('candidates must list 1 to %d distinct personas'
+                            % MAX_POPULATION_PERSONAS)
+    n_episodes = max(1, min(n_episodes, MAX_INFERENCE_EPISODES))
+    if seed is not None and not 0 <= seed < 2 ** 32:
+        return _bad_request('seed must be in [0, 2**32)')
+    infer_p1 = bool(data.get('infer_p1', True))
+    infer_p2 = bool(data.get('infer_p2', True))
+    optimal_p1 = bool(data.get('optimal_p1', True))
+    optimal_p2 = bool(data.get('optimal_p2', True))
+
+    summary = _dispatcher.call(
+        infer_matchup,
+        inference_pairs(w1, w2, candidates, infer_p1, infer_p2), beta,
+        args=(w1, w2, candidates, beta, n_episodes),
+        kwargs=dict(infer_p1=infer_p1, infer_p2=infer_p2,
+                    optimal_p1=optimal_p1, optimal_p2=optimal_p2,
+                    seed=seed),
+        timeout=timeout)
+
+    response = dict(summary, **{
+        'status': 'ok',
+        'persona1': p1_name,
+        'persona2': p2_name,
+        'candidates': labels,
+        'infer_p1': infer_p1,
+        'infer_p2': infer_p2,
+        'optimal_p1': optimal_p1,
+        'optimal_p2': optimal_p2,
+        'beta': beta,
+    })
+    return jsonify(response)
+
+
+# --- Server-Sent Events progress streams ---
+
+def _query_data():
+    """
+    Query-string parameters as a request-body-like dict (EventSource can
+    only issue GETs). Personas may be ids or comma-separated weights.
+    Raises ValueError for malformed numbers.
+    """
+    data = request.args.to_dict()
+    for key in ['persona1', 'persona2']:
+        if key in data and ',' in data[key]:
+            data[key] = data[key].split(',')
+    for key in ['n_episodes', 'crn_seed']:
+        if key in data:
+            data[key] = _requested_number(data, key, cast=int)
+    if 'ci_width' in data:
+        data['ci_width'] = _requested_number(data, 'ci_width')
+    for key in ['optimal_p1', 'optimal_p2', 'antithetic']:
+        if key in data:
+            data[key] = data[key].lower() in ('1', 'true', 'yes')
+    return data
+
+
+def _event_stream(work):
+    """
+    Run work(progress) in a background thread and stream the events it
+    reports as SSE, ending with a 'done' event carrying work's return
+    value (or an 'error' event). When the client disconnects, the next
+    progress call returns True, which cancels the solve or batch.
+    """
+    events = queue.Queue()
+    cancel = threading.Event()
+
+    def progress(event):
+        events.put(event)
+        return cancel.is_set()
+
+    def target():
+        try:
+            events.put(dict(work(progress), event='done'))
+        except Exception as e:  # reported to the client, not raised
+            events.put({'event': 'error', 'error': str(e)})
+
+    threading.Thread(target=target, daemon=True).start()
+
+    def generate():
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=SSE_KEEPALIVE)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield 'event: %s\ndata: %s\n\n' % (event['event'],
+                                                    json.dumps(event))
+                if event['event'] in ('done', 'error'):
+                    return
+        finally:
+            cancel.set()
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache',
+                             'X-Accel-Buffering': 'no'})
+
+
+def _solver_summary(result, beta):
+    """Solver metadata sent with 'done' events."""
+    summary = {
+        'iterations': result['iterations'],
+        'converged': result['converged'],
+        'cancelled': bool(result.get('cancelled')),
+        'beta': beta,
+        'residual': result['residuals'][-1] if result['residuals'] else None,
+    }
+    if not summary['cancelled']:
+        summary['exploitability'] = result['exploitability']
+    return summary
+
+
+@api_bp.route('/stream/solve', methods=['GET'])
+def stream_solve():
+    """
+    Solve a persona pair, streaming progress as Server-Sent Events.
+    Query: ?persona1=balanced&persona2=1.2,1,1&beta=3
+    Events: 'iteration' ({iteration, residual, beta}), 'log' (computation-
+    log entries of the logged iterations), then 'done' with the solver
+    metadata. Closing the stream cancels the solve; cancelled solves are
+    not cached.
+    """
+    try:
+        data = _query_data()
+        p1_name, w1, p2_name, w2 = _requested_personas(data)
+        beta = _requested_beta(data)
+    except ValueError as e:
+        return _bad_request(str(e))
+
+    def work(progress):
+        cached = _solver.get(w1, w2, beta) is not None
+        result = _dispatcher.solve_stream(w1, w2, beta, progress)
+        return dict(_solver_summary(result, beta), cached=cached,
+                    persona1=p1_name, persona2=p2_name)
+
+    return _event_stream(work)
+
+
+@api_bp.route('/stream/simulate', methods=['GET'])
+def stream_simulate():
+    """
+    Solve (if needed) and simulate a persona pair, streaming progress as
+    Server-Sent Events. Query parameters as the /api/simulate body.
+    Events: the /api/stream/solve events, 'stats' with partial stats
+    every SEQUENTIAL_BLOCK episodes, then 'done' with the final stats.
+    Closing the stream cancels the solve or the batch.
+    """
+    try:
+        data = _query_data()
+        p1_name, w1, p2_name, w2 = _requested_personas(data)
+        beta = _requested_beta(data)
+    except ValueError as e:
+        return _bad_request(str(e))
+    n_episodes = max(1, min(data.get('n_episodes', 500), 10000))
+    ci_metric = data.get('ci_metric', 'p1_win_rate')
+    if ci_metric not in STAT_KEYS:
+        return _bad_request('ci_metric must be one of %s'
+                            % ', '.join(STAT_KEYS))
+    if data.get('ci_width') is not None and not data['ci_width'] > 0:
+        return _bad_request('ci_width must be positive')
+    if data.get('crn_seed') is not None and \
+            not 0 <= data['crn_seed'] < 2 ** 32:
+        return _bad_request('crn_seed must be in [0, 2**32)')
+
+    def work(progress):
+        result = _dispatcher.solve_stream(w1, w2, beta, progress)
+        summary = _solver_summary(result, beta)
+        if summary['cancelled']:
+            return {'solver': summary, 'stats': None}
+        stats, _ = _dispatcher.simulate(
+            result, n_episodes, progress=progress,
+            optimal_p1=data.get('optimal_p1', True),
+            optimal_p2=data.get('optimal_p2', True),
+            crn_seed=data.get('crn_seed'),
+            antithetic=data.get('antithetic', False),
+            ci_width=data.get('ci_width'), ci_metric=ci_metric,
+            keep_episodes=False)
+        return {'solver': summary, 'stats': stats,
+                'persona1': p1_name, 'persona2': p2_name}
+
+    return _event_stream(work)
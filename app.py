@@ -1,12 +1,18 @@
 """
 Flask entry point for the Gun-Wall Game simulation dashboard.
+
+python app.py          Flask development server (debug, auto-reload)
+python app.py --serve  threaded production server: waitress when
+                       installed, else Werkzeug's threaded server
 """
+import argparse
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))  # noqa: E402
 
 from flask import Flask, render_template  # noqa: E402
 from api.routes import api_bp  # noqa: E402
+from config import SERVE_THREADS  # noqa: E402
 
 app = Flask(__name__)
 app.register_blueprint(api_bp)
@@ -17,5 +23,29 @@ def index():
     return render_template('index.html')
 
 
+def serve(host='127.0.0.1', port=5001, threads=SERVE_THREADS):
+    """
+    Serve the app with a pool of request threads. Handlers only wait on
+    the solver dispatcher's worker processes, so threads stay free for
+    cache hits and /api/personas during a burst of cold solves.
+    """
+    try:
+        from waitress import serve as waitress_serve
+    except ImportError:
+        app.run(host=host, port=port, threaded=True, debug=False)
+    else:
+        waitress_serve(app, host=host, port=port, threads=threads)
+
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5001)
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--serve', action='store_true',
+                        help='run the threaded production server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--threads', type=int, default=SERVE_THREADS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.host, args.port, args.threads)
+    else:
+        app.run(debug=True, port=args.port)
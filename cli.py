@@ -0,0 +1,226 @@
+"""
+Headless command-line runner for large offline experiments.
+
+Runs solves, simulations, tournaments and sweeps directly against the
+engine on all cores (no Flask, no per-request episode cap). Every solve
+and simulation chunk is checkpointed under --out, so re-running the same
+command resumes an interrupted run.
+
+Examples:
+    python cli.py solve --p1 balanced --p2 aggressive --out runs/solve
+    python cli.py simulate --p1 balanced --p2 cautious --episodes 1000000 \\
+        --out runs/sim --output runs/sim/stats.parquet
+    python cli.py tournament --episodes 100000 --out runs/tour
+    python cli.py sweep --weight w_win --values 0.5,1,1.5,2 --p2 balanced \\
+        --episodes 50000 --out runs/sweep
+    python cli.py magazine --capacity 5 --p1 aggressive --p2 cautious \\
+        --episodes 100000 --out runs/mag5
+    python cli.py export --p1 balanced --p2 aggressive --soft-p1 \\
+        --episodes 5000000 --chunk 500000 --out runs/episodes
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))  # noqa: E402
+
+from engine.batch import (CheckpointStore, DEFAULT_CHUNK,  # noqa: E402
+                          resolve_weights, solve_key, run_solves,
+                          run_simulations, run_magazine, run_export,
+                          flatten_stats,
+                          check_output, write_rows)
+from engine.personas import PERSONAS  # noqa: E402
+
+WEIGHT_NAMES = ['w_win', 'w_lose', 'w_tie']
+
+
+def _add_common(parser, episodes=True):
+    parser.add_argument('--out', required=True,
+                        help='run directory (checkpoints + default output)')
+    parser.add_argument('--output', default=None,
+                        help='results file: .csv, .npz or .parquet '
+                             '(default: <out>/results.csv)')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='worker processes (default: all cores)')
+    if episodes:
+        parser.add_argument('--episodes', type=int, default=10000)
+        parser.add_argument('--chunk', type=int, default=DEFAULT_CHUNK,
+                            help='episodes per checkpointed chunk')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--soft-p1', action='store_true',
+                            help='P1 plays softmax (human-like) instead of greedy')
+        parser.add_argument('--soft-p2', action='store_true',
+                            help='P2 plays softmax (human-like) instead of greedy')
+
+
+def _simulate_pairs(args, pairs, store):
+    """Solve + simulate labelled pairs; returns one flat row per pair."""
+    solves = run_solves(pairs, store, jobs=args.jobs)
+    stats = run_simulations(solves, args.episodes, store,
+                            optimal_p1=not args.soft_p1,
+                            optimal_p2=not args.soft_p2,
+                            chunk=args.chunk, seed=args.seed,
+                            jobs=args.jobs)
+    rows = []
+    for pair in pairs:
+        row = _solve_row(pair, solves)
+        row.update(flatten_stats(stats[solve_key(pair[0], pair[2])]))
+        rows.append(row)
+    return rows
+
+
+def _solve_row(pair, solves):
+    """Labels, weights and solver metadata for one pair."""
+    label1, w1, label2, w2 = pair
+    solve = solves[solve_key(label1, label2)]
+    row = {'persona1': label1, 'persona2': label2,
+           'solver_iterations': int(solve['iterations']),
+           'solver_converged': bool(solve['converged'])}
+    if 'exploitability' in solve:
+        row['exploitability_p1'] = float(solve['exploitability'][0])
+        row['exploitability_p2'] = float(solve['exploitability'][1])
+    for name, w in zip(WEIGHT_NAMES, w1):
+        row['p1_' + name] = w
+    for name, w in zip(WEIGHT_NAMES, w2):
+        row['p2_' + name] = w
+    return row
+
+
+def cmd_solve(args, store):
+    pairs = [(args.p1, resolve_weights(args.p1),
+              args.p2, resolve_weights(args.p2))]
+    solves = run_solves(pairs, store, jobs=args.jobs)
+    return [_solve_row(pair, solves) for pair in pairs]
+
+
+def cmd_simulate(args, store):
+    pairs = [(args.p1, resolve_weights(args.p1),
+              args.p2, resolve_weights(args.p2))]
+    return _simulate_pairs(args, pairs, store)
+
+
+def cmd_tournament(args, store):
+    names = args.personas.split(',') if args.personas else list(PERSONAS)
+    pairs = [(p1, resolve_weights(p1), p2, resolve_weights(p2))
+             for p1 in names for p2 in names]
+    return _simulate_pairs(args, pairs, store)
+
+
+def cmd_sweep(args, store):
+    base = list(resolve_weights(args.p1))
+    idx = WEIGHT_NAMES.index(args.weight)
+    pairs = []
+    for value in [float(v) for v in args.values.split(',')]:
+        w1 = list(base)
+        w1[idx] = value
+        label = '%s_%s=%g' % (args.p1, args.weight, value)
+        pairs.append((label, tuple(w1), args.p2, resolve_weights(args.p2)))
+    return _simulate_pairs(args, pairs, store)
+
+
+def cmd_magazine(args, store):
+    pair = (args.p1, resolve_weights(args.p1),
+            args.p2, resolve_weights(args.p2))
+    game, solve, stats = run_magazine(pair, args.capacity, args.episodes,
+                                      store, resolution=args.resolution,
+                                      optimal_p1=not args.soft_p1,
+                                      optimal_p2=not args.soft_p2,
+                                      chunk=args.chunk, seed=args.seed)
+    row = _solve_row(pair, {solve_key(args.p1, args.p2): solve})
+    row.update(game.describe())
+    row.update(flatten_stats(stats))
+    return [row]
+
+
+def cmd_export(args, store):
+    pair = (args.p1, resolve_weights(args.p1),
+            args.p2, resolve_weights(args.p2))
+    path = args.dataset or os.path.join(args.out, 'episodes')
+    solve, dataset = run_export(pair, args.episodes, store, path,
+                                optimal_p1=not args.soft_p1,
+                                optimal_p2=not args.soft_p2,
+                                chunk=args.chunk, seed=args.seed)
+    row = _solve_row(pair, {solve_key(args.p1, args.p2): solve})
+    row['dataset'] = path
+    row.update(flatten_stats(dataset.stats()))
+    return [row]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('solve', help='solve one persona pair')
+    p.add_argument('--p1', default='balanced')
+    p.add_argument('--p2', default='balanced')
+    _add_common(p, episodes=False)
+
+    p = sub.add_parser('simulate', help='simulate one persona pair')
+    p.add_argument('--p1', default='balanced')
+    p.add_argument('--p2', default='balanced')
+    _add_common(p)
+
+    p = sub.add_parser('tournament', help='all persona-vs-persona matchups')
+    p.add_argument('--personas', default=None,
+                   help='comma-separated persona ids (default: all)')
+    _add_common(p)
+
+    p = sub.add_parser('sweep', help="vary one of P1's payoff weights")
+    p.add_argument('--p1', default='balanced', help='base persona for P1')
+    p.add_argument('--p2', default='balanced')
+    p.add_argument('--weight', choices=WEIGHT_NAMES, required=True)
+    p.add_argument('--values', required=True,
+                   help='comma-separated weight values')
+    _add_common(p)
+
+    p = sub.add_parser('magazine',
+                       help='one pair with magazine capacity K (ammo 0..K)')
+    p.add_argument('--p1', default='balanced')
+    p.add_argument('--p2', default='balanced')
+    p.add_argument('--capacity', type=int, default=1,
+                   help='rounds the magazine holds (1 = the binary game)')
+    p.add_argument('--resolution', type=int, default=None,
+                   help='belief lattice resolution (default: finest within '
+                        'MAGAZINE_MAX_BELIEFS beliefs)')
+    _add_common(p)
+
+    p = sub.add_parser('export',
+                       help="write one pair's episodes to an on-disk dataset")
+    p.add_argument('--p1', default='balanced')
+    p.add_argument('--p2', default='balanced')
+    p.add_argument('--dataset', default=None,
+                   help='dataset directory (default: <out>/episodes)')
+    _add_common(p)
+
+    return parser
+
+
+COMMANDS = {
+    'solve': cmd_solve,
+    'simulate': cmd_simulate,
+    'tournament': cmd_tournament,
+    'sweep': cmd_sweep,
+    'magazine': cmd_magazine,
+    'export': cmd_export,
+}
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    output = args.output or os.path.join(args.out, 'results.csv')
+    try:
+        check_output(output)
+    except ValueError as e:
+        parser.error(str(e))
+
+    store = CheckpointStore(args.out)
+    try:
+        rows = COMMANDS[args.command](args, store)
+    except ValueError as e:
+        parser.error(str(e))
+    write_rows(rows, output)
+    print('wrote %d rows to %s' % (len(rows), output))
+
+
+if __name__ == '__main__':
+    main()
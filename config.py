@@ -2,6 +2,8 @@
 Configuration constants for the Gun-Wall Game simulation.
 All game parameters, payoff tables, and solver settings.
 """
+import os
+
 import numpy as np
 
 # --- Game parameters ---
@@ -61,10 +63,34 @@ IBR_ALPHA = 0.5       # damping factor
 IBR_EPSILON = 1e-4    # convergence tolerance
 IBR_MAX_ITER = 200    # max IBR iterations
 SOFTMAX_BETA = 3.0    # softmax temperature: higher = sharper, lower = smoother
+SOLVER_PRUNE = False  # evaluate only reachable belief cells (engine/reachability.py)
+
+# --- Beta continuation (homotopy) for sharp policies ---
+CONTINUATION_BETA_START = 0.5  # first (smooth) beta of the path
+CONTINUATION_STEPS = 5         # betas on the geometric path, target included
+CONTINUATION_STEP_ITER = 30    # IBR iteration cap per step
 
 # --- Simulation parameters ---
 SIMULATION_BETA = 0.1 # softer temperature for non-optimal (human-like) play
 
 # --- Simulation defaults ---
 DEFAULT_N_EPISODES = 500
+CI_Z = 1.96               # z-score of reported confidence intervals (95%)
+SEQUENTIAL_BLOCK = 100    # episodes between sequential-stopping checks
 INITIAL_BELIEF = 0.0  # both players start unarmed — known initial state
+
+# --- Shared result store (multi-worker deployments) ---
+# Directory of memory-mapped solver results shared by all server workers
+# on the host, e.g. /dev/shm/mas-solver; unset keeps results per process
+SHARED_STORE_DIR = os.environ.get('MAS_SHARED_STORE')
+
+# --- Serving (engine/dispatch.py, python app.py --serve) ---
+SERVE_THREADS = 16       # request threads of the WSGI server
+SERVE_WORKERS = None     # solver/simulation worker processes (None: one per CPU)
+SERVE_MAX_PENDING = 32   # jobs queued or running before requests get HTTP 503
+SERVE_TIMEOUT = 120.0    # seconds a request waits for its job before HTTP 504
+
+# --- Multi-ammo (magazine) variants (engine/magazine.py) ---
+# Belief-lattice size cap used to pick the default resolution for a
+# magazine capacity (capacity 1 keeps the 1/DELTA resolution of BELIEF_GRID)
+MAGAZINE_MAX_BELIEFS = 5000
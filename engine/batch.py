@@ -0,0 +1,363 @@
+"""
+Offline batch jobs: solves, chunked simulations, tournaments, sweeps and
+episode-dataset exports run straight against the engine on a process
+pool, with per-unit checkpoints so interrupted runs resume where they
+stopped.
+"""
+import csv
+import hashlib
+import json
+import os
+import re
+from multiprocessing import Pool
+
+import numpy as np
+from config import T, SOFTMAX_BETA, SIMULATION_BETA
+from engine.dataset import export_episodes
+from engine.magazine import MagazineGame
+from engine import magazine_solver
+from engine.personas import resolve_persona
+from engine.shared_store import solve_config_key
+from engine.policy_index import PolicyIndex, QIndex
+from engine.solver import ibr_solve
+from engine.simulation import run_batch
+from engine.stats import StreamingStats
+from engine.tables import policy_to_array, q_table_to_array
+
+DEFAULT_CHUNK = 10000
+
+
+# --- Checkpoints ---
+
+class CheckpointStore:
+    """
+    One file per finished work unit under <out_dir>/checkpoints.
+    Solves are stored as .npz, simulation chunks as StreamingStats states
+    in .state.json.
+    """
+
+    def __init__(self, out_dir):
+        self.dir = os.path.join(out_dir, 'checkpoints')
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, key, ext):
+        safe = re.sub(r'[^A-Za-z0-9_.=-]+', '_', key)
+        return os.path.join(self.dir, safe + ext)
+
+    def has_solve(self, key):
+        return os.path.exists(self._path(key, '.npz'))
+
+    def save_solve(self, key, solve):
+        path = self._path(key, '.npz')
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, **solve)
+        os.replace(tmp, path)
+
+    def load_solve(self, key):
+        with np.load(self._path(key, '.npz')) as data:
+            return {k: data[k] for k in data.files}
+
+    def has_state(self, key):
+        return os.path.exists(self._path(key, '.state.json'))
+
+    def save_state(self, key, state):
+        path = self._path(key, '.state.json')
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+    def load_state(self, key):
+        with open(self._path(key, '.state.json')) as f:
+            return json.load(f)
+
+
+# --- Work units (top-level so they pickle into pool workers) ---
+
+def solve_unit(weights):
+    """Solve one persona pair and return arrays ready for np.savez."""
+    w1, w2 = weights
+    result = ibr_solve(persona1_weights=w1, persona2_weights=w2,
+                       log_iterations=0)
+    return {
+        'policy1': policy_to_array(result['policy1']),
+        'policy2': policy_to_array(result['policy2']),
+        'q_table1': q_table_to_array(result['q_table1']),
+        'q_table2': q_table_to_array(result['q_table2']),
+        'iterations': np.array(result['iterations']),
+        'converged': np.array(result['converged']),
+        'residuals': np.array(result['residuals']),
+        'exploitability': np.array([result['exploitability']['p1'],
+                                    result['exploitability']['p2']]),
+    }
+
+
+def simulate_unit(args):
+    """Run one seeded chunk of episodes and return its aggregate state."""
+    solve, n_episodes, seed, optimal_p1, optimal_p2 = args
+    np.random.seed(seed)
+    agg = StreamingStats()
+    run_batch(solve['policy1'], solve['policy2'], n_episodes,
+              q_table1=solve['q_table1'], q_table2=solve['q_table2'],
+              optimal_p1=optimal_p1, optimal_p2=optimal_p2,
+              keep_episodes=False, aggregator=agg)
+    return agg.to_state()
+
+
+class _Keyed:
+    """Wrap a unit so pool results carry their checkpoint key."""
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __call__(self, item):
+        key, args = item
+        return key, self.fn(args)
+
+
+def _run_units(fn, items, jobs, on_result):
+    """Map fn over (key, args) items on a pool, reporting as each finishes."""
+    if not items:
+        return
+    if jobs == 1 or len(items) == 1:
+        for key, args in items:
+            on_result(key, fn(args))
+        return
+    with Pool(processes=min(jobs, len(items))) as pool:
+        for key, value in pool.imap_unordered(_Keyed(fn), items):
+            on_result(key, value)
+
+
+# --- Jobs ---
+
+def resolve_weights(persona):
+    """
+    Persona name or explicit (w_win, w_lose, w_tie) -> canonical weight
+    tuple. Raises ValueError for unknown names or invalid weights.
+    """
+    return resolve_persona(persona)[1]
+
+
+def solve_key(label1, label2):
+    return 'solve_%s__%s' % (label1, label2)
+
+
+def checkpoint_key(label1, weights1, label2, weights2):
+    """
+    Checkpoint name of a pair's solve: solve_key plus a hash of the
+    weights and the solver config, so a changed persona definition or
+    config (or labels that sanitise alike) never reuses an old solve.
+    """
+    digest = solve_config_key(weights1, weights2, SOFTMAX_BETA,
+                              log_iterations=0)
+    return '%s_%s' % (solve_key(label1, label2), digest[:16])
+
+
+def _solve_digest(solve):
+    """Short hash of a solve's policies, Q-tables and SIMULATION_BETA."""
+    digest = hashlib.sha1(repr(SIMULATION_BETA).encode())
+    for key in ('policy1', 'policy2', 'q_table1', 'q_table2'):
+        digest.update(np.ascontiguousarray(solve[key]).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def run_solves(pairs, store, jobs=None, log=print):
+    """
+    Solve every (label1, weights1, label2, weights2) pair not already
+    checkpointed. Returns {solve_key: solve arrays}.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    todo = []
+    for label1, w1, label2, w2 in pairs:
+        key = checkpoint_key(label1, w1, label2, w2)
+        if not store.has_solve(key):
+            todo.append((key, (w1, w2)))
+
+    log('solves: %d total, %d cached' % (len(pairs), len(pairs) - len(todo)))
+
+    def done(key, solve):
+        store.save_solve(key, solve)
+        log('  solved %s (%d iterations, converged=%s)'
+            % (key, int(solve['iterations']), bool(solve['converged'])))
+
+    _run_units(solve_unit, todo, jobs, done)
+    return {solve_key(l1, l2): store.load_solve(checkpoint_key(l1, w1, l2,
+                                                               w2))
+            for l1, w1, l2, w2 in pairs}
+
+
+def run_simulations(solves, n_episodes, store, optimal_p1=True,
+                    optimal_p2=True, chunk=DEFAULT_CHUNK, seed=0,
+                    jobs=None, log=print):
+    """
+    Simulate n_episodes for every solved pair, split into seeded chunks
+    that are checkpointed individually (keyed by the solve's contents, so
+    a re-solved pair is simulated afresh). Returns {solve_key: merged
+    stats}.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    mode = '%s%s' % ('g' if optimal_p1 else 's', 'g' if optimal_p2 else 's')
+    n_chunks = max(1, -(-n_episodes // chunk))
+    chunk_keys = {}
+    todo = []
+    for key, solve in solves.items():
+        chunk_keys[key] = []
+        digest = _solve_digest(solve)
+        for c in range(n_chunks):
+            size = min(chunk, n_episodes - c * chunk)
+            ckey = 'sim_%s_%s_%s_n%d_s%d_c%d' % (key[len('solve_'):], digest,
+                                                 mode, n_episodes, seed, c)
+            chunk_keys[key].append(ckey)
+            if not store.has_state(ckey):
+                todo.append((ckey, (solve, size, seed + c,
+                                    optimal_p1, optimal_p2)))
+
+    total = sum(len(v) for v in chunk_keys.values())
+    log('simulation chunks: %d total, %d cached' % (total, total - len(todo)))
+
+    def done(ckey, state):
+        store.save_state(ckey, state)
+        log('  finished %s' % ckey)
+
+    _run_units(simulate_unit, todo, jobs, done)
+    merged = {}
+    for key, ckeys in chunk_keys.items():
+        agg = StreamingStats()
+        for c in ckeys:
+            agg.merge(StreamingStats.from_state(store.load_state(c)))
+        merged[key] = agg.stats()
+    return merged
+
+
+def run_magazine(pair, capacity, n_episodes, store, resolution=None,
+                 optimal_p1=True, optimal_p2=True, chunk=DEFAULT_CHUNK,
+                 seed=0, log=print):
+    """
+    Solve and simulate one (label1, weights1, label2, weights2) pair in the
+    magazine-capacity variant (engine.magazine) with the tensorised
+    engine. The solve and every seeded chunk are checkpointed.
+
+    Returns:
+        (game, solve arrays, merged stats)
+    """
+    label1, w1, label2, w2 = pair
+    game = MagazineGame(capacity, resolution)
+    key = 'magazine_K%d_M%d_%s' % (capacity, game.resolution,
+                                   checkpoint_key(label1, w1, label2, w2))
+    if store.has_solve(key):
+        log('magazine solve %s cached' % key)
+    else:
+        result = magazine_solver.ibr_solve(game, w1, w2)
+        store.save_solve(key, {k: np.asarray(v) for k, v in result.items()})
+        log('  solved %s (%d iterations, converged=%s)'
+            % (key, result['iterations'], result['converged']))
+    solve = store.load_solve(key)
+
+    mode = '%s%s' % ('g' if optimal_p1 else 's', 'g' if optimal_p2 else 's')
+    agg = StreamingStats()
+    for c in range(max(1, -(-n_episodes // chunk))):
+        ckey = 'sim_%s_%s_n%d_s%d_c%d' % (key, mode, n_episodes, seed, c)
+        if not store.has_state(ckey):
+            chunk_agg = StreamingStats()
+            magazine_solver.run_batch(game, solve,
+                                      min(chunk, n_episodes - c * chunk),
+                                      optimal_p1, optimal_p2, seed=seed + c,
+                                      aggregator=chunk_agg)
+            store.save_state(ckey, chunk_agg.to_state())
+            log('  finished %s' % ckey)
+        agg.merge(StreamingStats.from_state(store.load_state(ckey)))
+    return game, solve, agg.stats()
+
+
+def run_export(pair, n_episodes, store, path, optimal_p1=True,
+               optimal_p2=True, chunk=DEFAULT_CHUNK, seed=0, log=print):
+    """
+    Solve one (label1, weights1, label2, weights2) pair (checkpointed)
+    and write its episodes to the memory-mapped dataset at path
+    (engine.dataset); a partial dataset from an interrupted run is
+    continued.
+
+    Returns:
+        (solve arrays, EpisodeDataset)
+    """
+    label1, w1, label2, w2 = pair
+    solve = run_solves([pair], store, jobs=1,
+                       log=log)[solve_key(label1, label2)]
+    tables = {
+        'policy_index1': PolicyIndex(solve['policy1']),
+        'policy_index2': PolicyIndex(solve['policy2']),
+        'q_index1': QIndex(solve['q_table1']),
+        'q_index2': QIndex(solve['q_table2']),
+    }
+    attrs = {'persona1': label1, 'persona2': label2,
+             'persona1_weights': list(w1), 'persona2_weights': list(w2)}
+    dataset = export_episodes(tables, path, n_episodes, optimal_p1,
+                              optimal_p2, chunk=chunk, seed=seed,
+                              attrs=attrs, log=log)
+    return solve, dataset
+
+
+# --- Output ---
+
+def flatten_stats(stats):
+    """
+    Stats dict -> flat row (termination distribution and standard errors
+    as columns).
+    """
+    row = {k: v for k, v in stats.items()
+           if k not in ('termination_distribution', 'reward_distribution',
+                        'se')}
+    dist = stats.get('termination_distribution', {})
+    for r in range(1, T + 2):
+        row['term_round_%d' % r] = dist.get(r, dist.get(str(r), 0))
+    for k, v in stats.get('se', {}).items():
+        row['se_' + k] = v
+    return row
+
+
+OUTPUT_FORMATS = ('.csv', '.npz', '.parquet')
+
+
+def check_output(path):
+    """
+    Fail fast on an unusable results path (unknown extension, or Parquet
+    without pyarrow) before any work is done.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in OUTPUT_FORMATS:
+        raise ValueError('Unsupported output format %r (use %s)'
+                         % (ext, ', '.join(OUTPUT_FORMATS)))
+    if ext == '.parquet':
+        _import_pyarrow()
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError('Parquet output requires pyarrow '
+                         '(pip install pyarrow); use .csv or .npz')
+    return pa, pq
+
+
+def write_rows(rows, path):
+    """
+    Write a list of flat dicts. Format follows the extension:
+    .csv, .npz (one array per column) or .parquet (requires pyarrow).
+    """
+    check_output(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    columns = list(rows[0].keys()) if rows else []
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == '.csv':
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+    elif ext == '.npz':
+        np.savez(path, **{c: np.array([r[c] for r in rows]) for c in columns})
+    else:
+        pa, pq = _import_pyarrow()
+        pq.write_table(pa.Table.from_pylist(rows), path)
@@ -2,8 +2,11 @@
 Bayesian belief updates under partial observability.
 Handles likelihood computation, Bayes update, and belief propagation.
 """
-from config import BELIEF_GRID, DELTA
+import numpy as np
+from config import T, BELIEF_GRID, DELTA, N_BELIEFS
 from engine.game import legal_actions, outcome, ammo_transition
+from engine.tables import (N_ACTIONS, OUTCOME_TABLE, NEXT_AMMO, CONTINUE,
+                           LEGAL_MASK, p_to_idx, policy_to_array)
 
 
 def snap_to_grid(p):
@@ -132,3 +135,114 @@ def get_opp_action_prob(opp_policy, opp_ammo, action, t, belief_p):
     # Policy is stored as policy[t][ammo][p_idx] -> dict of action -> prob
     action_probs = opp_policy[t][opp_ammo][p_idx]
     return action_probs.get(action, 0.0)
+
+
+# --- Vectorized API ---
+# Batch versions of the functions above. Every per-episode argument may be a
+# scalar or an array (broadcast against each other); actions and outcomes are
+# integer indices (see engine.tables). opp_policy may be a policy dict or a
+# policy array from policy_to_array.
+
+def _joint_terms(own_ammo, my_action, opp_policy, t, belief_p, player):
+    """
+    Opponent action probabilities and outcomes for every hypothesis
+    (a_opp, u_opp). Returns (probs, outcomes), each of shape (N, 2, N_ACTIONS).
+    """
+    arr = policy_to_array(opp_policy)
+    own_ammo, my_action, t, belief_p = np.broadcast_arrays(
+        *(np.atleast_1d(x) for x in (own_ammo, my_action, t, belief_p)))
+    p_idx = p_to_idx(belief_p)
+
+    a_opp = np.arange(2)[None, :, None]
+    u_opp = np.arange(N_ACTIONS)[None, None, :]
+    own = own_ammo[:, None, None]
+    mine = my_action[:, None, None]
+
+    probs = arr[t[:, None, None], a_opp, p_idx[:, None, None], u_opp]
+    if player == 1:
+        outcomes = OUTCOME_TABLE[own, a_opp, mine, u_opp]
+    else:
+        outcomes = OUTCOME_TABLE[a_opp, own, u_opp, mine]
+    return probs, outcomes
+
+
+def compute_likelihood_batch(own_ammo, opp_ammo_hyp, my_action,
+                             observed_outcome, opp_policy, t, belief_p,
+                             player):
+    """Vectorized compute_likelihood: one likelihood per episode."""
+    probs, outcomes = _joint_terms(own_ammo, my_action, opp_policy, t,
+                                   belief_p, player)
+    observed = np.atleast_1d(observed_outcome)[:, None, None]
+    lik = np.sum(probs * (outcomes == observed), axis=2)
+    hyp = np.broadcast_to(np.atleast_1d(opp_ammo_hyp), lik.shape[:1])
+    return lik[np.arange(lik.shape[0]), hyp]
+
+
+def bayes_update_batch(prior_p, own_ammo, my_action, observed_outcome,
+                       opp_policy, t, player):
+    """Vectorized bayes_update: posterior P(a_opp=1) per episode."""
+    probs, outcomes = _joint_terms(own_ammo, my_action, opp_policy, t,
+                                   prior_p, player)
+    observed = np.atleast_1d(observed_outcome)[:, None, None]
+    lik = np.sum(probs * (outcomes == observed), axis=2)
+    prior = np.broadcast_to(np.atleast_1d(prior_p).astype(float),
+                            lik.shape[:1])
+
+    numerator = lik[:, 1] * prior
+    denominator = numerator + lik[:, 0] * (1 - prior)
+    informative = denominator >= 1e-12
+    return np.where(informative,
+                    numerator / np.where(informative, denominator, 1.0),
+                    prior)
+
+
+def propagate_belief_batch(prior_p, own_ammo, my_action, observed_outcome,
+                           opp_policy, t, player):
+    """
+    Vectorized propagate_belief.
+
+    Returns:
+        (new_p, new_idx): next-round beliefs and their grid indices. Episodes
+        whose outcome is terminal (or uninformative) keep their prior.
+    """
+    probs, outcomes = _joint_terms(own_ammo, my_action, opp_policy, t,
+                                   prior_p, player)
+    prior = np.broadcast_to(np.atleast_1d(prior_p).astype(float),
+                            probs.shape[:1])
+
+    w_a = np.stack([1 - prior, prior], axis=1)[:, :, None]
+    joint = w_a * probs * (outcomes == CONTINUE)
+    total = joint.sum(axis=(1, 2))
+    armed = (joint * (NEXT_AMMO == 1)[None, :, :]).sum(axis=(1, 2))
+
+    observed = np.broadcast_to(np.atleast_1d(observed_outcome),
+                               prior.shape)
+    update = (observed == CONTINUE) & (total >= 1e-12)
+    new_idx = p_to_idx(np.where(update,
+                                armed / np.where(update, total, 1.0), prior))
+    new_p = np.where(update, BELIEF_GRID[new_idx], prior)
+    return new_p, new_idx
+
+
+def get_opp_action_prob_batch(opp_policy, opp_ammo, action, t, belief_p):
+    """Vectorized get_opp_action_prob: one probability per episode."""
+    arr = policy_to_array(opp_policy)
+    return arr[t, opp_ammo, p_to_idx(belief_p), action]
+
+
+def continue_likelihood_table(opp_policy, player):
+    """
+    lik[t][own_ammo][p_idx][u] = Pr(Continue | own action u) under
+    opp_policy for a player holding belief BELIEF_GRID[p_idx]: the
+    compute_likelihood of both opponent-ammo hypotheses, weighted by the
+    belief. Illegal own actions get 1 (no information).
+    """
+    t, ammo, p_idx, u = [x.ravel() for x in np.meshgrid(
+        np.arange(1, T + 1), [0, 1], np.arange(N_BELIEFS),
+        np.arange(N_ACTIONS), indexing='ij')]
+    p = BELIEF_GRID[p_idx]
+    lik = [compute_likelihood_batch(ammo, hyp, u, CONTINUE, opp_policy, t, p,
+                                    player) for hyp in [0, 1]]
+    table = np.ones((T + 1, 2, N_BELIEFS, N_ACTIONS))
+    table[1:] = ((1 - p) * lik[0] + p * lik[1]).reshape(table[1:].shape)
+    return np.where(LEGAL_MASK[None, :, None, :], table, 1.0)
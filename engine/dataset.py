@@ -0,0 +1,239 @@
+"""
+On-disk episode datasets for offline analysis.
+
+A dataset is a directory with one raw binary file per column (C order,
+little-endian, episodes along the first axis) and a meta.json holding
+the column layout, the number of complete episodes and the generating
+configuration. EpisodeWriter appends batches from run_batch_arrays
+chunk by chunk, so datasets of millions of episodes are generated in
+bounded memory; EpisodeDataset maps every column with np.memmap, so
+filters and aggregates read the files in place without parsing or
+copying them.
+
+Columns (per-round columns are (n, T, 2), one entry per player; see
+run_batch_arrays(record_rounds=True)):
+
+    outcome            config.OUTCOMES index of the episode's outcome
+    termination_round  round the episode ended in (T + 1 = draw)
+    total_rewards      (n, 2) episode rewards, Draw payoff included
+    actions            ACTIONS index played each round (-1 after the end)
+    ammo               ammo before each round (-1 after the end)
+    beliefs            BELIEF_GRID index before each round (-1 after;
+                       int8, or int16 for grids over 127 points)
+    rewards            G + U of each round (0 after the end)
+"""
+import json
+import os
+
+import numpy as np
+from config import T, ACTIONS, OUTCOMES, BELIEF_GRID
+from engine.simulation import run_batch_arrays
+from engine.stats import StreamingStats
+from engine.tables import BELIEF_INDEX_DTYPE, N_ACTIONS
+
+DATASET_VERSION = 1
+# name -> (dtype, per-episode shape); the dtypes are recorded in meta.json
+EPISODE_COLUMNS = {
+    'outcome': ('<i1', ()),
+    'termination_round': ('<i1', ()),
+    'total_rewards': ('<f4', (2,)),
+    'actions': ('<i1', (T, 2)),
+    'ammo': ('<i1', (T, 2)),
+    'beliefs': (BELIEF_INDEX_DTYPE, (T, 2)),
+    'rewards': ('<f4', (T, 2)),
+}
+META_FILE = 'meta.json'
+
+
+def _column_path(path, name):
+    return os.path.join(path, name + '.bin')
+
+
+def _read_meta(path):
+    with open(os.path.join(path, META_FILE)) as f:
+        return json.load(f)
+
+
+def _write_meta(path, meta):
+    target = os.path.join(path, META_FILE)
+    with open(target + '.tmp', 'w') as f:
+        json.dump(meta, f)
+    os.replace(target + '.tmp', target)
+
+
+class EpisodeWriter:
+    """
+    Appends episode batches to a dataset directory, creating it if needed.
+
+    Each append() writes every column and then records the new episode
+    count in meta.json, so readers only ever see whole batches. Reopening
+    an existing dataset continues it (attrs, T, the belief grid and the
+    column layout must match) after discarding any bytes an interrupted
+    append left behind. Integer values outside a column's dtype raise
+    ValueError instead of wrapping.
+    """
+
+    def __init__(self, path, attrs=None):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        attrs = attrs or {}
+        layout = {
+            'T': T,
+            'actions': ACTIONS,
+            'outcomes': OUTCOMES,
+            'belief_grid': BELIEF_GRID.tolist(),
+            'columns': {name: {'dtype': dtype, 'shape': list(shape)}
+                        for name, (dtype, shape) in EPISODE_COLUMNS.items()},
+        }
+        if os.path.exists(os.path.join(path, META_FILE)):
+            self.meta = _read_meta(path)
+            if self.meta['attrs'] != json.loads(json.dumps(attrs)):
+                raise ValueError('dataset %s was generated with %s'
+                                 % (path, self.meta['attrs']))
+            if any(self.meta[key] != json.loads(json.dumps(value))
+                   for key, value in layout.items()):
+                raise ValueError('dataset %s was written with another game '
+                                 'configuration or column layout' % path)
+        else:
+            self.meta = dict(layout, version=DATASET_VERSION, n_episodes=0,
+                             attrs=attrs)
+            _write_meta(path, self.meta)
+        self.truncate(self.meta['n_episodes'])
+
+    def __len__(self):
+        return self.meta['n_episodes']
+
+    def truncate(self, n_episodes):
+        """Keep only the first n_episodes episodes."""
+        self.meta['n_episodes'] = min(n_episodes, self.meta['n_episodes'])
+        _write_meta(self.path, self.meta)
+        for name, (dtype, shape) in EPISODE_COLUMNS.items():
+            row_bytes = np.dtype(dtype).itemsize * int(np.prod(shape))
+            with open(_column_path(self.path, name), 'ab') as f:
+                f.truncate(self.meta['n_episodes'] * row_bytes)
+
+    def append(self, batch):
+        """Write one run_batch_arrays(record_rounds=True) batch."""
+        n = len(batch['outcome'])
+        for name, (dtype, shape) in EPISODE_COLUMNS.items():
+            values = np.asarray(batch[name])
+            if np.issubdtype(np.dtype(dtype), np.integer) and values.size:
+                info = np.iinfo(dtype)
+                if values.min() < info.min or values.max() > info.max:
+                    raise ValueError('column %s has values outside %s'
+                                     % (name, dtype))
+            column = np.ascontiguousarray(values, dtype=dtype)
+            if column.shape != (n,) + shape:
+                raise ValueError('column %s has shape %s, expected %s'
+                                 % (name, column.shape, (n,) + shape))
+            with open(_column_path(self.path, name), 'ab') as f:
+                f.write(column.tobytes())
+        self.meta['n_episodes'] += n
+        _write_meta(self.path, self.meta)
+
+
+def export_episodes(result, path, n_episodes, optimal_p1=True,
+                    optimal_p2=True, chunk=100000, seed=0, attrs=None,
+                    log=None):
+    """
+    Simulate n_episodes of a solved pair (see run_batch_arrays) straight
+    into the dataset at path, one chunk at a time; chunk c uses
+    RandomState(seed + c). Re-running continues a partial dataset from
+    its last whole chunk (a shorter final chunk is regenerated) and cuts
+    a longer one back to n_episodes.
+
+    Returns:
+        EpisodeDataset over the written episodes
+    """
+    attrs = dict(attrs or {}, optimal_p1=optimal_p1, optimal_p2=optimal_p2,
+                 seed=seed, chunk=chunk)
+    writer = EpisodeWriter(path, attrs)
+    first = min(len(writer), n_episodes) // chunk
+    n_chunks = -(-n_episodes // chunk)
+    writer.truncate(first * chunk)
+    for c in range(first, n_chunks):
+        size = min(chunk, n_episodes - c * chunk)
+        writer.append(run_batch_arrays(result, size, optimal_p1, optimal_p2,
+                                       np.random.RandomState(seed + c),
+                                       record_rounds=True))
+        if log is not None:
+            log('  wrote %d / %d episodes' % (len(writer), n_episodes))
+    return EpisodeDataset(path)
+
+
+class EpisodeDataset:
+    """
+    Read-only, memory-mapped view of an episode dataset.
+
+    ds['actions'] is an np.memmap of the column; slices of it are views
+    into the file and boolean masks or index arrays copy only the rows
+    they select. Aggregates run over chunks of rows, so they work on
+    datasets larger than memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.meta = _read_meta(path)
+        self.attrs = self.meta['attrs']
+        n = self.meta['n_episodes']
+        self.columns = {}
+        for name, spec in self.meta['columns'].items():
+            shape = (n,) + tuple(spec['shape'])
+            if n:
+                self.columns[name] = np.memmap(_column_path(path, name),
+                                               dtype=spec['dtype'], mode='r',
+                                               shape=shape)
+            else:
+                self.columns[name] = np.empty(shape, dtype=spec['dtype'])
+
+    def __len__(self):
+        return self.meta['n_episodes']
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def outcome_mask(self, *outcomes):
+        """Boolean mask of episodes ending in any of the named outcomes."""
+        codes = [self.meta['outcomes'].index(o) for o in outcomes]
+        return np.isin(self.columns['outcome'], codes)
+
+    def select(self, rows, columns=None):
+        """Copy of the given rows (mask, indices or slice) of columns."""
+        return {name: np.asarray(self.columns[name][rows])
+                for name in (columns or self.columns)}
+
+    def iter_chunks(self, size=1000000, columns=None):
+        """(start, {name: view}) for consecutive blocks of rows."""
+        for start in range(0, len(self), size):
+            yield start, {name: self.columns[name][start:start + size]
+                          for name in (columns or self.columns)}
+
+    def stats(self, mask=None, chunk=1000000):
+        """Stats dict (run_batch format) of all or the masked episodes."""
+        agg = StreamingStats()
+        keys = ['outcome', 'total_rewards', 'termination_round']
+        for start, block in self.iter_chunks(chunk, keys):
+            if mask is not None:
+                rows = mask[start:start + chunk]
+                block = {k: v[rows] for k, v in block.items()}
+            agg.add_arrays(block['outcome'].astype(np.intp),
+                           block['total_rewards'],
+                           block['termination_round'].astype(np.intp))
+        return agg.stats()
+
+    def action_counts(self, mask=None, chunk=1000000):
+        """
+        counts[t - 1, player - 1, u] = episodes in which the player played
+        ACTIONS[u] in round t (all or the masked episodes).
+        """
+        counts = np.zeros((T, 2, N_ACTIONS), dtype=np.int64)
+        cells = np.arange(T * 2).reshape(T, 2) * N_ACTIONS
+        for start, block in self.iter_chunks(chunk, ['actions']):
+            actions = block['actions']
+            if mask is not None:
+                actions = actions[mask[start:start + chunk]]
+            played = actions >= 0
+            counts += np.bincount(
+                (cells + actions)[played], minlength=counts.size
+            ).reshape(counts.shape)
+        return counts
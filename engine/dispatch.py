@@ -0,0 +1,319 @@
+"""
+Managed process pool for the web server.
+
+Request threads hand cold solves and simulation batches to a long-lived
+pool of worker processes and wait on the job's future with a timeout, so
+CPU-bound work never runs under the server's GIL and cache hits (and
+endpoints such as /api/personas) are answered at once, whatever the
+number of solves in flight.
+
+- Concurrent requests for the same uncached pair share one solve job,
+  and a solve whose request timed out still finishes and is cached.
+- Admission control: at most max_pending jobs are queued or running;
+  beyond that submissions raise Overloaded (HTTP 503) instead of queueing
+  without bound.
+- Jobs that report progress (the SSE streams) put their events on a
+  multiprocessing Manager queue, which the request thread relays to its
+  progress callback; a truthy return sets a Manager event that cancels
+  the job.
+- call() runs any module-level function over solved pairs in a worker
+  (population dynamics, persona inference).
+
+The pool and the manager are started on first use with the 'spawn'
+start method, which is safe in a threaded server.
+"""
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from config import (SOFTMAX_BETA, SERVE_WORKERS, SERVE_MAX_PENDING,
+                    SERVE_TIMEOUT)
+from engine.parallel import default_jobs
+from engine.service import SolverService
+from engine.simulation import run_batch
+
+# SolverResult arrays a simulation worker needs
+SIMULATION_KEYS = ('policy1', 'policy2', 'q_table1', 'q_table2')
+# Seconds between checks for a finished job while relaying progress
+RELAY_POLL = 0.1
+
+
+class Overloaded(RuntimeError):
+    """The dispatcher is at its admission limit; retry later."""
+
+
+def _channel_progress(channel):
+    """Worker: progress callback feeding an (events, cancel) channel."""
+    events, cancel = channel
+
+    def progress(event):
+        events.put(event)
+        return cancel.is_set()
+    return progress
+
+
+def _simulate_task(tables, n_episodes, kwargs, channel=None):
+    """Worker: run_batch over the solved pair's policies and Q-tables."""
+    if channel is not None:
+        kwargs = dict(kwargs, progress=_channel_progress(channel))
+    return run_batch(tables['policy1'], tables['policy2'], n_episodes,
+                     q_table1=tables['q_table1'],
+                     q_table2=tables['q_table2'], **kwargs)
+
+
+def _call_task(fn, results, args, kwargs):
+    """Worker: fn(service, ...) over a SolverService holding results."""
+    service = SolverService()
+    for full_key, result in results.items():
+        result.br_cache = service.br_cache
+        service._insert(full_key, result)
+    return fn(service, *args, **kwargs)
+
+
+def _resolved(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+class Dispatcher:
+    """
+    Runs SolverService solves and run_batch simulations in a process pool.
+
+    solve / solve_many / simulate / call block the calling request thread
+    only while waiting (at most the timeout) and raise Overloaded or
+    concurrent.futures.TimeoutError. solve and solve_many mirror the
+    SolverService methods, so a Dispatcher can stand in for the service.
+    solve_stream and simulate with progress relay the job's progress
+    events instead and wait until it finishes.
+    """
+
+    def __init__(self, service, workers=SERVE_WORKERS,
+                 max_pending=SERVE_MAX_PENDING, timeout=SERVE_TIMEOUT):
+        self.service = service
+        self.workers = workers or default_jobs()
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self._pool = None
+        self._manager = None
+        self._solves = {}
+        self._lock = threading.RLock()
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def _channel(self):
+        """New (events, cancel) pair of Manager proxies for one job."""
+        with self._lock:
+            if self._manager is None:
+                self._manager = multiprocessing.get_context('spawn').Manager()
+            return self._manager.Queue(), self._manager.Event()
+
+    @staticmethod
+    def _relay(future, channel, progress):
+        """
+        Pass the job's progress events to progress (in this thread) until
+        it finishes; a truthy return asks the job to stop. Returns the
+        job's result.
+        """
+        events, cancel = channel
+        while True:
+            try:
+                event = events.get(timeout=RELAY_POLL)
+            except queue.Empty:
+                # Workers queue every event before returning
+                if future.done():
+                    return future.result()
+                continue
+            if progress(event):
+                cancel.set()
+
+    def _submit(self, submit):
+        """
+        Admit one job and start it with submit(executor); a broken pool
+        (a worker died) is replaced once. Caller holds the lock.
+        """
+        if self.pending >= self.max_pending:
+            raise Overloaded('%d jobs already queued or running'
+                             % self.pending)
+        try:
+            future = submit(self._executor())
+        except BrokenProcessPool:
+            self._pool = None
+            future = submit(self._executor())
+        self.pending += 1
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future):
+        with self._lock:
+            self.pending -= 1
+
+    def _wait_time(self, timeout):
+        return self.timeout if timeout is None else min(timeout,
+                                                        self.timeout)
+
+    def submit_solve(self, persona1_weights, persona2_weights,
+                     beta=SOFTMAX_BETA):
+        """
+        Future of the pair's SolverResult: already resolved on a cache hit,
+        shared with a running solve of the same pair, else a new job.
+        """
+        result = self.service.get(persona1_weights, persona2_weights, beta)
+        if result is not None:
+            return _resolved(result)
+        full_key = self.service._full_key(persona1_weights,
+                                          persona2_weights, beta)
+        with self._lock:
+            future = self._solves.get(full_key)
+            if future is not None:
+                return future
+            # The job may have finished (and been cached) since the lookup
+            result = self.service.get(persona1_weights, persona2_weights,
+                                      beta)
+            if result is not None:
+                return _resolved(result)
+            future = self._submit(lambda pool: self.service.submit(
+                pool, persona1_weights, persona2_weights, beta))
+            self._register(full_key, future)
+            return future
+
+    def _register(self, full_key, future):
+        """Share a running solve with later requests for the same pair."""
+        self._solves[full_key] = future
+        future.add_done_callback(lambda _: self._solves.pop(full_key, None))
+
+    def solve(self, persona1_weights, persona2_weights, beta=SOFTMAX_BETA,
+              timeout=None):
+        """
+        Cached result for the pair, or wait for its pooled solve. A shared
+        solve that its stream cancelled is started again.
+        """
+        while True:
+            future = self.submit_solve(persona1_weights, persona2_weights,
+                                       beta)
+            result = future.result(self._wait_time(timeout))
+            if not result.get('cancelled'):
+                return result
+
+    def solve_stream(self, persona1_weights, persona2_weights,
+                     beta=SOFTMAX_BETA, progress=None):
+        """
+        solve() reporting the pooled solve's progress events to progress
+        (see ibr_solve; a truthy return cancels the solve, which is then
+        returned but not cached). Cache hits return at once; a pair that
+        is already being solved is waited for (at most the dispatcher
+        timeout) without progress events. The streamed solve is shared
+        with other requests for the pair, as submit_solve's are.
+        """
+        full_key = self.service._full_key(persona1_weights,
+                                          persona2_weights, beta)
+        channel = None
+        while True:
+            result = self.service.get(persona1_weights, persona2_weights,
+                                      beta)
+            if result is not None:
+                return result
+            with self._lock:
+                future = self._solves.get(full_key)
+                if future is None and channel is not None:
+                    future = self._submit(lambda pool: self.service.submit(
+                        pool, persona1_weights, persona2_weights, beta,
+                        channel))
+                    self._register(full_key, future)
+                    break
+            if future is None:
+                # Manager proxies are created outside the lock, then the
+                # pair is checked again
+                channel = self._channel()
+                continue
+            result = future.result(self._wait_time(None))
+            if not result.get('cancelled'):
+                return result
+        return self._relay(future, channel, progress)
+
+    def solve_many(self, weight_pairs, beta=SOFTMAX_BETA, jobs=None,
+                   timeout=None):
+        """
+        Solve every uncached pair in the pool (jobs is accepted for
+        SolverService compatibility; the pool size applies). The whole
+        batch is admitted or rejected at once. Returns the number of new
+        solves.
+        """
+        with self._lock:
+            todo = {self.service._full_key(w1, w2, beta)
+                    for w1, w2 in weight_pairs
+                    if self.service.get(w1, w2, beta) is None}
+            new = len(todo - set(self._solves))
+            if self.pending + new > self.max_pending:
+                raise Overloaded('%d uncached pairs exceed the %d free job '
+                                 'slots' % (new, self.max_pending -
+                                            self.pending))
+            futures = [self.submit_solve(w1, w2, b) for w1, w2, b in todo]
+        done, not_done = wait(futures, self._wait_time(timeout))
+        if not_done:
+            raise TimeoutError('%d of %d solves still running'
+                               % (len(not_done), len(futures)))
+        for future in done:
+            future.result()
+        return new
+
+    def simulate(self, result, n_episodes, timeout=None, progress=None,
+                 **kwargs):
+        """
+        run_batch for a solved pair in a worker process (keyword
+        arguments as run_batch's). With progress, the batch's events are
+        relayed to it and the call waits for the batch whatever the
+        timeout. Returns (stats, episodes).
+        """
+        tables = {key: result.array(key) for key in SIMULATION_KEYS}
+        channel = self._channel() if progress is not None else None
+        with self._lock:
+            future = self._submit(lambda pool: pool.submit(
+                _simulate_task, tables, n_episodes, kwargs, channel))
+        if channel is not None:
+            return self._relay(future, channel, progress)
+        return self._result(future, timeout)
+
+    def call(self, fn, weight_pairs, beta=SOFTMAX_BETA, args=(), kwargs=None,
+             timeout=None):
+        """
+        fn(service, *args, **kwargs) in a worker process, where service is
+        a SolverService holding the results of weight_pairs at beta
+        (solved through the pool first), so fn's solves are cache hits.
+        fn must be a module-level function returning a picklable value.
+        """
+        self.solve_many(weight_pairs, beta, timeout=timeout)
+        results = {}
+        for w1, w2 in weight_pairs:
+            results[self.service._full_key(w1, w2, beta)] = \
+                self.solve(w1, w2, beta, timeout)
+        with self._lock:
+            future = self._submit(lambda pool: pool.submit(
+                _call_task, fn, results, args, kwargs or {}))
+        return self._result(future, timeout)
+
+    def _result(self, future, timeout):
+        """The job's result, cancelling it if it has not started in time."""
+        try:
+            return future.result(self._wait_time(timeout))
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def shutdown(self):
+        """Stop the pool (running jobs finish first) and the manager."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            if self._manager is not None:
+                self._manager.shutdown()
+                self._manager = None
@@ -4,12 +4,17 @@ Core game rules: legal actions, outcomes, transitions, payoffs.
 from config import STAGE_UTILITY, OUTCOME_PAYOFF
 
 
-def legal_actions(ammo):
-    """Return legal actions for a player with given ammo (0 or 1)."""
+def legal_actions(ammo, capacity=1):
+    """
+    Return legal actions for a player with given ammo (0..capacity).
+    Shoot needs a round in the magazine, Reload a free slot; the binary
+    game (capacity 1) has ['R', 'B'] unarmed and ['S', 'B'] armed.
+    """
     if ammo == 0:
         return ['R', 'B']
-    else:
+    if ammo >= capacity:
         return ['S', 'B']
+    return ['S', 'B', 'R']
 
 
 def outcome(state, u1, u2):
@@ -31,15 +36,16 @@ def outcome(state, u1, u2):
     return 'Continue'
 
 
-def ammo_transition(a, u):
+def ammo_transition(a, u, capacity=1):
     """
     Deterministic ammo transition: T(a, u).
-    Reload -> 1, Shoot -> 0, Block -> unchanged.
+    Reload -> one more round (at most capacity), Shoot -> one fewer (at
+    least 0), Block -> unchanged. With capacity 1: Reload -> 1, Shoot -> 0.
     """
     if u == 'R':
-        return 1
+        return min(a + 1, capacity)
     if u == 'S':
-        return 0
+        return max(a - 1, 0)
     return a  # Block
 
 
@@ -0,0 +1,257 @@
+"""
+Opponent-persona inference.
+
+In the standard model each player knows the opponent's persona and
+tracks only P(opponent armed) under that persona's equilibrium policy.
+Here a player is instead unsure which of several candidate personas it
+faces and holds a joint belief over (opponent persona k, opponent ammo).
+The joint belief factorises exactly into persona weights P(k | history)
+and one armed-belief per candidate, P(armed | history, k), which evolves
+on the belief grid as propagate_belief would under candidate k's policy.
+After every Continue:
+
+    P(k) <- P(k) * Pr(Continue | k) / normaliser
+    p_idx[k] <- next belief index under candidate k
+
+Both factors come from tables precomputed once per candidate
+(continue_likelihood_table, belief_transition_table), so the batched
+simulation loop only adds lookups, a product and a normalisation per
+round. Actions follow the posterior-weighted Q-values of the player's
+best responses to each candidate (greedy or softmax(SIMULATION_BETA),
+as in run_episode). With a single candidate this is exactly
+run_batch_arrays.
+"""
+import numpy as np
+from config import T, INITIAL_BELIEF, SIMULATION_BETA
+from engine.belief import continue_likelihood_table
+from engine.game import outcome_payoff
+from engine.policy_index import LEGAL_ACTION_IDX
+from engine.stats import StreamingStats
+from engine.tables import (CONTINUE, DRAW, OUTCOME_TABLE, NEXT_AMMO,
+                           REWARD_TABLE, p_to_idx)
+
+# Persona weights are left unchanged when every candidate rules out the
+# observation (below this total likelihood)
+_TINY = 1e-12
+
+
+class OpponentModel:
+    """
+    One player's inference tables over K candidate opponent personas,
+    built from the solved matchups of the player's persona against each
+    candidate (results[k], with the player in its own seat):
+
+        labels:      candidate labels
+        prior:       (K,) initial persona weights
+        q:           (K, T + 1, 2, N_BELIEFS, 2) Q-values of the player's
+                     best response to each candidate (LEGAL_ORDER actions)
+        likelihood:  (K, T + 1, 2, N_BELIEFS, N_ACTIONS) Pr(Continue) of
+                     each own action under each candidate's policy
+        next_belief: (K, T + 1, 2, N_BELIEFS, N_ACTIONS) armed-belief
+                     index after Continue under each candidate
+    """
+
+    def __init__(self, player, results, labels=None, prior=None):
+        opp_key = 'policy_index%d' % (3 - player)
+        self.player = player
+        self.labels = list(labels or range(len(results)))
+        self.q = np.stack([r['q_index%d' % player]._legal_q
+                           for r in results])
+        self.likelihood = np.stack([
+            continue_likelihood_table(r[opp_key].probs, player)
+            for r in results])
+        self.next_belief = np.stack([
+            r[opp_key].belief_transitions(player) for r in results])
+        prior = np.ones(len(results)) if prior is None else \
+            np.asarray(prior, dtype=float)
+        if prior.shape != (len(results),) or np.any(prior < 0) or \
+                prior.sum() <= 0:
+            raise ValueError('prior must give a non-negative weight to each '
+                             'candidate')
+        self.prior = prior / prior.sum()
+
+
+def _choose(model, optimal, t, ammo, p_idx, weights, u):
+    """ACTIONS indices from the posterior-weighted legal Q-values."""
+    k = np.arange(len(model.prior))[None, :]
+    q = np.einsum('nk,nka->na', weights,
+                  model.q[k, t, ammo[:, None], p_idx])
+    if optimal:
+        choice = np.argmax(q, axis=-1)
+    else:
+        exp_q = np.exp(SIMULATION_BETA * (q - q.max(axis=-1, keepdims=True)))
+        cdf = np.cumsum(exp_q / exp_q.sum(axis=-1, keepdims=True), axis=-1)
+        cdf = cdf / cdf[:, -1:]
+        choice = np.minimum(np.sum(cdf <= u[:, None], axis=-1),
+                            q.shape[-1] - 1)
+    return LEGAL_ACTION_IDX[ammo, choice]
+
+
+def _update(model, t, ammo, p_idx, weights, action):
+    """Persona weights and per-candidate belief indices after Continue."""
+    k = np.arange(len(model.prior))[None, :]
+    cell = (k, t, ammo[:, None], p_idx, action[:, None])
+    posterior = weights * model.likelihood[cell]
+    total = posterior.sum(axis=1, keepdims=True)
+    informative = total >= _TINY
+    weights = np.where(informative,
+                       posterior / np.where(informative, total, 1.0),
+                       weights)
+    return weights, model.next_belief[cell]
+
+
+def run_batch_inference(model1, model2, n_episodes, optimal_p1=True,
+                        optimal_p2=True, rng=None):
+    """
+    Vectorised episodes in which each player acts on its OpponentModel.
+    A player that knows its opponent gets a single-candidate model of the
+    true matchup.
+
+    rng: optional np.random.RandomState for the action-sampling uniforms
+         (default: the global np.random state)
+
+    Returns:
+        dict of arrays as run_batch_arrays ('outcome', 'total_rewards',
+        'termination_round') plus 'posterior1' / 'posterior2': each
+        player's final persona weights (n, K), and 'posterior_by_round1' /
+        'posterior_by_round2': mean weights (T, K) over the episodes
+        still running at the start of each round
+    """
+    draw = rng.random_sample if rng is not None else np.random.random_sample
+    models = [model1, model2]
+    optimal = [optimal_p1, optimal_p2]
+
+    n = n_episodes
+    start = p_to_idx(INITIAL_BELIEF)
+    ammo = np.zeros((2, n), dtype=np.intp)
+    p_idx = [np.full((n, len(m.prior)), start, dtype=np.intp)
+             for m in models]
+    weights = [np.tile(m.prior, (n, 1)) for m in models]
+    by_round = [np.zeros((T, len(m.prior))) for m in models]
+    totals = np.zeros((n, 2))
+    outcomes = np.full(n, DRAW, dtype=np.intp)
+    rounds = np.full(n, T + 1, dtype=np.intp)
+    alive = np.arange(n)
+
+    for t in range(1, T + 1):
+        if len(alive) == 0:
+            break
+        u = draw((2, len(alive)))
+        a = ammo[:, alive]
+        actions = []
+        for k, model in enumerate(models):
+            by_round[k][t - 1] = weights[k][alive].mean(axis=0)
+            actions.append(_choose(model, optimal[k], t, a[k],
+                                   p_idx[k][alive], weights[k][alive], u[k]))
+        u1, u2 = actions
+        o = OUTCOME_TABLE[a[0], a[1], u1, u2]
+        totals[alive] += REWARD_TABLE[a[0], a[1], u1, u2]
+
+        ended = o != CONTINUE
+        outcomes[alive[ended]] = o[ended]
+        rounds[alive[ended]] = t
+        # Only a Continue is evidence about the opponent's persona; ended
+        # episodes keep the weights they had going into their last round
+        cont = alive[~ended]
+        for k, model in enumerate(models):
+            played = actions[k][~ended]
+            weights[k][cont], p_idx[k][cont] = _update(
+                model, t, a[k][~ended], p_idx[k][cont], weights[k][cont],
+                played)
+            ammo[k, cont] = NEXT_AMMO[a[k][~ended], played]
+        alive = cont
+
+    totals[alive] += outcome_payoff('Draw')
+    return {
+        'outcome': outcomes,
+        'total_rewards': totals,
+        'termination_round': rounds,
+        'posterior1': weights[0],
+        'posterior2': weights[1],
+        'posterior_by_round1': by_round[0],
+        'posterior_by_round2': by_round[1],
+    }
+
+
+def inference_pairs(persona1_weights, persona2_weights, candidates,
+                    infer_p1=True, infer_p2=True):
+    """(persona1_weights, persona2_weights) pairs opponent_models solves."""
+    pairs = [(persona1_weights, persona2_weights)]
+    if infer_p1:
+        pairs += [(persona1_weights, c) for c in candidates]
+    if infer_p2:
+        pairs += [(c, persona2_weights) for c in candidates]
+    return pairs
+
+
+def opponent_models(service, persona1_weights, persona2_weights, candidates,
+                    beta, infer_p1=True, infer_p2=True, labels=None):
+    """
+    OpponentModels for both players of a matchup, solving (or reading
+    cached) every persona-vs-candidate pair through service (a
+    SolverService or Dispatcher). A player with infer off knows its
+    opponent: its model has the true matchup as the only candidate.
+
+    Returns:
+        (model1, model2)
+    """
+    service.solve_many(inference_pairs(persona1_weights, persona2_weights,
+                                       candidates, infer_p1, infer_p2), beta)
+    true = service.solve(persona1_weights, persona2_weights, beta)
+
+    if infer_p1:
+        model1 = OpponentModel(1, [service.solve(persona1_weights, c, beta)
+                                   for c in candidates], labels)
+    else:
+        model1 = OpponentModel(1, [true])
+    if infer_p2:
+        model2 = OpponentModel(2, [service.solve(c, persona2_weights, beta)
+                                   for c in candidates], labels)
+    else:
+        model2 = OpponentModel(2, [true])
+    return model1, model2
+
+
+def _posterior_summary(run, player, weights, candidates):
+    """Mean final / per-round persona weights of one inferring player."""
+    posterior = run['posterior%d' % player]
+    summary = {
+        'mean': posterior.mean(axis=0).tolist(),
+        'by_round': run['posterior_by_round%d' % player].tolist(),
+    }
+    if weights in candidates:
+        # Share of episodes whose most likely persona is the true one
+        truth = candidates.index(weights)
+        summary['map_rate'] = float(np.mean(posterior.argmax(axis=1) ==
+                                            truth))
+    return summary
+
+
+def infer_matchup(service, persona1_weights, persona2_weights, candidates,
+                  beta, n_episodes, infer_p1=True, infer_p2=True,
+                  optimal_p1=True, optimal_p2=True, seed=None):
+    """
+    opponent_models + run_batch_inference for one matchup, summarised.
+
+    Returns:
+        dict: 'stats' (run_batch format) and, per inferring player,
+        'posterior1' / 'posterior2' with the mean final weights ('mean'),
+        the mean weights at the start of each round ('by_round') and, when
+        the true opponent is a candidate, the share of episodes whose most
+        likely candidate is the true one ('map_rate')
+    """
+    model1, model2 = opponent_models(service, persona1_weights,
+                                     persona2_weights, candidates, beta,
+                                     infer_p1, infer_p2)
+    run = run_batch_inference(model1, model2, n_episodes, optimal_p1,
+                              optimal_p2, np.random.RandomState(seed))
+    summary = {'stats': StreamingStats().add_arrays(
+        run['outcome'], run['total_rewards'],
+        run['termination_round']).stats()}
+    if infer_p1:
+        summary['posterior1'] = _posterior_summary(run, 1, persona2_weights,
+                                                   candidates)
+    if infer_p2:
+        summary['posterior2'] = _posterior_summary(run, 2, persona1_weights,
+                                                   candidates)
+    return summary
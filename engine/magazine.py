@@ -0,0 +1,137 @@
+"""
+Generalised Gun-Wall Game with magazine capacity K.
+
+Ammo runs 0..K: Reload adds a round (illegal with a full magazine),
+Shoot spends one (illegal when empty), Block keeps it. Outcomes and stage
+utilities depend only on the joint action, so the payoff tables of the
+binary game carry over unchanged. A player's belief is a distribution
+over the opponent's ammo level, discretised on the simplex lattice of
+resolution M (masses in multiples of 1/M).
+
+MagazineGame(capacity=1) with the default resolution is exactly the
+binary game: its lattice is BELIEF_GRID (beliefs[:, 1] = p) and snap()
+rounds like snap_to_grid. engine.magazine_solver solves and simulates
+any MagazineGame with array operations.
+"""
+from itertools import combinations_with_replacement
+from math import comb
+
+import numpy as np
+from config import ACTIONS, STAGE_UTILITY, DELTA, MAGAZINE_MAX_BELIEFS
+from engine.game import legal_actions, outcome, ammo_transition
+from engine.tables import N_ACTIONS, ACTION_INDEX, OUTCOME_INDEX
+
+
+def default_resolution(capacity):
+    """
+    Finest lattice resolution (at most that of BELIEF_GRID) whose number
+    of beliefs stays within MAGAZINE_MAX_BELIEFS.
+    """
+    resolution = int(round(1 / DELTA))
+    while resolution > 1 and \
+            comb(resolution + capacity, capacity) > MAGAZINE_MAX_BELIEFS:
+        resolution -= 1
+    return resolution
+
+
+def _joint_action_utility():
+    """G[u1, u2] = (G1, G2); STAGE_UTILITY depends only on the actions."""
+    table = np.zeros((N_ACTIONS, N_ACTIONS, 2))
+    seen = {}
+    for entries in STAGE_UTILITY.values():
+        for (u1, u2), g in entries.items():
+            if seen.setdefault((u1, u2), g) != g:
+                raise ValueError('STAGE_UTILITY depends on the ammo state '
+                                 'for %s/%s' % (u1, u2))
+            table[ACTION_INDEX[u1], ACTION_INDEX[u2]] = g
+    return table
+
+
+def _simplex_lattice(capacity, resolution):
+    """
+    All distributions over ammo 0..capacity with masses in multiples of
+    1/resolution, keyed by their tail counts r_j = resolution * P(ammo >= j)
+    (j = 1..capacity) read as base-(resolution + 1) digits. Sorted by key,
+    so with capacity 1 the order is that of BELIEF_GRID.
+
+    Returns:
+        beliefs: (n, capacity + 1) array of distributions
+        keys: (n,) sorted int64 keys
+    """
+    tails = np.array([c[::-1] for c in combinations_with_replacement(
+        range(resolution + 1), capacity)], dtype=np.int64)
+    keys = tails @ (resolution + 1) ** np.arange(capacity - 1, -1, -1,
+                                                 dtype=np.int64)
+    order = np.argsort(keys)
+    tails, keys = tails[order], keys[order]
+    bounds = np.column_stack([np.full(len(tails), resolution), tails,
+                              np.zeros(len(tails), dtype=np.int64)])
+    return -np.diff(bounds, axis=1) / resolution, keys
+
+
+class MagazineGame:
+    """
+    Game definition for magazine capacity K as lookup tables:
+
+        legal_mask[ammo, u]:   action u (ACTIONS order) is legal
+        next_ammo[ammo, u]:    ammo after playing u
+        outcome_table[u1, u2]: config.OUTCOMES index of the joint action
+        stage[u1, u2]:         (G1, G2) stage utilities
+        beliefs[b]:            b-th lattice distribution over opponent ammo
+        initial_belief:        lattice index of 'opponent unarmed'
+    """
+
+    def __init__(self, capacity=1, resolution=None):
+        if capacity < 1:
+            raise ValueError('magazine capacity must be at least 1')
+        self.capacity = capacity
+        self.resolution = resolution or default_resolution(capacity)
+        self.n_ammo = capacity + 1
+
+        self.legal_mask = np.zeros((self.n_ammo, N_ACTIONS), dtype=bool)
+        self.next_ammo = np.zeros((self.n_ammo, N_ACTIONS), dtype=np.intp)
+        for ammo in range(self.n_ammo):
+            for a in legal_actions(ammo, capacity):
+                self.legal_mask[ammo, ACTION_INDEX[a]] = True
+            for a in ACTIONS:
+                self.next_ammo[ammo, ACTION_INDEX[a]] = \
+                    ammo_transition(ammo, a, capacity)
+
+        # Outcomes only depend on the actions; evaluate them in the state
+        # where every joint action is legal
+        self.outcome_table = np.array([
+            [OUTCOME_INDEX[outcome((capacity, capacity), u1, u2)]
+             for u2 in ACTIONS]
+            for u1 in ACTIONS
+        ], dtype=np.intp)
+        self.stage = _joint_action_utility()
+
+        self.beliefs, self._keys = _simplex_lattice(capacity,
+                                                    self.resolution)
+        self.n_beliefs = len(self.beliefs)
+        unarmed = np.zeros(self.n_ammo)
+        unarmed[0] = 1.0
+        self.initial_belief = int(self.snap(unarmed))
+
+    def snap(self, dist):
+        """
+        Lattice index of the nearest belief to each distribution in dist
+        (..., n_ammo): every tail mass P(ammo >= j) is rounded to a
+        multiple of 1/resolution, as snap_to_grid does for p.
+        """
+        dist = np.asarray(dist, dtype=float)
+        tails = np.cumsum(dist[..., :0:-1], axis=-1)[..., ::-1]
+        counts = np.clip(np.rint(tails / (1.0 / self.resolution)), 0,
+                         self.resolution).astype(np.int64)
+        keys = counts @ (self.resolution + 1) ** np.arange(
+            self.capacity - 1, -1, -1, dtype=np.int64)
+        return np.searchsorted(self._keys, keys)
+
+    def describe(self):
+        """JSON-serializable summary of the game size."""
+        return {
+            'capacity': self.capacity,
+            'resolution': self.resolution,
+            'n_beliefs': self.n_beliefs,
+            'n_ammo': self.n_ammo,
+        }
@@ -0,0 +1,277 @@
+"""
+Tensorised IBR solver and episode simulator for MagazineGame.
+
+Same model as engine.solver and engine.simulation: damped simultaneous
+softmax best responses by backward induction, averaged over the last
+iterates when IBR does not converge, with each player's belief updated
+after Continue and the opponent policy read at the player's own belief.
+Every backward-induction step is a handful of array operations over all
+(ammo, belief, action) cells at once instead of per-cell Python loops,
+so magazine capacities of 5-10 stay tractable. For MagazineGame(1) the
+policies match ibr_solve's.
+
+Policies, Q-values and belief transitions are arrays indexed
+[t, ammo, belief, action] / [t, belief, action] with t = 1..T (row 0
+unused) and actions in ACTIONS order.
+"""
+import numpy as np
+from config import (T, OUTCOMES, OUTCOME_PAYOFF, DRAW_PENALTY, IBR_ALPHA,
+                    IBR_EPSILON, IBR_MAX_ITER, SOFTMAX_BETA, SIMULATION_BETA)
+from engine.stats import StreamingStats
+
+CONTINUE = OUTCOMES.index('Continue')
+DRAW = OUTCOMES.index('Draw')
+# Probabilities below this are skipped, as in engine.solver
+_TINY = 1e-12
+
+
+def uniform_policy(game):
+    """Uniform policy over the legal actions of every cell."""
+    probs = game.legal_mask / game.legal_mask.sum(axis=1, keepdims=True)
+    policy = np.zeros((T + 1, game.n_ammo, game.n_beliefs, len(probs[0])))
+    policy[1:] = probs[None, :, None, :]
+    return policy
+
+
+def _player_rewards(game, player, persona_weights):
+    """
+    (R, C): R[u, v] = own stage utility + persona-weighted outcome payoff
+    for own action u against opponent action v; C[u, v] = 1 on Continue.
+    """
+    w_win, w_lose, w_tie = persona_weights
+    tie = OUTCOMES.index('Tie')
+    outcomes = game.outcome_table if player == 1 else game.outcome_table.T
+    stage = game.stage[..., 0] if player == 1 else game.stage[..., 1].T
+    pay = np.array([OUTCOME_PAYOFF[o][player - 1] for o in OUTCOMES],
+                   dtype=float)[outcomes]
+    weight = np.where(pay > 0, w_win,
+                      np.where(outcomes == tie, w_tie,
+                               np.where(pay < 0, w_lose, 1.0)))
+    return stage + pay * weight, (outcomes == CONTINUE).astype(float)
+
+
+def belief_step(game, opp_policy_t, cont):
+    """
+    One round of belief dynamics against the opponent's policy at round t
+    (opp_policy_t[ammo, belief, action]). Opponent branches are flattened
+    to (opp ammo, opp action) columns so each sum is one matrix product.
+
+    Returns:
+        w_q: (beliefs, opp ammo * opp action) weights of each opponent
+             branch in the Q backup (tiny hypotheses skipped)
+        next_belief: (beliefs, own action) lattice index after Continue
+                     (the prior when Continue is impossible)
+    """
+    n_actions = len(cont)
+    pi = np.transpose(opp_policy_t, (1, 0, 2))
+    pi = np.where(pi < _TINY, 0.0, pi)
+    prior = game.beliefs[:, :, None]
+    w = (prior * pi).reshape(game.n_beliefs, -1)
+    w_q = np.where(np.repeat(game.beliefs, n_actions, axis=1) < _TINY, 0.0, w)
+
+    # moved[(x, v), (u, y)] = Continue after (own u, opp v) with the
+    # opponent moving from ammo x to y
+    moved = cont.T[None, :, :, None] * \
+        np.eye(game.n_ammo)[game.next_ammo][:, :, None, :]
+    posterior = (w @ moved.reshape(w.shape[1], -1)).reshape(
+        game.n_beliefs, n_actions, game.n_ammo)
+    total = posterior.sum(axis=-1, keepdims=True)
+    informative = total >= _TINY
+    posterior = np.where(informative,
+                         posterior / np.where(informative, total, 1.0),
+                         game.beliefs[:, None, :])
+    return w_q, game.snap(posterior)
+
+
+def _backward(game, player, opp_policy, persona_weights, beta, policy=None):
+    """
+    Backward induction against opp_policy. Without a policy, V = max Q and
+    the softmax(beta) best response is returned; with one, V is the value
+    of playing it.
+
+    Returns:
+        (policy, V, Q, next_belief)
+    """
+    rewards, cont = _player_rewards(game, player, persona_weights)
+    legal = game.legal_mask[:, None, :]
+    shape = (T + 1, game.n_ammo, game.n_beliefs)
+    V = np.zeros((T + 2,) + shape[1:])
+    V[T + 1] = DRAW_PENALTY
+    Q = np.full(shape + (len(cont),), -np.inf)
+    next_belief = np.zeros((T + 1, game.n_beliefs, len(cont)), dtype=np.intp)
+    br = np.zeros(Q.shape) if policy is None else policy
+
+    # Per flattened opponent branch (x, v): reward / Continue of own u
+    branch_rewards = np.tile(rewards.T, (game.n_ammo, 1))
+    branch_cont = np.tile(cont.T, (game.n_ammo, 1))
+
+    for t in range(T, 0, -1):
+        w_q, next_belief[t] = belief_step(game, opp_policy[t], cont)
+        immediate = w_q @ branch_rewards
+        cont_mass = w_q @ branch_cont
+        future = cont_mass[None] * V[t + 1][game.next_ammo[:, None, :],
+                                            next_belief[t][None]]
+        Q[t] = np.where(legal, immediate[None] + future, -np.inf)
+
+        q_max = Q[t].max(axis=-1, keepdims=True)
+        if policy is None:
+            exp_q = np.where(legal, np.exp(beta * (Q[t] - q_max)), 0.0)
+            br[t] = exp_q / exp_q.sum(axis=-1, keepdims=True)
+            V[t] = q_max[..., 0]
+        else:
+            V[t] = np.sum(policy[t] * np.where(legal, Q[t], 0.0), axis=-1)
+
+    return br, V[:T + 1], Q, next_belief
+
+
+def best_response(game, player, opp_policy, persona_weights=None,
+                  beta=SOFTMAX_BETA):
+    """
+    Softmax best response of 'player' to opp_policy.
+
+    Returns:
+        (policy, V, Q, next_belief) arrays; next_belief[t, b, u] is the
+        player's belief index after playing u at belief b and seeing
+        Continue
+    """
+    return _backward(game, player, opp_policy,
+                     persona_weights or (1.0, 1.0, 1.0), beta)
+
+
+def evaluate_policy(game, player, policy, opp_policy, persona_weights=None):
+    """V[t, ammo, belief] of playing policy against opp_policy."""
+    return _backward(game, player, opp_policy,
+                     persona_weights or (1.0, 1.0, 1.0), None, policy)[1]
+
+
+def ibr_solve(game, persona1_weights=None, persona2_weights=None,
+              max_iter=IBR_MAX_ITER, init_policy1=None, init_policy2=None,
+              beta=SOFTMAX_BETA):
+    """
+    Iterated best response for a MagazineGame (see engine.solver.ibr_solve).
+
+    Returns:
+        dict of arrays: 'policy1', 'policy2', 'q_table1', 'q_table2' and
+        'next_belief1', 'next_belief2' (final best responses against the
+        returned policies, used by run_batch), 'iterations', 'converged',
+        'residuals' and 'exploitability' ([p1, p2] best-response value gain
+        at the initial state)
+    """
+    w1 = tuple(persona1_weights or (1.0, 1.0, 1.0))
+    w2 = tuple(persona2_weights or (1.0, 1.0, 1.0))
+    pi1 = init_policy1 if init_policy1 is not None else uniform_policy(game)
+    pi2 = init_policy2 if init_policy2 is not None else uniform_policy(game)
+
+    converged = False
+    iterations = 0
+    avg_window = min(100, max_iter)
+    sum1 = np.zeros(pi1.shape)
+    sum2 = np.zeros(pi2.shape)
+    n_avg = 0
+    residuals = []
+
+    for k in range(max_iter):
+        iterations = k + 1
+        br1 = best_response(game, 1, pi2, w1, beta)[0]
+        br2 = best_response(game, 2, pi1, w2, beta)[0]
+
+        new_pi1 = (1 - IBR_ALPHA) * pi1 + IBR_ALPHA * br1
+        new_pi2 = (1 - IBR_ALPHA) * pi2 + IBR_ALPHA * br2
+        diff1 = float(np.abs(new_pi1 - pi1).max())
+        diff2 = float(np.abs(new_pi2 - pi2).max())
+        residuals.append([diff1, diff2])
+        pi1, pi2 = new_pi1, new_pi2
+
+        if k >= max_iter - avg_window:
+            sum1 += pi1
+            sum2 += pi2
+            n_avg += 1
+
+        if diff1 < IBR_EPSILON and diff2 < IBR_EPSILON:
+            converged = True
+            break
+
+    # Average the oscillating tail of non-converged runs
+    if not converged and n_avg:
+        pi1, pi2 = sum1 / n_avg, sum2 / n_avg
+        if w1 == w2:
+            pi1 = pi2 = (pi1 + pi2) / 2
+
+    _, v_br1, q1, next1 = best_response(game, 1, pi2, w1, beta)
+    _, v_br2, q2, next2 = best_response(game, 2, pi1, w2, beta)
+    start = (1, 0, game.initial_belief)
+    exploitability = [
+        float(v_br1[start] - evaluate_policy(game, 1, pi1, pi2, w1)[start]),
+        float(v_br2[start] - evaluate_policy(game, 2, pi2, pi1, w2)[start]),
+    ]
+
+    return {
+        'policy1': pi1,
+        'policy2': pi2,
+        'q_table1': q1,
+        'q_table2': q2,
+        'next_belief1': next1,
+        'next_belief2': next2,
+        'iterations': iterations,
+        'converged': converged,
+        'residuals': residuals,
+        'exploitability': exploitability,
+    }
+
+
+def _select(q, legal, optimal, u):
+    """Greedy (max-Q) or softmax(SIMULATION_BETA * Q) action per episode."""
+    if optimal:
+        return np.argmax(q, axis=-1)
+    exp_q = np.where(legal, np.exp(SIMULATION_BETA *
+                                   (q - q.max(axis=-1, keepdims=True))), 0.0)
+    cdf = np.cumsum(exp_q, axis=-1)
+    cdf /= cdf[:, -1:]
+    return np.minimum(np.sum(cdf <= u[:, None], axis=-1), q.shape[-1] - 1)
+
+
+def run_batch(game, solve, n_episodes, optimal_p1=True, optimal_p2=True,
+              seed=None, aggregator=None):
+    """
+    Simulate n_episodes of a solved MagazineGame at once, one array entry
+    per episode. Optimal players act greedily on their Q-table, others
+    sample softmax(SIMULATION_BETA * Q) (as engine.simulation does).
+
+    Returns:
+        stats dict in the engine.simulation.run_batch format
+    """
+    rng = np.random.RandomState(seed)
+    agg = aggregator if aggregator is not None else StreamingStats()
+    n = n_episodes
+    ammo = np.zeros((2, n), dtype=np.intp)
+    belief = np.full((2, n), game.initial_belief, dtype=np.intp)
+    totals = np.zeros((n, 2))
+    result = np.full(n, DRAW, dtype=np.intp)
+    rounds = np.full(n, T + 1, dtype=np.intp)
+    alive = np.arange(n)
+
+    for t in range(1, T + 1):
+        u = rng.random_sample((2, len(alive)))
+        actions = []
+        for i, optimal in enumerate([optimal_p1, optimal_p2]):
+            a, b = ammo[i, alive], belief[i, alive]
+            q = solve['q_table%d' % (i + 1)][t, a, b]
+            actions.append(_select(q, game.legal_mask[a], optimal, u[i]))
+        u1, u2 = actions
+
+        o = game.outcome_table[u1, u2]
+        totals[alive] += game.stage[u1, u2]
+        totals[alive] += np.array([OUTCOME_PAYOFF[name]
+                                   for name in OUTCOMES])[o]
+
+        ended = o != CONTINUE
+        result[alive[ended]] = o[ended]
+        rounds[alive[ended]] = t
+        for i, act in enumerate(actions):
+            belief[i, alive] = solve['next_belief%d' % (i + 1)][
+                t, belief[i, alive], act]
+            ammo[i, alive] = game.next_ammo[ammo[i, alive], act]
+        alive = alive[~ended]
+
+    totals[alive] += OUTCOME_PAYOFF['Draw']
+    return agg.add_arrays(result, totals, rounds).stats()
@@ -0,0 +1,67 @@
+"""
+Compiled policy model for client-side simulation and replay.
+
+compile_model packs a solved persona pair into plain nested lists: the
+game rules as lookup tables, both players' action-selection tables and
+a belief-transition table (engine.reachability). Beliefs always sit on
+the grid, so with these tables the dashboard (static/js/model.js)
+generates episodes identical to run_episode without calling the server.
+
+All per-player arrays are indexed [t][ammo][p_idx] (t = 1..T, row 0
+unused) with actions in LEGAL_ORDER[ammo].
+"""
+import numpy as np
+from config import (T, ACTIONS, OUTCOMES, BELIEF_GRID, SIMULATION_BETA,
+                    INITIAL_BELIEF)
+from engine.game import outcome_payoff
+from engine.policy_index import LEGAL_ORDER, LEGAL_ACTION_IDX, _legal_values
+from engine.tables import (CONTINUE, OUTCOME_TABLE, NEXT_AMMO, REWARD_TABLE,
+                           p_to_idx)
+
+MODEL_VERSION = 1
+# Decimal places kept for probabilities, CDFs and Q-values
+MODEL_DECIMALS = 6
+
+
+def _rounded(arr):
+    return np.round(arr, MODEL_DECIMALS).tolist()
+
+
+def _player_tables(index, q_index, opp_index, player):
+    return {
+        'probs': _rounded(_legal_values(index.probs)),
+        'policy_cdf': _rounded(index.table.cdf),
+        'thresholds': {'%d,%d' % k: v for k, v in index.thresholds.items()},
+        'q_values': _rounded(q_index._legal_q),
+        'greedy': q_index.greedy.greedy_k.tolist(),
+        'soft_cdf': _rounded(q_index.softmax(SIMULATION_BETA).cdf),
+        'next_belief': opp_index.belief_transitions(player).tolist(),
+    }
+
+
+def compile_model(result):
+    """
+    Compile a SolverResult into a JSON-serializable model for the
+    dashboard's client-side episode generator.
+    """
+    return {
+        'version': MODEL_VERSION,
+        'T': T,
+        'actions': ACTIONS,
+        'outcomes': OUTCOMES,
+        'legal_actions': [LEGAL_ORDER[0], LEGAL_ORDER[1]],
+        'legal_action_idx': LEGAL_ACTION_IDX.tolist(),
+        'belief_grid': BELIEF_GRID.tolist(),
+        'initial_belief_idx': int(p_to_idx(INITIAL_BELIEF)),
+        'continue_idx': CONTINUE,
+        'outcome_table': OUTCOME_TABLE.tolist(),
+        'reward_table': REWARD_TABLE.tolist(),
+        'draw_payoff': list(outcome_payoff('Draw')),
+        'next_ammo': NEXT_AMMO.tolist(),
+        'player1': _player_tables(result['policy_index1'],
+                                  result['q_index1'],
+                                  result['policy_index2'], 1),
+        'player2': _player_tables(result['policy_index2'],
+                                  result['q_index2'],
+                                  result['policy_index1'], 2),
+    }
@@ -0,0 +1,37 @@
+"""
+Process-pool execution layer for the solver: independent persona-pair
+solves sharded across a pool (solve_pairs).
+
+The game tables (engine.tables) are module constants built at import in
+every worker, so they are never shipped per task.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from engine.solver import ibr_solve
+
+
+def default_jobs():
+    return os.cpu_count() or 1
+
+
+# --- Independent solves ---
+
+def _solve_task(args):
+    """Worker: one ibr_solve for a (weights1, weights2, kwargs) task."""
+    w1, w2, kwargs = args
+    return ibr_solve(persona1_weights=w1, persona2_weights=w2, **kwargs)
+
+
+def solve_pairs(weight_pairs, jobs=None, **solve_kwargs):
+    """
+    Solve independent (persona1_weights, persona2_weights) pairs across a
+    process pool. Extra keyword arguments go to ibr_solve. Returns the
+    SolverResults in input order.
+    """
+    jobs = min(jobs or default_jobs(), len(weight_pairs))
+    tasks = [(w1, w2, solve_kwargs) for w1, w2 in weight_pairs]
+    if jobs <= 1:
+        return [_solve_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(_solve_task, tasks))
@@ -1,7 +1,14 @@
 """
 Persona definitions: cautious, aggressive, balanced.
 Each persona modifies outcome payoff weights, which changes equilibrium behavior.
+Custom (w_win, w_lose, w_tie) weights are accepted wherever a persona is.
 """
+import math
+
+WEIGHT_NAMES = ('w_win', 'w_lose', 'w_tie')
+# Weights are rounded to this step, so equivalent requests share one solve
+WEIGHT_QUANTUM = 0.01
+MAX_WEIGHT = 10.0
 
 PERSONAS = {
     'balanced': {
@@ -27,12 +34,46 @@ def get_persona(name):
     return PERSONAS.get(name)
 
 
-def get_persona_weights(name):
-    """Get (w_win, w_lose, w_tie) for a persona."""
-    persona = PERSONAS.get(name)
-    if persona is None:
-        return (1.0, 1.0, 1.0)
-    return persona['weights']
+def canonical_weights(weights):
+    """
+    Validate (w_win, w_lose, w_tie) and round each to WEIGHT_QUANTUM.
+    Raises ValueError unless there are three finite weights in
+    [0, MAX_WEIGHT].
+    """
+    try:
+        values = tuple(float(w) for w in weights)
+    except (TypeError, ValueError):
+        raise ValueError('weights must be three numbers (w_win, w_lose, w_tie)')
+    if len(values) != len(WEIGHT_NAMES):
+        raise ValueError('weights must be three numbers (w_win, w_lose, w_tie)')
+    for name, w in zip(WEIGHT_NAMES, values):
+        if not math.isfinite(w) or not 0 <= w <= MAX_WEIGHT:
+            raise ValueError('%s must be between 0 and %g' % (name, MAX_WEIGHT))
+    return tuple(round(round(w / WEIGHT_QUANTUM) * WEIGHT_QUANTUM, 10)
+                 for w in values)
+
+
+def resolve_persona(spec):
+    """
+    Persona id, [w_win, w_lose, w_tie] or {'w_win': .., 'w_lose': ..,
+    'w_tie': ..} -> (label, canonical weights). Custom weights equal to a
+    persona's are labelled with that persona's id.
+    Raises ValueError for unknown ids or invalid weights.
+    """
+    if isinstance(spec, str):
+        if spec not in PERSONAS:
+            raise ValueError('unknown persona %r' % spec)
+        return spec, canonical_weights(PERSONAS[spec]['weights'])
+    if isinstance(spec, dict):
+        missing = [name for name in WEIGHT_NAMES if name not in spec]
+        if missing:
+            raise ValueError('missing weights: %s' % ', '.join(missing))
+        spec = [spec[name] for name in WEIGHT_NAMES]
+    weights = canonical_weights(spec)
+    for persona_id, persona in PERSONAS.items():
+        if canonical_weights(persona['weights']) == weights:
+            return persona_id, weights
+    return 'custom(%s)' % ','.join('%g' % w for w in weights), weights
 
 
 def list_personas():
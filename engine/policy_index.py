@@ -0,0 +1,184 @@
+"""
+Derived per-policy summaries (thresholds, greedy actions, sampling CDFs).
+Built once per solver result and reused by the simulator and the API.
+"""
+import numpy as np
+from config import T, DELTA, N_BELIEFS
+from engine.game import legal_actions
+from engine.reachability import belief_transition_table
+from engine.tables import ACTION_INDEX, policy_to_array, q_table_to_array
+
+
+# Action order per ammo level, matching the key order of the policy dicts
+LEGAL_ORDER = {ammo: legal_actions(ammo) for ammo in [0, 1]}
+# LEGAL_ACTION_IDX[ammo, k] = ACTIONS index of LEGAL_ORDER[ammo][k]
+LEGAL_ACTION_IDX = np.array([[ACTION_INDEX[a] for a in LEGAL_ORDER[ammo]]
+                             for ammo in [0, 1]], dtype=np.intp)
+# 'Active' action whose probability defines the threshold: Shoot when
+# armed, Reload when unarmed
+ACTIVE_ACTION = {0: 'R', 1: 'S'}
+
+
+def compute_thresholds(policy):
+    """
+    For each (t, ammo), find the belief p where the 'active' action
+    (Shoot for ammo=1, Reload for ammo=0) drops below 0.5.
+    Returns dict: {(t, ammo): threshold_p}
+    """
+    probs = policy_to_array(policy)
+    thresholds = {}
+    for ammo in [0, 1]:
+        active = probs[1:, ammo, :, ACTION_INDEX[ACTIVE_ACTION[ammo]]]
+        below = active < 0.5
+        first = np.argmax(below, axis=1)
+        for t in range(1, T + 1):
+            threshold = first[t - 1] * DELTA if below[t - 1].any() else 1.0
+            thresholds[(t, ammo)] = round(threshold, 2)
+    return thresholds
+
+
+def thresholds_to_serializable(thresholds):
+    """Convert {(t, ammo): p} to {'t': {'ammo': p}} for JSON."""
+    result = {}
+    for (t, ammo), p in thresholds.items():
+        result.setdefault(str(t), {})[str(ammo)] = p
+    return result
+
+
+def _legal_values(arr):
+    """Select legal-action columns: [t, ammo, p_idx, action] -> [..., k]."""
+    out = np.empty(arr.shape[:3] + (LEGAL_ACTION_IDX.shape[1],))
+    for ammo in [0, 1]:
+        out[:, ammo] = arr[:, ammo][:, :, LEGAL_ACTION_IDX[ammo]]
+    return out
+
+
+def _cell_values(arr, t, ammo, p_idx):
+    """{action: value} of the legal actions of one cell of arr."""
+    return {a: float(arr[t, ammo, p_idx, ACTION_INDEX[a]])
+            for a in LEGAL_ORDER[ammo]}
+
+
+class SamplingTable:
+    """
+    Greedy action and cumulative action probabilities per (t, ammo, p_idx),
+    with actions in LEGAL_ORDER. Selecting an action is one uniform draw
+    plus a table lookup, for a single cell or for arrays of cells.
+    """
+
+    def __init__(self, legal_probs, greedy_k=None):
+        if greedy_k is None:
+            greedy_k = np.argmax(legal_probs, axis=-1)
+        self.greedy_k = greedy_k
+        cdf = np.cumsum(legal_probs, axis=-1)
+        # Normalise so the last entry is exactly 1 (as np.random.choice does)
+        self.cdf = cdf / np.where(cdf[..., -1:] > 0, cdf[..., -1:], 1.0)
+
+    def greedy_action(self, t, ammo, p_idx):
+        """Greedy action letter for one cell."""
+        return LEGAL_ORDER[ammo][self.greedy_k[t, ammo, p_idx]]
+
+    def sample(self, t, ammo, p_idx, u=None):
+        """Sample an action letter for one cell."""
+        if u is None:
+            u = np.random.random_sample()
+        k = np.searchsorted(self.cdf[t, ammo, p_idx], u, side='right')
+        return LEGAL_ORDER[ammo][min(k, self.cdf.shape[-1] - 1)]
+
+    def greedy_batch(self, t, ammo, p_idx):
+        """Greedy ACTIONS indices for arrays of cells."""
+        return LEGAL_ACTION_IDX[ammo, self.greedy_k[t, ammo, p_idx]]
+
+    def sample_batch(self, t, ammo, p_idx, u):
+        """Sampled ACTIONS indices for arrays of cells and uniforms u."""
+        cdf = self.cdf[t, ammo, p_idx]
+        k = np.sum(cdf <= np.asarray(u)[..., None], axis=-1)
+        return LEGAL_ACTION_IDX[ammo, np.minimum(k, cdf.shape[-1] - 1)]
+
+
+class PolicyIndex:
+    """
+    Summaries of one player's policy, computed once:
+
+        probs:      policy array [t, ammo, p_idx, action] (engine.tables)
+        thresholds: {(t, ammo): p} as returned by compute_thresholds
+        greedy:     greedy[t, ammo, p_idx] = most likely action letter
+        table:      SamplingTable over the policy's action probabilities
+
+    policy may be a policy dict or its array (e.g. memory-mapped from a
+    SharedResultStore), which is then used as is.
+    """
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.probs = policy_to_array(policy)
+        self._transitions = {}
+        self.thresholds = compute_thresholds(self.probs)
+        self.table = SamplingTable(_legal_values(self.probs))
+        self.greedy = np.empty(self.table.greedy_k.shape, dtype='<U1')
+        for ammo in [0, 1]:
+            self.greedy[:, ammo] = np.array(LEGAL_ORDER[ammo])[
+                self.table.greedy_k[:, ammo]]
+
+    def sample(self, t, ammo, p_idx, u=None):
+        """Sample an action with one uniform draw and a CDF lookup."""
+        return self.table.sample(t, ammo, p_idx, u)
+
+    def action_probs(self, t, ammo, p_idx):
+        """{action: probability} of one cell, as policy[t][ammo][p_idx]."""
+        return _cell_values(self.probs, t, ammo, p_idx)
+
+    def belief_transitions(self, player):
+        """
+        belief_transition_table of the opponent (player) of this policy,
+        built once per player.
+        """
+        if player not in self._transitions:
+            self._transitions[player] = belief_transition_table(self.probs,
+                                                                player)
+        return self._transitions[player]
+
+    def summary(self):
+        """JSON-serializable thresholds and greedy actions."""
+        return {
+            'thresholds': thresholds_to_serializable(self.thresholds),
+            'greedy': {
+                str(t): {
+                    str(ammo): self.greedy[t, ammo].tolist()
+                    for ammo in [0, 1]
+                }
+                for t in range(1, T + 1)
+            },
+        }
+
+
+class QIndex:
+    """
+    Action-selection tables derived from one player's Q-table (dict or
+    array): the greedy (max-Q) action per cell and, per softmax
+    temperature, a SamplingTable built once and cached.
+    """
+
+    def __init__(self, q_table):
+        self.q_table = q_table
+        self.q = q_table_to_array(q_table)
+        self._legal_q = _legal_values(self.q)
+        self._legal_q[0] = 0.0  # row t=0 is unused; keep it finite
+        greedy_k = np.argmax(self._legal_q, axis=-1)
+        self.greedy = SamplingTable(np.eye(self._legal_q.shape[-1])[greedy_k],
+                                    greedy_k)
+        self._softmax = {}
+
+    def q_values(self, t, ammo, p_idx):
+        """{action: Q} of one cell, as q_table[t][ammo][p_idx]."""
+        return _cell_values(self.q, t, ammo, p_idx)
+
+    def softmax(self, beta):
+        """SamplingTable for softmax(beta * Q), cached per beta."""
+        if beta not in self._softmax:
+            q_shifted = beta * (self._legal_q -
+                                np.max(self._legal_q, axis=-1, keepdims=True))
+            exp_q = np.exp(q_shifted)
+            probs = exp_q / np.sum(exp_q, axis=-1, keepdims=True)
+            self._softmax[beta] = SamplingTable(probs)
+        return self._softmax[beta]
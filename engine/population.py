@@ -0,0 +1,289 @@
+"""
+Population dynamics over personas.
+
+PopulationGame solves every persona-vs-persona matchup once (through a
+SolverService, so solves are cached and shared) and evaluates each
+matchup exactly: beliefs always sit on the grid, so the joint
+distribution over (ammo1, ammo2, p_idx1, p_idx2) can be pushed forward
+round by round with the action-selection and belief-transition tables.
+This gives the expected episode rewards of every matchup without Monte
+Carlo noise.
+
+Fitness is the episode's actual (unweighted) reward: the persona
+weights shape how players play, not what they earn. On top of the
+payoff matrix:
+
+    replicator_dynamics: discrete-time replicator dynamics, vectorised
+                         over any number of starting mixtures
+    PopulationGame.simulate: agent-based Wright-Fisher dynamics, with
+                             every generation's random pairings played
+                             as batched episodes (run_batch_arrays)
+"""
+import numpy as np
+from config import T, N_BELIEFS, INITIAL_BELIEF, SIMULATION_BETA, SOFTMAX_BETA
+from engine.game import outcome_payoff
+from engine.personas import PERSONAS, resolve_persona
+from engine.policy_index import LEGAL_ACTION_IDX
+from engine.simulation import run_batch_arrays
+from engine.stats import STAT_KEYS, OUTCOME_RATE
+from engine.tables import (N_ACTIONS, CONTINUE, OUTCOME_INDEX, OUTCOME_TABLE,
+                           NEXT_AMMO, LEGAL_MASK, REWARD_TABLE, p_to_idx)
+
+
+def worst_episode_reward():
+    """
+    Lowest total reward any player can receive in one episode (minimum
+    over every legal play of the game, by backward induction).
+    """
+    worst = np.tile(np.array(outcome_payoff('Draw'), dtype=float), (2, 2, 1))
+    for _ in range(T):
+        new = np.full(worst.shape, np.inf)
+        for a1 in [0, 1]:
+            for a2 in [0, 1]:
+                for u1 in np.flatnonzero(LEGAL_MASK[a1]):
+                    for u2 in np.flatnonzero(LEGAL_MASK[a2]):
+                        r = REWARD_TABLE[a1, a2, u1, u2].copy()
+                        if OUTCOME_TABLE[a1, a2, u1, u2] == CONTINUE:
+                            r += worst[NEXT_AMMO[a1, u1], NEXT_AMMO[a2, u2]]
+                        new[a1, a2] = np.minimum(new[a1, a2], r)
+        worst = new
+    return float(worst[0, 0].min())
+
+
+def _action_probs(q_index, optimal):
+    """
+    probs[t, ammo, p_idx, u] (ACTIONS order) of the action choice
+    run_episode makes: greedy on Q when optimal, else softmax(SIMULATION_BETA).
+    """
+    table = q_index.greedy if optimal else q_index.softmax(SIMULATION_BETA)
+    legal = np.diff(table.cdf, axis=-1, prepend=0.0)
+    probs = np.zeros(legal.shape[:3] + (N_ACTIONS,))
+    for ammo in [0, 1]:
+        probs[:, ammo][..., LEGAL_ACTION_IDX[ammo]] = legal[:, ammo]
+    return probs
+
+
+def evaluate_matchup(result, optimal_p1=True, optimal_p2=True):
+    """
+    Exact expectation of run_episode's statistics for a SolverResult.
+
+    Returns:
+        dict keyed by STAT_KEYS: outcome probabilities, expected total
+        rewards and expected termination round
+    """
+    probs = [_action_probs(result['q_index1'], optimal_p1),
+             _action_probs(result['q_index2'], optimal_p2)]
+    next_belief = [result['policy_index2'].belief_transitions(1),
+                   result['policy_index1'].belief_transitions(2)]
+
+    shape = (2, 2, N_BELIEFS, N_BELIEFS)
+    a1, a2, i1, i2 = [x.ravel() for x in np.indices(shape)]
+    mass = np.zeros(shape).ravel()
+    start = int(p_to_idx(INITIAL_BELIEF))
+    mass[np.ravel_multi_index((0, 0, start, start), shape)] = 1.0
+
+    values = np.zeros(len(STAT_KEYS))
+    rate = [OUTCOME_RATE.get(o) for o in OUTCOME_INDEX]
+    for t in range(1, T + 1):
+        # joint[s, u1, u2] = P(state s, then joint action (u1, u2))
+        joint = mass[:, None, None] * probs[0][t, a1, i1][:, :, None] * \
+            probs[1][t, a2, i2][:, None, :]
+        values[4:6] += np.einsum('suv,suvk->k', joint,
+                                 REWARD_TABLE[a1, a2])
+        o = OUTCOME_TABLE[a1, a2]
+        ended = np.bincount(o.ravel(), joint.ravel(),
+                            minlength=len(OUTCOME_INDEX))
+        for k, r in enumerate(rate):
+            if r is not None:
+                values[r] += ended[k]
+        values[6] += t * (joint.sum() - ended[CONTINUE])
+
+        cont = np.where(o == CONTINUE, joint, 0.0)
+        succ = np.ravel_multi_index(
+            (NEXT_AMMO[a1][:, :, None], NEXT_AMMO[a2][:, None, :],
+             next_belief[0][t, a1, i1][:, :, None],
+             next_belief[1][t, a2, i2][:, None, :]), shape)
+        mass = np.bincount(succ.ravel(), cont.ravel(), minlength=mass.size)
+
+    remaining = mass.sum()
+    values[OUTCOME_RATE['Draw']] += remaining
+    values[4:6] += remaining * np.array(outcome_payoff('Draw'))
+    values[6] += (T + 1) * remaining
+    return dict(zip(STAT_KEYS, values.tolist()))
+
+
+def _normalise_shares(shares, k):
+    """Validate population shares (k,) or (n, k); rows rescaled to sum 1."""
+    x = np.array(shares, dtype=float)
+    if x.shape[-1:] != (k,) or x.ndim > 2:
+        raise ValueError('shares must have one entry per persona')
+    if not np.all(np.isfinite(x)) or np.any(x < 0) or \
+            np.any(x.sum(axis=-1) <= 0):
+        raise ValueError('shares must be non-negative and not all zero')
+    return x / x.sum(axis=-1, keepdims=True)
+
+
+def replicator_dynamics(payoffs, shares, generations, background=1.0,
+                        record_every=1):
+    """
+    Discrete-time replicator dynamics
+        x_i <- x_i * f_i / sum_j x_j f_j,   f = background + payoffs @ x
+    for one mixture (shares of shape (k,)) or many at once ((n, k)).
+    background must keep every fitness positive.
+
+    Returns:
+        dict: 'generations' (recorded generation numbers: 0, every
+        record_every-th and the last), 'trajectory' (shares at those
+        generations, shape (recorded,) + shares.shape) and 'final'
+    """
+    A = np.asarray(payoffs, dtype=float)
+    x = _normalise_shares(shares, len(A))
+    if background + A.min() <= 0:
+        raise ValueError('background must exceed -min(payoffs)')
+
+    recorded = [0]
+    trajectory = [x.copy()]
+    for g in range(1, generations + 1):
+        f = x * (background + x @ A.T)
+        x = f / f.sum(axis=-1, keepdims=True)
+        if g % record_every == 0 or g == generations:
+            recorded.append(g)
+            trajectory.append(x.copy())
+    return {
+        'generations': recorded,
+        'trajectory': np.array(trajectory),
+        'final': x,
+    }
+
+
+class PopulationGame:
+    """
+    Symmetric population game over personas, from solved matchups:
+
+        labels:       persona labels (row/column order)
+        seat_payoffs: [i, j] = exact expected (P1, P2) episode rewards
+                      with persona i as P1 and persona j as P2
+        payoffs:      [i, j] = expected reward of persona i against j,
+                      averaged over both seats
+        background:   baseline fitness added to rewards; the default
+                      1 - worst_episode_reward() keeps every agent's
+                      fitness positive, so both dynamics use the same
+                      selection strength
+    """
+
+    def __init__(self, service, personas=None, beta=SOFTMAX_BETA,
+                 optimal=True, jobs=None):
+        resolved = [resolve_persona(p) for p in (personas or list(PERSONAS))]
+        weights = [w for _, w in resolved]
+        if len(set(weights)) != len(weights):
+            raise ValueError('personas must be distinct')
+        self.labels = [label for label, _ in resolved]
+        self.optimal = optimal
+        self.background = 1.0 - worst_episode_reward()
+
+        k = len(weights)
+        pairs = [(wi, wj) for wi in weights for wj in weights]
+        service.solve_many(pairs, beta, jobs=jobs)
+        self.results = {}
+        self.seat_payoffs = np.zeros((k, k, 2))
+        for i in range(k):
+            for j in range(k):
+                result = service.solve(weights[i], weights[j], beta)
+                self.results[i, j] = result
+                ev = evaluate_matchup(result, optimal, optimal)
+                self.seat_payoffs[i, j] = ev['avg_reward_p1'], \
+                    ev['avg_reward_p2']
+        self.payoffs = (self.seat_payoffs[..., 0] +
+                        self.seat_payoffs[..., 1].T) / 2
+
+    def replicator(self, shares, generations, record_every=1):
+        """replicator_dynamics over this game's payoff matrix."""
+        return replicator_dynamics(self.payoffs, shares, generations,
+                                   self.background, record_every)
+
+    def simulate(self, population_size, shares, generations, seed=None,
+                 record_every=1):
+        """
+        Agent-based Wright-Fisher dynamics: each generation the agents are
+        shuffled into random (P1, P2) pairs, every pair plays one episode
+        (batched per matchup) and the next generation is drawn
+        multinomially with weights background + episode reward.
+
+        Returns:
+            dict as replicator_dynamics, with population shares, plus
+            'mean_reward' (per persona, at the recorded generations after
+            0; NaN where a persona is extinct)
+        """
+        if population_size < 2 or population_size % 2:
+            raise ValueError('population_size must be an even number >= 2')
+        k = len(self.labels)
+        rng = np.random.RandomState(seed)
+        counts = rng.multinomial(population_size,
+                                 _normalise_shares(shares, k))
+
+        recorded = [0]
+        trajectory = [counts / population_size]
+        mean_reward = []
+        for g in range(1, generations + 1):
+            agents = np.repeat(np.arange(k), counts)
+            rng.shuffle(agents)
+            first, second = agents[0::2], agents[1::2]
+            matchup = first * k + second
+            order = np.argsort(matchup, kind='stable')
+            bounds = np.cumsum(np.bincount(matchup, minlength=k * k))
+
+            rewards = np.zeros((len(first), 2))
+            start = 0
+            for m, end in enumerate(bounds):
+                if end > start:
+                    batch = run_batch_arrays(self.results[divmod(m, k)],
+                                             end - start, self.optimal,
+                                             self.optimal, rng)
+                    rewards[order[start:end]] = batch['total_rewards']
+                start = end
+
+            fitness = np.bincount(agents, np.column_stack(
+                [self.background + rewards[:, 0],
+                 self.background + rewards[:, 1]]).ravel(), minlength=k)
+            if g % record_every == 0 or g == generations:
+                with np.errstate(invalid='ignore'):
+                    mean_reward.append(fitness / counts - self.background)
+            counts = rng.multinomial(population_size,
+                                     fitness / fitness.sum())
+            if g % record_every == 0 or g == generations:
+                recorded.append(g)
+                trajectory.append(counts / population_size)
+
+        return {
+            'generations': recorded,
+            'trajectory': np.array(trajectory),
+            'final': trajectory[-1],
+            'mean_reward': np.array(mean_reward),
+        }
+
+
+def run_population(service, personas=None, beta=SOFTMAX_BETA, optimal=True,
+                   mode='replicator', shares=None, generations=1000,
+                   record_every=1, population_size=10000, seed=None):
+    """
+    Build the PopulationGame and run its replicator ('replicator') or
+    agent-based ('agents') dynamics, from uniform shares by default.
+
+    Returns:
+        dict: 'labels', 'payoffs', 'seat_payoffs' and 'background' of the
+        game and 'run', the dynamics' result
+    """
+    game = PopulationGame(service, personas, beta, optimal)
+    shares = shares or [1.0] * len(game.labels)
+    if mode == 'agents':
+        run = game.simulate(population_size, shares, generations, seed=seed,
+                            record_every=record_every)
+    else:
+        run = game.replicator(shares, generations, record_every)
+    return {
+        'labels': game.labels,
+        'payoffs': game.payoffs,
+        'seat_payoffs': game.seat_payoffs,
+        'background': game.background,
+        'run': run,
+    }
@@ -0,0 +1,94 @@
+"""
+Forward reachability over the belief grid.
+
+Both players start unarmed at the known belief INITIAL_BELIEF, and after
+every Continue a player's belief moves to the grid point given by
+propagate_belief. Against a fixed opponent policy only a small subset of
+the (t, ammo, p_idx) cells can therefore ever be visited. The pruned
+solver (ibr_solve(prune=True)) runs best responses over just those cells
+plus the cells their backups read (see solve_cells).
+
+Cells are (t, ammo, p_idx) tuples, as in solver.LOG_STATES.
+"""
+import numpy as np
+from config import T, ACTIONS, BELIEF_GRID, N_BELIEFS, INITIAL_BELIEF
+from engine.belief import propagate_belief_batch
+from engine.tables import CONTINUE, NEXT_AMMO, LEGAL_MASK, p_to_idx
+
+INITIAL_CELL = (1, 0, int(p_to_idx(INITIAL_BELIEF)))
+# Per own ammo: (ACTIONS index, next ammo) of each legal action
+_MOVES = [[(int(u), int(NEXT_AMMO[ammo, u]))
+           for u in np.flatnonzero(LEGAL_MASK[ammo])] for ammo in [0, 1]]
+
+
+def belief_transition_table(opp_policy, player):
+    """
+    next_idx[t][own_ammo][p_idx][u] = grid index of the belief after
+    observing Continue, for every legal own action u (ACTIONS order);
+    illegal actions keep p_idx.
+    """
+    t, ammo, p_idx, u = np.meshgrid(np.arange(1, T + 1), [0, 1],
+                                    np.arange(N_BELIEFS),
+                                    np.arange(len(ACTIONS)), indexing='ij')
+    flat = [x.ravel() for x in (t, ammo, p_idx, u)]
+    _, new_idx = propagate_belief_batch(BELIEF_GRID[flat[2]], flat[1],
+                                        flat[3], CONTINUE, opp_policy,
+                                        flat[0], player)
+    table = np.zeros((T + 1, 2, N_BELIEFS, len(ACTIONS)), dtype=int)
+    table[1:] = new_idx.reshape(t.shape)
+    return np.where(LEGAL_MASK[None, :, None, :], table,
+                    np.arange(N_BELIEFS)[None, None, :, None])
+
+
+def successor_closure(next_idx, cells):
+    """
+    cells plus every cell reachable from them by a legal own action
+    followed by Continue (next_idx from belief_transition_table; pass it
+    as nested lists (.tolist()) when calling repeatedly).
+    """
+    closed = set(cells)
+    stack = list(closed)
+    while stack:
+        t, ammo, p_idx = stack.pop()
+        if t == T:
+            continue
+        for u, next_ammo in _MOVES[ammo]:
+            cell = (t + 1, next_ammo, int(next_idx[t][ammo][p_idx][u]))
+            if cell not in closed:
+                closed.add(cell)
+                stack.append(cell)
+    return closed
+
+
+def reachable_cells(opp_policy, player):
+    """Cells the player can reach from INITIAL_CELL against opp_policy."""
+    return successor_closure(belief_transition_table(opp_policy, player),
+                             [INITIAL_CELL])
+
+
+def _both_ammo(cells):
+    """The (t, ammo, p_idx) cells for both ammo levels at each (t, p_idx)."""
+    return {(t, ammo, p_idx) for t, _, p_idx in cells for ammo in [0, 1]}
+
+
+def solve_cells(policy1, policy2):
+    """
+    Cells each player's best response must evaluate so that all reachable
+    cells are exact: the reachable cells, the opponent's cells they read
+    (a player at belief index p_idx reads the opponent policy at p_idx for
+    both opponent ammo levels), and the successors every backup reads,
+    closed under both until nothing changes.
+
+    Returns:
+        (cells1, cells2): sets of (t, ammo, p_idx)
+    """
+    next1 = belief_transition_table(policy2, 1).tolist()
+    next2 = belief_transition_table(policy1, 2).tolist()
+    cells1 = successor_closure(next1, [INITIAL_CELL])
+    cells2 = successor_closure(next2, [INITIAL_CELL])
+    while True:
+        new1 = successor_closure(next1, cells1 | _both_ammo(cells2))
+        new2 = successor_closure(next2, cells2 | _both_ammo(cells1))
+        if new1 == cells1 and new2 == cells2:
+            return cells1, cells2
+        cells1, cells2 = new1, new2
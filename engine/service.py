@@ -0,0 +1,197 @@
+"""
+Solver service: caches equilibrium results per persona-weight pair,
+optionally backed by a host-wide SharedResultStore.
+"""
+import threading
+from collections import OrderedDict
+
+from config import SOFTMAX_BETA
+from engine.personas import canonical_weights
+from engine.solver import ibr_solve, ibr_continuation, BestResponseCache
+from engine.parallel import solve_pairs
+from engine.shared_store import SharedResultStore
+
+
+class SolverService:
+    """
+    Results are keyed by the canonical (quantised) weights of both players
+    and the softmax beta, so persona names, custom weights and near-equal
+    requests that map to the same weights share one solve. At most
+    max_results solves are kept, least recently used first out.
+
+    Every solve starts from the uniform policy, so results never depend
+    on what happens to be cached. (Seeding from a cached pair that shares
+    one player's weights cannot shorten the solve: damped IBR cycles on
+    these games and runs to IBR_MAX_ITER from any start.) Best responses
+    are memoised across solves in a shared BestResponseCache.
+
+    Betas above SOFTMAX_BETA are solved by continuation (ibr_continuation),
+    since damped IBR struggles when started cold at a sharp beta.
+
+    With a SharedResultStore, results are also looked up in and published
+    to the host-wide store, so several server processes solve each
+    configuration once and map the same arrays.
+
+    The cache may be shared by request threads; submit() runs a solve in a
+    process pool and caches it from the pool's callback thread.
+    """
+
+    def __init__(self, br_cache_size=256, store=None, max_results=128):
+        self._results = OrderedDict()
+        self._lock = threading.RLock()
+        self.max_results = max_results
+        self.br_cache = BestResponseCache(maxsize=br_cache_size)
+        self.store = store
+
+    def __contains__(self, key):
+        return self._full_key(*key) in self._results
+
+    def __len__(self):
+        return len(self._results)
+
+    @staticmethod
+    def _full_key(persona1_weights, persona2_weights, beta=SOFTMAX_BETA):
+        """Weights + beta -> internal cache key (canonical weights)."""
+        return (canonical_weights(persona1_weights),
+                canonical_weights(persona2_weights), float(beta))
+
+    def _lookup(self, full_key):
+        with self._lock:
+            result = self._results.get(full_key)
+            if result is not None:
+                self._results.move_to_end(full_key)
+            return result
+
+    def _insert(self, full_key, result):
+        with self._lock:
+            self._results[full_key] = result
+            self._results.move_to_end(full_key)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+
+    def get(self, persona1_weights, persona2_weights, beta=SOFTMAX_BETA):
+        """Cached result for the weight pair at beta, or None."""
+        return self._lookup(self._full_key(persona1_weights, persona2_weights,
+                                           beta))
+
+    def solve(self, persona1_weights, persona2_weights, beta=SOFTMAX_BETA,
+              progress=None):
+        """
+        Return the cached result for the pair, solving if needed.
+        progress is passed to the solver (see ibr_solve); cancelled solves
+        are returned but not cached.
+        """
+        full_key = self._full_key(persona1_weights, persona2_weights, beta)
+        result = self._lookup(full_key)
+        if result is not None:
+            return result
+
+        if self.store is None:
+            result = self._solve(full_key, progress)
+        else:
+            store_key = self.store.key(*full_key)
+            # Other workers missing the same key wait here for this solve
+            with self.store.lock(store_key):
+                result = self.store.load(store_key, self.br_cache)
+                if result is None:
+                    result = self._solve(full_key, progress)
+                    if not result.get('cancelled'):
+                        self.store.publish(store_key, result)
+        if not result.get('cancelled'):
+            self._insert(full_key, result)
+        return result
+
+    def _solve(self, full_key, progress=None):
+        """Solve one pair (continuation or IBR from uniform)."""
+        w1, w2, beta = full_key
+        if beta > SOFTMAX_BETA:
+            return ibr_continuation(w1, w2, beta=beta,
+                                    br_cache=self.br_cache,
+                                    progress=progress)
+        return ibr_solve(persona1_weights=w1, persona2_weights=w2,
+                         br_cache=self.br_cache, beta=beta,
+                         progress=progress)
+
+    def submit(self, executor, persona1_weights, persona2_weights,
+               beta=SOFTMAX_BETA, channel=None):
+        """
+        Solve the pair in executor (a process pool) as solve() would,
+        through the same store. Returns
+        a Future of the SolverResult, which is cached here on completion
+        (unless cancelled). channel is an optional (events, cancel) pair
+        of multiprocessing Manager proxies: the worker puts its progress
+        events on the queue and cancels the solve once the event is set.
+        """
+        full_key = self._full_key(persona1_weights, persona2_weights, beta)
+        task = (full_key,
+                self.store.root if self.store is not None else None,
+                channel)
+        future = executor.submit(_solve_task, task)
+
+        def adopt(done):
+            if done.cancelled() or done.exception() is not None:
+                return
+            result = done.result()
+            if result.get('cancelled'):
+                return
+            result.br_cache = self.br_cache
+            self._insert(full_key, result)
+        future.add_done_callback(adopt)
+        return future
+
+    def solve_many(self, weight_pairs, beta=SOFTMAX_BETA, jobs=None):
+        """
+        Solve every uncached (persona1_weights, persona2_weights) pair,
+        sharded across a process pool. Returns the number of new solves.
+        """
+        todo = []
+        for w1, w2 in weight_pairs:
+            full_key = self._full_key(w1, w2, beta)
+            if full_key in self._results or full_key in todo:
+                continue
+            if self.store is not None:
+                result = self.store.load(self.store.key(*full_key),
+                                         self.br_cache)
+                if result is not None:
+                    self._insert(full_key, result)
+                    continue
+            todo.append(full_key)
+        # Continuation solves stay sequential per pair; shard plain solves
+        if beta > SOFTMAX_BETA:
+            for w1, w2, _ in todo:
+                self.solve(w1, w2, beta)
+            return len(todo)
+
+        results = solve_pairs([(w1, w2) for w1, w2, _ in todo], jobs=jobs,
+                              beta=beta) if todo else []
+        for full_key, result in zip(todo, results):
+            result.br_cache = self.br_cache
+            self._insert(full_key, result)
+            if self.store is not None:
+                store_key = self.store.key(*full_key)
+                with self.store.lock(store_key):
+                    if store_key not in self.store:
+                        self.store.publish(store_key, result)
+        return len(todo)
+
+
+def _solve_task(task):
+    """
+    Worker: solve one pair for SolverService.submit. The Q-tables and
+    exploitability are built here too, so the serving process only
+    unpickles the finished result.
+    """
+    full_key, store_root, channel = task
+    store = SharedResultStore(store_root) if store_root else None
+    progress = None
+    if channel is not None:
+        events, cancel = channel
+
+        def progress(event):
+            events.put(event)
+            return cancel.is_set()
+    result = SolverService(store=store).solve(*full_key, progress=progress)
+    if not result.get('cancelled'):
+        for key in ('q_table1', 'q_table2', 'exploitability'):
+            result[key]
+    return result
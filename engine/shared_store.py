@@ -0,0 +1,152 @@
+"""
+Host-wide store of solver results in memory-mapped files.
+
+Each result is one .npy array (policies, Q-tables and logged iterates
+stacked as [row, t, ammo, p_idx, action]) plus a small .json entry with
+the scalar metadata, both named by a hash of the solve configuration.
+Every process (e.g. each gunicorn worker) maps the same files read-only,
+so the arrays exist once per host in the page cache; pointing the store
+at /dev/shm keeps them in RAM.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import config
+from engine.solver import SolverResult
+from engine.tables import policy_to_array
+
+try:
+    import fcntl
+except ImportError:  # no cross-process locks; duplicate solves stay correct
+    fcntl = None
+
+# Config values that change a solve's output; part of every key
+SOLVER_CONFIG = ('T', 'ACTIONS', 'DELTA', 'N_BELIEFS', 'OUTCOME_PAYOFF',
+                 'DRAW_PENALTY', 'STAGE_UTILITY', 'IBR_ALPHA', 'IBR_EPSILON',
+                 'IBR_MAX_ITER', 'CONTINUATION_BETA_START',
+                 'CONTINUATION_STEPS', 'CONTINUATION_STEP_ITER',
+                 'INITIAL_BELIEF', 'SOLVER_PRUNE')
+
+# Leading rows of the stacked array; logged iterates follow as pairs
+ARRAY_ROWS = ('policy1', 'policy2', 'q_table1', 'q_table2')
+
+# Scalar result keys stored in the .json entry
+META_KEYS = ('iterations', 'converged', 'cancelled', 'residuals',
+             'exploitability', 'continuation_path', 'total_iterations')
+
+
+def _config_fingerprint():
+    """Repr of the solver-relevant config values, in a stable order."""
+    return repr([(name, getattr(config, name)) for name in SOLVER_CONFIG])
+
+
+def solve_config_key(persona1_weights, persona2_weights, beta,
+                     log_iterations=2):
+    """Hash of a solve's inputs and the solver config (SOLVER_CONFIG)."""
+    payload = repr((tuple(map(float, persona1_weights)),
+                    tuple(map(float, persona2_weights)),
+                    float(beta), log_iterations, _config_fingerprint()))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class SharedResultStore:
+    """
+    Solver results shared between processes through files under root.
+    Keys are config hashes (see key()); an entry is visible only once its
+    .json file exists, and both files are written atomically.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, persona1_weights, persona2_weights, beta, log_iterations=2):
+        """Hash of the solve inputs and the solver config."""
+        return solve_config_key(persona1_weights, persona2_weights, beta,
+                                log_iterations)
+
+    def _path(self, key, ext):
+        return os.path.join(self.root, key + ext)
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key, '.json'))
+
+    @contextlib.contextmanager
+    def lock(self, key):
+        """
+        Exclusive per-key lock, so that concurrent workers missing the
+        same key solve it once and the others wait for the result.
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(self._path(key, '.lock'), 'w') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def publish(self, key, result):
+        """Write a SolverResult, computing its Q-tables if needed."""
+        rows = [result.array(name) for name in ARRAY_ROWS]
+        for pi1, pi2 in result.log_iterates:
+            rows += [policy_to_array(pi1), policy_to_array(pi2)]
+        meta = {k: result[k] for k in META_KEYS if k in result}
+        meta['beta'] = result.beta
+        meta['persona1_weights'] = result.persona1_weights
+        meta['persona2_weights'] = result.persona2_weights
+        meta['n_log_iterates'] = len(result.log_iterates)
+
+        self._write(key, '.npy', lambda f: np.save(f, np.stack(rows)))
+        self._write(key, '.json', lambda f: f.write(json.dumps(meta).encode()))
+
+    def _write(self, key, ext, write):
+        """
+        Atomically replace the key's ext file with what write(f) writes to
+        a binary file. The temporary file has a unique name, so concurrent
+        publishers of the same key never write into one file.
+        """
+        fd, tmp = tempfile.mkstemp(prefix=key, suffix=ext + '.tmp',
+                                   dir=self.root)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp, self._path(key, ext))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def load(self, key, br_cache=None):
+        """
+        SolverResult backed by the mapped arrays, or None if absent. The
+        arrays are not copied: indexes and simulators read the mapping.
+        """
+        try:
+            with open(self._path(key, '.json')) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        stacked = np.load(self._path(key, '.npy'), mmap_mode='r')
+
+        arrays = dict(zip(ARRAY_ROWS, stacked))
+        n = len(ARRAY_ROWS)
+        log_iterates = [(stacked[n + 2 * k], stacked[n + 2 * k + 1])
+                        for k in range(meta['n_log_iterates'])]
+        data = {k: meta[k] for k in META_KEYS if k in meta}
+        w1 = meta['persona1_weights']
+        w2 = meta['persona2_weights']
+        return SolverResult(data, tuple(w1) if w1 else None,
+                            tuple(w2) if w2 else None, log_iterates,
+                            br_cache, meta['beta'], arrays=arrays)
+
+
+def default_store():
+    """SharedResultStore at config.SHARED_STORE_DIR, or None if unset."""
+    if not config.SHARED_STORE_DIR:
+        return None
+    return SharedResultStore(config.SHARED_STORE_DIR)
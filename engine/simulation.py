@@ -2,79 +2,60 @@
 Monte Carlo episode runner and batch statistics.
 """
 import numpy as np
-from config import T, INITIAL_BELIEF, DELTA, N_BELIEFS, SIMULATION_BETA
+from config import (T, INITIAL_BELIEF, DELTA, N_BELIEFS, BELIEF_GRID,
+                    SIMULATION_BETA, CI_Z, SEQUENTIAL_BLOCK)
 from engine.game import (outcome, ammo_transition,
                          stage_utility, outcome_payoff, is_terminal)
-from engine.belief import propagate_belief
+from engine.policy_index import (PolicyIndex, QIndex,  # noqa: F401
+                                 compute_thresholds)
+from engine.stats import StreamingStats, STAT_KEYS
+from engine.tables import (ACTION_INDEX, BELIEF_INDEX_DTYPE, CONTINUE, DRAW,
+                           OUTCOME_TABLE, NEXT_AMMO, REWARD_TABLE, p_to_idx)
 
 
-def compute_thresholds(policy):
-    """
-    For each (t, ammo), find the belief p where the 'active' action
-    (Shoot for ammo=1, Reload for ammo=0) drops below 0.5.
-    Returns dict: {(t, ammo): threshold_p}
-    """
-    thresholds = {}
-    for t in range(1, T + 1):
-        for ammo in [0, 1]:
-            action_key = 'S' if ammo == 1 else 'R'
-            threshold = 1.0  # default: always active
-            for p_idx in range(N_BELIEFS):
-                probs = policy[t][ammo][p_idx]
-                if probs.get(action_key, 0) < 0.5:
-                    threshold = p_idx * DELTA
-                    break
-            thresholds[(t, ammo)] = round(threshold, 2)
-    return thresholds
-
-
-def _greedy_action(q_table, t, ammo, p):
-    """Pick the action with the highest Q-value (truly optimal/greedy)."""
+def _p_idx(p):
+    """Belief -> grid index."""
     p_idx = int(round(p / DELTA))
-    p_idx = max(0, min(p_idx, N_BELIEFS - 1))
+    return max(0, min(p_idx, N_BELIEFS - 1))
 
-    q_values = q_table[t][ammo][p_idx]
-    return max(q_values, key=q_values.get)
 
+def _greedy_action(q_index, t, ammo, p):
+    """Pick the action with the highest Q-value (truly optimal/greedy)."""
+    return q_index.greedy.greedy_action(t, ammo, _p_idx(p))
 
-def _sample_action(policy, t, ammo, p):
-    """Sample an action from the softmax policy distribution (human-like)."""
-    p_idx = int(round(p / DELTA))
-    p_idx = max(0, min(p_idx, N_BELIEFS - 1))
 
-    action_probs = policy[t][ammo][p_idx]
-    actions = list(action_probs.keys())
-    probs = [action_probs[a] for a in actions]
-    return np.random.choice(actions, p=probs)
+def _sample_action(index, t, ammo, p, u=None):
+    """Sample an action from the softmax policy distribution (human-like)."""
+    return index.sample(t, ammo, _p_idx(p), u)
 
 
-def _soft_sample_action(q_table, t, ammo, p, beta):
+def _soft_sample_action(q_index, t, ammo, p, beta, u=None):
     """Sample action from Q-values using a softer temperature (human-like noise).
 
     Unlike _sample_action which uses the solver's pre-computed (sharp) policy,
-    this recomputes a softmax from Q-values with a lower temperature so that
-    non-optimal players actually deviate from greedy play.
+    this samples from softmax(beta * Q) with a lower temperature so that
+    non-optimal players actually deviate from greedy play. The per-beta
+    CDF table is built once per Q-table and cached on the QIndex.
     """
-    p_idx = int(round(p / DELTA))
-    p_idx = max(0, min(p_idx, N_BELIEFS - 1))
-
-    q_values = q_table[t][ammo][p_idx]
-    actions = list(q_values.keys())
-    q_arr = np.array([q_values[a] for a in actions])
-
-    # Softmax with simulation temperature
-    q_shifted = beta * (q_arr - np.max(q_arr))
-    exp_q = np.exp(q_shifted)
-    probs = exp_q / np.sum(exp_q)
-
-    return np.random.choice(actions, p=probs)
+    return q_index.softmax(beta).sample(t, ammo, _p_idx(p), u)
 
 
 def run_episode(policy1, policy2, q_table1=None, q_table2=None,
-                optimal_p1=True, optimal_p2=True):
+                optimal_p1=True, optimal_p2=True, index1=None, index2=None,
+                q_index1=None, q_index2=None, uniforms=None):
     """
     Run a single episode of the Gun-Wall Game.
 
+    Policies and Q-tables may be dicts or arrays (engine.tables); they are
+    only read through their lookup tables. index1/index2 (PolicyIndex) and
+    q_index1/q_index2 (QIndex) are optional precomputed lookup tables for
+    the policies and Q-tables; pass them when running many episodes so
+    they are built only once.
+
+    uniforms is an optional (T, 2) array of U(0, 1) draws; stochastic
+    players then use uniforms[t - 1, player - 1] instead of drawing from
+    np.random (common random numbers, antithetic pairs).
+
     Returns a dict with:
         'rounds': list of round details
         'outcome': final outcome
@@ -88,25 +69,40 @@ def run_episode(policy1, policy2, q_table1=None, q_table2=None,
     final_outcome = 'Draw'
     term_round = T + 1
 
-    # Precompute thresholds for decision explanations
-    thresholds1 = compute_thresholds(policy1)
-    thresholds2 = compute_thresholds(policy2)
+    # Thresholds for decision explanations come from the policy index
+    if index1 is None:
+        index1 = PolicyIndex(policy1)
+    if index2 is None:
+        index2 = PolicyIndex(policy2)
+    if q_table1 is not None and q_index1 is None:
+        q_index1 = QIndex(q_table1)
+    if q_table2 is not None and q_index2 is None:
+        q_index2 = QIndex(q_table2)
+    thresholds1 = index1.thresholds
+    thresholds2 = index2.thresholds
+    # Each player's belief moves under the opponent's policy
+    next_belief1 = index2.belief_transitions(1)
+    next_belief2 = index1.belief_transitions(2)
 
     for t in range(1, T + 1):
+        rand1, rand2 = (None, None) if uniforms is None else uniforms[t - 1]
+
         # Action selection: per-player greedy (optimal) or stochastic (human-like)
-        if optimal_p1 and q_table1:
-            u1 = str(_greedy_action(q_table1, t, a1, p1))
-        elif q_table1:
-            u1 = str(_soft_sample_action(q_table1, t, a1, p1, SIMULATION_BETA))
+        if optimal_p1 and q_index1 is not None:
+            u1 = str(_greedy_action(q_index1, t, a1, p1))
+        elif q_index1 is not None:
+            u1 = str(_soft_sample_action(q_index1, t, a1, p1, SIMULATION_BETA,
+                                         rand1))
         else:
-            u1 = str(_sample_action(policy1, t, a1, p1))
+            u1 = str(_sample_action(index1, t, a1, p1, rand1))
 
-        if optimal_p2 and q_table2:
-            u2 = str(_greedy_action(q_table2, t, a2, p2))
-        elif q_table2:
-            u2 = str(_soft_sample_action(q_table2, t, a2, p2, SIMULATION_BETA))
+        if optimal_p2 and q_index2 is not None:
+            u2 = str(_greedy_action(q_index2, t, a2, p2))
+        elif q_index2 is not None:
+            u2 = str(_soft_sample_action(q_index2, t, a2, p2, SIMULATION_BETA,
+                                         rand2))
         else:
-            u2 = str(_sample_action(policy2, t, a2, p2))
+            u2 = str(_sample_action(index2, t, a2, p2, rand2))
 
         state = (a1, a2)
         o = outcome(state, u1, u2)
@@ -120,10 +116,8 @@ def run_episode(policy1, policy2, q_table1=None, q_table2=None,
         total_r2 += r2
 
         # Look up current action probabilities for decision explanation
-        p1_idx = int(round(p1 / DELTA))
-        p1_idx = max(0, min(p1_idx, N_BELIEFS - 1))
-        p2_idx = int(round(p2 / DELTA))
-        p2_idx = max(0, min(p2_idx, N_BELIEFS - 1))
+        p1_idx = _p_idx(p1)
+        p2_idx = _p_idx(p2)
 
         round_info = {
             'round': t,
@@ -133,17 +127,17 @@ def run_episode(policy1, policy2, q_table1=None, q_table2=None,
             'rewards': [r1, r2],
             'beliefs_before': [float(p1), float(p2)],
             'ammo_before': list(state),
-            'p1_action_probs': dict(policy1[t][a1][p1_idx]),
-            'p2_action_probs': dict(policy2[t][a2][p2_idx]),
+            'p1_action_probs': index1.action_probs(t, a1, p1_idx),
+            'p2_action_probs': index2.action_probs(t, a2, p2_idx),
             'p1_threshold': thresholds1[(t, a1)],
             'p2_threshold': thresholds2[(t, a2)],
         }
 
         # Attach Q-values for decision explanation
-        if q_table1 is not None:
-            round_info['p1_q_values'] = q_table1[t][a1][p1_idx]
-        if q_table2 is not None:
-            round_info['p2_q_values'] = q_table2[t][a2][p2_idx]
+        if q_index1 is not None:
+            round_info['p1_q_values'] = q_index1.q_values(t, a1, p1_idx)
+        if q_index2 is not None:
+            round_info['p2_q_values'] = q_index2.q_values(t, a2, p2_idx)
 
         if is_terminal(o):
             round_info['beliefs_after'] = [float(p1), float(p2)]
@@ -157,9 +151,9 @@ def run_episode(policy1, policy2, q_table1=None, q_table2=None,
         a1_next = ammo_transition(a1, u1)
         a2_next = ammo_transition(a2, u2)
 
-        # Belief updates
-        p1_next = propagate_belief(p1, a1, u1, o, policy2, t, player=1)
-        p2_next = propagate_belief(p2, a2, u2, o, policy1, t, player=2)
+        # Belief updates (propagate_belief, precomputed per grid cell)
+        p1_next = BELIEF_GRID[next_belief1[t, a1, p1_idx, ACTION_INDEX[u1]]]
+        p2_next = BELIEF_GRID[next_belief2[t, a2, p2_idx, ACTION_INDEX[u2]]]
 
         round_info['beliefs_after'] = [float(p1_next), float(p2_next)]
         round_info['ammo_after'] = [a1_next, a2_next]
@@ -186,63 +180,191 @@ def run_episode(policy1, policy2, q_table1=None, q_table2=None,
 
 def run_batch(policy1, policy2, n_episodes,
               q_table1=None, q_table2=None,
-              optimal_p1=True, optimal_p2=True):
+              optimal_p1=True, optimal_p2=True,
+              index1=None, index2=None, q_index1=None, q_index2=None,
+              crn_seed=None, antithetic=False, ci_width=None,
+              ci_metric='p1_win_rate', keep_episodes=True, aggregator=None,
+              progress=None):
     """
     Run N episodes and collect aggregate statistics.
+    Policy and Q-table indexes are built once here if not supplied.
+
+    Statistics are accumulated in a StreamingStats (engine.stats), so
+    with keep_episodes=False memory use does not grow with n_episodes.
+    Pass an existing aggregator to keep feeding it (e.g. to merge its
+    to_state() with other chunks later).
+
+    Variance reduction (all optional):
+        crn_seed: draw the action-sampling uniforms from a private stream
+                  seeded with crn_seed, so batches for different persona
+                  pairs with the same seed use common random numbers and
+                  their differences are paired comparisons
+        antithetic: run episodes in pairs driven by uniforms U and 1 - U
+                    (n_episodes rounds up to whole pairs); standard
+                    errors then treat each pair as one sample
+        ci_width: sequential stopping; run blocks of SEQUENTIAL_BLOCK
+                  episodes until the CI_Z confidence interval of ci_metric
+                  (one of STAT_KEYS) is at most ci_width wide, with
+                  n_episodes as the cap
+
+    progress is an optional callback receiving {'event': 'stats',
+    'stats': partial stats} after every SEQUENTIAL_BLOCK episodes; a truthy
+    return value stops the batch early (stats then carry 'cancelled').
 
     Returns:
-        stats: dict with win/loss/tie counts, average rewards, etc.
-        episodes: list of episode results (for replay)
+        stats: dict with win/loss/tie counts, average rewards, etc., and
+               'se' (standard error of each STAT_KEYS entry)
+        episodes: list of episode results (for replay; empty if
+                  keep_episodes is False)
     """
     episodes = []
-
-    p1_wins = 0
-    p2_wins = 0
-    ties = 0
-    draws = 0
-    total_r1 = 0.0
-    total_r2 = 0.0
-    term_rounds = []
-
-    for _ in range(n_episodes):
-        ep = run_episode(policy1, policy2,
-                         q_table1=q_table1, q_table2=q_table2,
-                         optimal_p1=optimal_p1,
-                         optimal_p2=optimal_p2)
-        episodes.append(ep)
-
-        if ep['outcome'] == 'P1Win':
-            p1_wins += 1
-        elif ep['outcome'] == 'P2Win':
-            p2_wins += 1
-        elif ep['outcome'] == 'Tie':
-            ties += 1
+    agg = aggregator if aggregator is not None else StreamingStats()
+
+    if index1 is None:
+        index1 = PolicyIndex(policy1)
+    if index2 is None:
+        index2 = PolicyIndex(policy2)
+    if q_table1 is not None and q_index1 is None:
+        q_index1 = QIndex(q_table1)
+    if q_table2 is not None and q_index2 is None:
+        q_index2 = QIndex(q_table2)
+
+    # Uniforms are only pre-drawn when a variance-reduction mode needs them
+    rng = np.random.RandomState(crn_seed) if crn_seed is not None else None
+    explicit = rng is not None or antithetic
+    group = 2 if antithetic else 1
+    metric = STAT_KEYS.index(ci_metric)
+
+    n_run = 0
+    cancelled = False
+    while n_run < n_episodes:
+        # Uniforms are drawn one block at a time, so memory stays bounded
+        block = min(n_episodes - n_run, SEQUENTIAL_BLOCK)
+        n_groups = -(-block // group)
+
+        if explicit:
+            draw = rng.random_sample if rng is not None \
+                else np.random.random_sample
+            base = draw((n_groups, T, 2))
+            uniforms = np.stack([base, 1.0 - base], axis=1) if antithetic \
+                else base[:, None]
         else:
-            draws += 1
-
-        total_r1 += ep['total_rewards'][0]
-        total_r2 += ep['total_rewards'][1]
-        term_rounds.append(ep['termination_round'])
-
-    # Termination distribution
-    term_dist = {}
-    for r in range(1, T + 2):
-        term_dist[r] = term_rounds.count(r)
-
-    stats = {
-        'n_episodes': n_episodes,
-        'p1_wins': p1_wins,
-        'p2_wins': p2_wins,
-        'ties': ties,
-        'draws': draws,
-        'p1_win_rate': p1_wins / n_episodes,
-        'p2_win_rate': p2_wins / n_episodes,
-        'tie_rate': ties / n_episodes,
-        'draw_rate': draws / n_episodes,
-        'avg_reward_p1': total_r1 / n_episodes,
-        'avg_reward_p2': total_r2 / n_episodes,
-        'avg_termination_round': float(np.mean(term_rounds)),
-        'termination_distribution': term_dist,
-    }
+            uniforms = [[None]] * n_groups
+
+        for g in range(n_groups):
+            values = np.zeros(len(STAT_KEYS))
+            for u in uniforms[g]:
+                ep = run_episode(policy1, policy2,
+                                 q_table1=q_table1, q_table2=q_table2,
+                                 optimal_p1=optimal_p1,
+                                 optimal_p2=optimal_p2,
+                                 index1=index1, index2=index2,
+                                 q_index1=q_index1, q_index2=q_index2,
+                                 uniforms=u)
+                n_run += 1
+                if keep_episodes:
+                    episodes.append(ep)
+                values += agg.add_episode(ep)
+            agg.add_sample(values / len(uniforms[g]))
+
+        if ci_width is not None and agg.n_samples >= 2 and \
+                2 * CI_Z * agg.se()[metric] <= ci_width:
+            break
+        if progress is not None and progress({'event': 'stats',
+                                              'stats': agg.stats()}):
+            cancelled = True
+            break
+
+    stats = agg.stats()
+    if progress is not None:
+        stats['cancelled'] = cancelled
+    if ci_width is not None:
+        stats['ci_width'] = ci_width
+        stats['ci_metric'] = ci_metric
+        stats['ci_reached'] = bool(2 * CI_Z * agg.se()[metric] <= ci_width)
 
     return stats, episodes
+
+
+def _select_batch(q_index, optimal, t, ammo, p_idx, u):
+    """ACTIONS indices chosen as run_episode does, for arrays of cells."""
+    if optimal:
+        return q_index.greedy.greedy_batch(t, ammo, p_idx)
+    return q_index.softmax(SIMULATION_BETA).sample_batch(t, ammo, p_idx, u)
+
+
+def run_batch_arrays(result, n_episodes, optimal_p1=True, optimal_p2=True,
+                     rng=None, record_rounds=False):
+    """
+    Vectorised run_episode for a solved persona pair (a SolverResult, or
+    any mapping with 'policy_index1', 'policy_index2', 'q_index1' and
+    'q_index2'):
+    all running episodes advance one round at a time with array lookups
+    into the greedy/softmax sampling tables and belief-transition tables,
+    so no per-round dicts are built. Episodes follow the same model as
+    run_episode (optimal players act greedily on their Q-table, others
+    sample softmax(SIMULATION_BETA * Q)).
+
+    rng: optional np.random.RandomState for the action-sampling uniforms
+         (default: the global np.random state)
+    record_rounds: also return the per-round arrays (n, T, 2), one column
+                   per player: 'actions' (ACTIONS indices), 'ammo' and
+                   'beliefs' (grid indices) before the round, all -1 after
+                   the episode ended, and 'rewards' (G + U, 0 after the
+                   end; the Draw payoff only enters total_rewards)
+
+    Returns:
+        dict of arrays: 'outcome' (config.OUTCOMES indices),
+        'total_rewards' (n, 2) and 'termination_round' (T + 1 for draws),
+        ready for StreamingStats.add_arrays
+    """
+    draw = rng.random_sample if rng is not None else np.random.random_sample
+    q_indexes = [result['q_index1'], result['q_index2']]
+    optimal = [optimal_p1, optimal_p2]
+    next_belief = [result['policy_index2'].belief_transitions(1),
+                   result['policy_index1'].belief_transitions(2)]
+
+    n = n_episodes
+    ammo = np.zeros((2, n), dtype=np.intp)
+    p_idx = np.full((2, n), p_to_idx(INITIAL_BELIEF), dtype=np.intp)
+    totals = np.zeros((n, 2))
+    outcomes = np.full(n, DRAW, dtype=np.intp)
+    rounds = np.full(n, T + 1, dtype=np.intp)
+    alive = np.arange(n)
+    if record_rounds:
+        record = {key: np.full((n, T, 2), -1, dtype=np.int8)
+                  for key in ('actions', 'ammo')}
+        record['beliefs'] = np.full((n, T, 2), -1, dtype=BELIEF_INDEX_DTYPE)
+        record['rewards'] = np.zeros((n, T, 2), dtype=np.float32)
+
+    for t in range(1, T + 1):
+        u = draw((2, len(alive)))
+        a, i = ammo[:, alive], p_idx[:, alive]
+        u1, u2 = [_select_batch(q_indexes[k], optimal[k], t, a[k], i[k],
+                                u[k]) for k in [0, 1]]
+        o = OUTCOME_TABLE[a[0], a[1], u1, u2]
+        r = REWARD_TABLE[a[0], a[1], u1, u2]
+        totals[alive] += r
+        if record_rounds:
+            record['actions'][alive, t - 1] = np.column_stack([u1, u2])
+            record['ammo'][alive, t - 1] = a.T
+            record['beliefs'][alive, t - 1] = i.T
+            record['rewards'][alive, t - 1] = r
+
+        ended = o != CONTINUE
+        outcomes[alive[ended]] = o[ended]
+        rounds[alive[ended]] = t
+        for k, act in enumerate([u1, u2]):
+            p_idx[k, alive] = next_belief[k][t, a[k], i[k], act]
+            ammo[k, alive] = NEXT_AMMO[a[k], act]
+        alive = alive[~ended]
+
+    totals[alive] += outcome_payoff('Draw')
+    batch = {
+        'outcome': outcomes,
+        'total_rewards': totals,
+        'termination_round': rounds,
+    }
+    if record_rounds:
+        batch.update(record)
+    return batch
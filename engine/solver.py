@@ -2,12 +2,24 @@
 IBR (Iterated Best Response) solver with backward induction.
 Computes belief-dependent policies for both players via fixed-point iteration.
 """
+import hashlib
+import threading
+from collections import OrderedDict
+
 import numpy as np
 from config import (T, BELIEF_GRID, DELTA, N_BELIEFS,
                     IBR_ALPHA, IBR_EPSILON, IBR_MAX_ITER,
-                    DRAW_PENALTY, SOFTMAX_BETA)
+                    DRAW_PENALTY, SOFTMAX_BETA, INITIAL_BELIEF,
+                    CONTINUATION_BETA_START, CONTINUATION_STEPS,
+                    CONTINUATION_STEP_ITER, SOLVER_PRUNE)
 from engine.game import (legal_actions, outcome, ammo_transition,
                          stage_utility, outcome_payoff, is_terminal)
+from engine.policy_index import PolicyIndex, QIndex
+from engine.reachability import belief_transition_table, solve_cells
+from engine.tables import (CONTINUE, NEXT_AMMO, OUTCOME_TABLE,
+                           persona_reward_table, policy_to_array,
+                           q_table_to_array, array_to_policy,
+                           array_to_q_table)
 
 
 def make_uniform_policy():
@@ -29,7 +41,7 @@ def make_uniform_policy():
 
 
 def best_response(player, opp_policy, persona_weights=None, log_collector=None,
-                  return_q_table=False):
+                  return_q_table=False, beta=SOFTMAX_BETA, cells=None):
     """
     Compute the best-response policy for 'player' given opponent's policy,
     using backward induction over the belief grid.
@@ -41,6 +53,10 @@ def best_response(player, opp_policy, persona_weights=None, log_collector=None,
         log_collector: optional dict with 'target_states' set and 'entries' list
                        to capture Q-values at specific (t, ammo, p_idx) states
         return_q_table: if True, also return Q[t][ammo][p_idx] = {action: value}
+        beta: softmax temperature of the returned policy (default SOFTMAX_BETA)
+        cells: optional set of (t, ammo, p_idx) to evaluate, closed under
+               successors (see engine.reachability.solve_cells); other
+               cells are left out of the policy and Q-table and 0 in V
 
     Returns:
         new_policy: best-response policy for this player
@@ -77,6 +93,8 @@ def best_response(player, opp_policy, persona_weights=None, log_collector=None,
             my_actions = legal_actions(own_ammo)
 
             for p_idx in range(N_BELIEFS):
+                if cells is not None and (t, own_ammo, p_idx) not in cells:
+                    continue
                 p = BELIEF_GRID[p_idx]
                 q_values = {}
 
@@ -88,7 +106,7 @@ def best_response(player, opp_policy, persona_weights=None, log_collector=None,
                 # Softmax best response: smooth probability distribution
                 q_arr = np.array([q_values[a] for a in my_actions])
                 # Shift for numerical stability
-                q_shifted = SOFTMAX_BETA * (q_arr - np.max(q_arr))
+                q_shifted = beta * (q_arr - np.max(q_arr))
                 exp_q = np.exp(q_shifted)
                 softmax_probs = exp_q / np.sum(exp_q)
 
@@ -122,6 +140,52 @@ def best_response(player, opp_policy, persona_weights=None, log_collector=None,
     return new_policy, V, q_table
 
 
+def evaluate_policy(player, policy, opp_policy, persona_weights=None):
+    """
+    Value of playing 'policy' against 'opp_policy' (same belief dynamics
+    as best_response, but V = E_{u~policy}[Q] instead of max Q).
+
+    Each round is backed up for every (ammo, belief, action) cell at once
+    from the engine.tables encodings and the opponent's belief-transition
+    table; policies may be dicts or arrays.
+
+    Returns:
+        V: value function V[t][ammo][p_idx]
+    """
+    if persona_weights is None:
+        persona_weights = (1.0, 1.0, 1.0)
+
+    probs = policy_to_array(policy)
+    # Branches below 1e-12 are skipped, as in _compute_q
+    opp = policy_to_array(opp_policy)
+    opp = np.where(opp < 1e-12, 0.0, opp)
+    prior = np.stack([1 - BELIEF_GRID, BELIEF_GRID])
+    prior = np.where(prior < 1e-12, 0.0, prior)
+
+    # [own_ammo, opp_ammo, u_me, u_opp] from the player's side
+    rewards = persona_reward_table(player, persona_weights)
+    outcomes = OUTCOME_TABLE if player == 1 else \
+        OUTCOME_TABLE.transpose(1, 0, 3, 2)
+    cont = (outcomes == CONTINUE).astype(float)
+    next_idx = belief_transition_table(opp, player)
+    next_ammo = NEXT_AMMO[:, None, :]
+
+    V = {T + 1: {0: np.full(N_BELIEFS, DRAW_PENALTY),
+                 1: np.full(N_BELIEFS, DRAW_PENALTY)}}
+    V_next = np.full((2, N_BELIEFS), DRAW_PENALTY)
+
+    for t in range(T, 0, -1):
+        # branch[opp_ammo, p_idx, u_opp] = P(opp_ammo) * pi_opp(u_opp)
+        branch = prior[:, :, None] * opp[t]
+        immediate = np.einsum('xpv,axuv->apu', branch, rewards)
+        cont_mass = np.einsum('xpv,axuv->apu', branch, cont)
+        q = immediate + cont_mass * V_next[next_ammo, next_idx[t]]
+        V_next = np.sum(probs[t] * q, axis=-1)
+        V[t] = {0: V_next[0], 1: V_next[1]}
+
+    return V
+
+
 def _compute_q(player, own_ammo, my_action, t, p, p_idx, opp_policy, V_next,
                persona_weights):
     """
@@ -251,6 +315,52 @@ def _solver_next_belief(p, own_ammo, my_action, opp_ammo, u_opp,
     return armed_next_weight / total_continue_weight
 
 
+def policy_hash(policy):
+    """Stable content hash of a policy (dict or array)."""
+    return hashlib.sha1(policy_to_array(policy).tobytes()).hexdigest()
+
+
+class BestResponseCache:
+    """
+    LRU cache of best_response results (policy, V, q_table) keyed by
+    (player, persona weights, beta, opponent policy hash). Shared across solves
+    so repeated best responses (e.g. against the uniform start or a cached
+    equilibrium policy) are computed once. Safe to share between threads;
+    best responses are computed outside the lock.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def best_response(self, player, opp_policy, persona_weights=None,
+                      return_q_table=False, beta=SOFTMAX_BETA, cells=None):
+        """Cached equivalent of best_response(...) without logging."""
+        weights = tuple(persona_weights or (1.0, 1.0, 1.0))
+        key = (player, weights, beta, policy_hash(opp_policy),
+               None if cells is None else frozenset(cells))
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None and (hit[2] is not None or not return_q_table):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return hit
+            self.misses += 1
+
+        value = best_response(player, opp_policy, weights,
+                              return_q_table=return_q_table, beta=beta,
+                              cells=cells)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+
 LOG_STATES = [
     (1, 0, 10),  # t=1, ammo=0, p_idx=10 (p=0.50)
     (1, 1, 5),   # t=1, ammo=1, p_idx=5  (p=0.25)
@@ -261,8 +371,130 @@ LOG_STATES = [
 ]
 
 
+class SolverResult(dict):
+    """
+    Solver result dict whose expensive artefacts are built on first access.
+
+    'computation_log' is rebuilt from the stored early iterate policies and
+    'q_table1' / 'q_table2' from a final best-response pass against the
+    returned policies, so callers that only need the policies (or stats)
+    never pay for them. 'policy_index1' / 'policy_index2' hold the
+    PolicyIndex summaries (thresholds, greedy actions, CDFs) of each policy
+    and 'q_index1' / 'q_index2' the QIndex action-selection tables.
+
+    'exploitability' is the best-response value gain of each player
+    against the returned policies at the initial state:
+    {'p1': V_BR1 - V_pi1, 'p2': V_BR2 - V_pi2, 'total': p1 + p2}.
+    Because V_BR is the hard max-Q value it includes the gap between the
+    softmax (beta) policy and exact best response. It reuses the same
+    final best-response passes as the Q-tables.
+
+    'arrays' optionally holds precomputed policy/Q-table arrays (e.g.
+    memory-mapped from a SharedResultStore). The indexes (and so the
+    simulators) read them directly; the nested dicts are only built if
+    someone asks for them. array() gives these arrays for any result.
+
+    Pruned solves (ibr_solve(prune=True)) hold the solved policies as
+    'pruned_policy1' / 'pruned_policy2' and the evaluated cells as
+    'solved_cells'; 'policy1' / 'policy2' are completed on first access
+    with the best response to the opponent's pruned policy in every cell
+    the solve skipped (unreachable cells, e.g. for the policy curves).
+    """
+
+    LAZY_KEYS = ('policy1', 'policy2', 'computation_log', 'q_table1',
+                 'q_table2', 'policy_index1', 'policy_index2', 'q_index1',
+                 'q_index2', 'exploitability')
+
+    def __init__(self, data, persona1_weights=None, persona2_weights=None,
+                 log_iterates=None, br_cache=None, beta=SOFTMAX_BETA,
+                 arrays=None):
+        super().__init__(data)
+        self.beta = beta
+        self.arrays = arrays or {}
+        self.persona1_weights = persona1_weights
+        self.persona2_weights = persona2_weights
+        self.log_iterates = log_iterates or []
+        self.br_cache = br_cache
+        self._final_br = {}
+
+    def __getstate__(self):
+        # The best-response cache stays with its process
+        return dict(self.__dict__, br_cache=None)
+
+    def array(self, key):
+        """'policy1' / 'policy2' / 'q_table1' / 'q_table2' as an array."""
+        if key not in self.arrays:
+            to_array = (policy_to_array if key.startswith('policy')
+                        else q_table_to_array)
+            self.arrays[key] = to_array(self[key])
+        return self.arrays[key]
+
+    def final_best_response(self, player):
+        """(policy, V, q_table) of the best response to the returned opponent."""
+        if player not in self._final_br:
+            opp = self['policy2'] if player == 1 else self['policy1']
+            weights = (self.persona1_weights if player == 1
+                       else self.persona2_weights)
+            br = (self.br_cache.best_response if self.br_cache is not None
+                  else best_response)
+            self._final_br[player] = br(player, opp, weights,
+                                        return_q_table=True, beta=self.beta)
+        return self._final_br[player]
+
+    def _filled_policy(self, player):
+        """Pruned policy completed with best responses off the solved cells."""
+        weights = (self.persona1_weights if player == 1
+                   else self.persona2_weights)
+        br, _, _ = best_response(player,
+                                 self['pruned_policy%d' % (3 - player)],
+                                 weights, beta=self.beta)
+        return _merge_policy(br, self['pruned_policy%d' % player],
+                             self['solved_cells'][player - 1])
+
+    def __missing__(self, key):
+        if key in ('policy1', 'policy2') and \
+                super().__contains__('solved_cells'):
+            value = self._filled_policy(int(key[-1]))
+        elif key in ('policy1', 'policy2') and key in self.arrays:
+            value = array_to_policy(self.arrays[key])
+        elif key == 'computation_log':
+            iterates = [tuple(pi if isinstance(pi, dict)
+                              else array_to_policy(pi) for pi in pair)
+                        for pair in self.log_iterates]
+            value = _build_computation_log(iterates, self.persona1_weights,
+                                           self.persona2_weights, self.beta)
+        elif key in ('q_table1', 'q_table2') and key in self.arrays:
+            value = array_to_q_table(self.arrays[key])
+        elif key == 'q_table1':
+            value = self.final_best_response(1)[2]
+        elif key == 'q_table2':
+            value = self.final_best_response(2)[2]
+        elif key == 'exploitability':
+            value = _exploitability(self)
+        elif key in ('policy_index1', 'policy_index2'):
+            value = PolicyIndex(self.array('policy' + key[-1]))
+        elif key in ('q_index1', 'q_index2'):
+            value = QIndex(self.array('q_table' + key[-1]))
+        else:
+            raise KeyError(key)
+        self[key] = value
+        return value
+
+    def __contains__(self, key):
+        return key in self.LAZY_KEYS or super().__contains__(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
 def ibr_solve(persona1_weights=None, persona2_weights=None,
-              log_iterations=2):
+              log_iterations=2, max_iter=IBR_MAX_ITER,
+              init_policy1=None, init_policy2=None, br_cache=None,
+              beta=SOFTMAX_BETA, progress=None,
+              prune=SOLVER_PRUNE):
     """
     Run Iterated Best Response to find equilibrium policies.
 
@@ -270,88 +502,111 @@ def ibr_solve(persona1_weights=None, persona2_weights=None,
         persona1_weights: (w_win, w_lose, w_tie) for player 1
         persona2_weights: (w_win, w_lose, w_tie) for player 2
         log_iterations: number of early iterations to log (default 2)
+        max_iter: iteration cap (default IBR_MAX_ITER)
+        init_policy1, init_policy2: optional warm-start policies
+                                    (default: uniform)
+        br_cache: optional BestResponseCache shared across solves
+        beta: softmax temperature of the best responses (default SOFTMAX_BETA)
+        progress: optional callback receiving event dicts as the solve
+                  runs: {'event': 'iteration', 'iteration', 'residual',
+                  'beta'} after every iteration and {'event': 'log',
+                  'entries'} with the computation-log entries of each
+                  logged iteration. A truthy return value cancels the
+                  solve after the current iteration.
+        prune: if True, each iteration's best responses evaluate only the
+               cells reachable from the initial state under the current
+               policies plus the cells their backups read
+               (engine.reachability.solve_cells); the other cells keep
+               their current policy (default SOLVER_PRUNE)
 
     Returns:
-        dict with 'policy1', 'policy2', 'iterations', 'converged',
-        'computation_log'
+        SolverResult with 'policy1', 'policy2', 'iterations', 'converged',
+        'cancelled' and 'residuals' (per-iteration [diff1, diff2] policy
+        changes); 'computation_log', 'q_table1', 'q_table2' and
+        'exploitability' are computed lazily (and, when pruned, the
+        skipped cells of 'policy1' and 'policy2')
     """
-    # Initialize with uniform policies
-    pi1 = make_uniform_policy()
-    pi2 = make_uniform_policy()
+    # Initialize with warm-start policies, or uniform
+    pi1 = init_policy1 if init_policy1 is not None else make_uniform_policy()
+    pi2 = init_policy2 if init_policy2 is not None else make_uniform_policy()
 
     converged = False
+    cancelled = False
     iterations = 0
-    computation_log = []
-    target_states = set(LOG_STATES)
+    # Iterate policies entering the logged iterations; the log itself is
+    # only rebuilt from these when someone asks for it (or built live when
+    # reporting progress)
+    log_iterates = []
+    live_log = []
 
     # Track recent policies for averaging when IBR doesn't converge
-    avg_window = min(100, IBR_MAX_ITER)
+    avg_window = min(100, max_iter)
     recent_pi1 = []
     recent_pi2 = []
+    residuals = []
+    # Cells evaluated in any iteration (pruned solves)
+    solved1 = set()
+    solved2 = set()
 
-    for k in range(IBR_MAX_ITER):
+    for k in range(max_iter):
         iterations = k + 1
 
-        # Set up logging for early iterations
-        log_p1 = None
-        log_p2 = None
         if k < log_iterations:
-            log_p1 = {'target_states': target_states, 'entries': []}
-            log_p2 = {'target_states': target_states, 'entries': []}
+            log_iterates.append((pi1, pi2))
 
         # Simultaneous best response (symmetric — no player-order bias)
-        br1, _, _ = best_response(1, pi2, persona1_weights,
-                                  log_collector=log_p1)
-        br2, _, _ = best_response(2, pi1, persona2_weights,
-                                  log_collector=log_p2)
+        # Only the first iteration (against the uniform or warm-start
+        # policies) can recur across solves; later iterates are unique and
+        # would just evict useful cache entries
+        br = best_response
+        if br_cache is not None and k == 0:
+            br = br_cache.best_response
+        cells1 = cells2 = None
+        if prune:
+            cells1, cells2 = solve_cells(pi1, pi2)
+            solved1 |= cells1
+            solved2 |= cells2
+        if progress is not None and k < log_iterations:
+            br1, br2, entries = _logged_iteration(k, pi1, pi2,
+                                                  persona1_weights,
+                                                  persona2_weights, beta)
+            live_log += entries
+            progress({'event': 'log', 'entries': entries})
+        else:
+            br1, _, _ = br(1, pi2, persona1_weights, beta=beta, cells=cells1)
+            br2, _, _ = br(2, pi1, persona2_weights, beta=beta, cells=cells2)
+        if prune:
+            br1 = _merge_policy(pi1, br1, cells1)
+            br2 = _merge_policy(pi2, br2, cells2)
 
         # Damped update per paper Section 6.1:
         # π^i_{k+1} ← (1-α)π^i_k + α BR(π^{-i}_k)
         new_pi1 = _damp_policy(pi1, br1, IBR_ALPHA)
         new_pi2 = _damp_policy(pi2, br2, IBR_ALPHA)
 
-        # Build log entries for this iteration
-        if k < log_iterations:
-            for player_num, log_col, br, damped in [
-                (1, log_p1, br1, new_pi1),
-                (2, log_p2, br2, new_pi2),
-            ]:
-                states = []
-                for entry in log_col['entries']:
-                    t = entry['t']
-                    ammo = entry['ammo']
-                    p_idx = _p_to_idx(entry['p'])
-                    damped_probs = damped[t][ammo][p_idx]
-                    states.append({
-                        't': t,
-                        'ammo': ammo,
-                        'belief': entry['p'],
-                        'q_values': entry['q_values'],
-                        'br_probs': entry['action_probs'],
-                        'damped_probs': {a: round(v, 4) for a, v
-                                         in damped_probs.items()},
-                    })
-                computation_log.append({
-                    'iteration': k + 1,
-                    'player': player_num,
-                    'states': states,
-                })
-
         # Check convergence
         diff1 = _policy_diff(pi1, new_pi1)
         diff2 = _policy_diff(pi2, new_pi2)
+        residuals.append([diff1, diff2])
 
         pi1 = new_pi1
         pi2 = new_pi2
 
         # Collect recent policies for averaging
-        if k >= IBR_MAX_ITER - avg_window:
+        if k >= max_iter - avg_window:
             recent_pi1.append(pi1)
             recent_pi2.append(pi2)
 
+        stop = progress is not None and progress({
+            'event': 'iteration', 'iteration': iterations,
+            'residual': [diff1, diff2], 'beta': beta})
+
         if diff1 < IBR_EPSILON and diff2 < IBR_EPSILON:
             converged = True
             break
+        if stop:
+            cancelled = True
+            break
 
     # When IBR doesn't converge, average over recent policies to
     # stabilize the oscillating cycle (akin to fictitious play averaging)
@@ -364,22 +619,156 @@ def ibr_solve(persona1_weights=None, persona2_weights=None,
             sym_pi = _avg_policies([pi1, pi2])
             pi1, pi2 = sym_pi, sym_pi
 
-
-    # Compute final Q-tables against converged opponent policies
-    _, _, q_table1 = best_response(1, pi2, persona1_weights,
-                                   return_q_table=True)
-    _, _, q_table2 = best_response(2, pi1, persona2_weights,
-                                   return_q_table=True)
-
-    return {
-        'policy1': pi1,
-        'policy2': pi2,
+    data = {
         'iterations': iterations,
         'converged': converged,
-        'computation_log': computation_log,
-        'q_table1': q_table1,
-        'q_table2': q_table2,
+        'cancelled': cancelled,
+        'residuals': residuals,
     }
+    if prune:
+        data.update(pruned_policy1=pi1, pruned_policy2=pi2,
+                    solved_cells=(solved1, solved2))
+    else:
+        data.update(policy1=pi1, policy2=pi2)
+    if progress is not None:
+        data['computation_log'] = live_log
+    return SolverResult(data, persona1_weights, persona2_weights,
+                        log_iterates, br_cache, beta)
+
+
+def ibr_continuation(persona1_weights=None, persona2_weights=None,
+                     beta=SOFTMAX_BETA, beta_start=CONTINUATION_BETA_START,
+                     n_steps=CONTINUATION_STEPS,
+                     step_iter=CONTINUATION_STEP_ITER, log_iterations=2,
+                     br_cache=None, progress=None, prune=SOLVER_PRUNE,
+                     step_exploitability=False):
+    """
+    Homotopy continuation over the softmax temperature: solve at a low
+    beta, then raise beta geometrically to the target in n_steps, warm-
+    starting each step's IBR from the previous step's policies with a
+    short iteration cap (step_iter).
+
+    progress and prune are passed to every step's ibr_solve (events carry
+    the step's beta); cancelling stops the path at the current step.
+    step_exploitability adds each step's exploitability to its path entry
+    (two extra best-response solves and policy evaluations per step); the
+    final step's stays available lazily as result['exploitability'].
+
+    Returns:
+        SolverResult of the final (target-beta) step, with extra keys
+        'continuation_path' (one entry per step: beta, iterations,
+        converged, final residual and, with step_exploitability,
+        exploitability) and
+        'total_iterations' (IBR iterations summed over all steps)
+    """
+    betas = np.geomspace(min(beta_start, beta), beta, n_steps) \
+        if n_steps > 1 else np.array([beta])
+
+    pi1 = pi2 = None
+    path = []
+    result = None
+    for step, b in enumerate(betas):
+        last = step == len(betas) - 1
+        result = ibr_solve(persona1_weights, persona2_weights,
+                           log_iterations=log_iterations if last else 0,
+                           max_iter=step_iter, init_policy1=pi1,
+                           init_policy2=pi2, br_cache=br_cache,
+                           beta=float(b), progress=progress, prune=prune)
+        pi1, pi2 = result['policy1'], result['policy2']
+        entry = {
+            'beta': float(b),
+            'iterations': result['iterations'],
+            'converged': result['converged'],
+            'residual': max(result['residuals'][-1]),
+        }
+        if step_exploitability:
+            entry['exploitability'] = result['exploitability']
+        path.append(entry)
+        if result['cancelled']:
+            break
+
+    result['continuation_path'] = path
+    result['total_iterations'] = sum(p['iterations'] for p in path)
+    return result
+
+
+def _exploitability(result):
+    """
+    Best-response value gain of each player against the returned policies,
+    measured at the initial state (t=1, unarmed, p=INITIAL_BELIEF).
+    """
+    p0_idx = _p_to_idx(INITIAL_BELIEF)
+    gains = {}
+    for player, own, opp, weights in [
+        (1, result['policy1'], result['policy2'], result.persona1_weights),
+        (2, result['policy2'], result['policy1'], result.persona2_weights),
+    ]:
+        _, V_br, _ = result.final_best_response(player)
+        V_pi = evaluate_policy(player, own, opp, weights)
+        gains['p%d' % player] = float(V_br[1][0][p0_idx] - V_pi[1][0][p0_idx])
+    gains['total'] = gains['p1'] + gains['p2']
+    return gains
+
+
+def _build_computation_log(log_iterates, persona1_weights, persona2_weights,
+                           beta=SOFTMAX_BETA):
+    """
+    Rebuild the computation log from the iterate policies (pi1_k, pi2_k)
+    that entered each logged IBR iteration.
+    """
+    computation_log = []
+    for k, (pi1, pi2) in enumerate(log_iterates):
+        computation_log += _logged_iteration(k, pi1, pi2, persona1_weights,
+                                             persona2_weights, beta)[2]
+    return computation_log
+
+
+def _logged_iteration(k, pi1, pi2, persona1_weights, persona2_weights,
+                      beta=SOFTMAX_BETA):
+    """
+    Best responses of IBR iteration k with logging at LOG_STATES.
+    Returns (br1, br2, log entries for both players).
+    """
+    target_states = set(LOG_STATES)
+    log_p1 = {'target_states': target_states, 'entries': []}
+    log_p2 = {'target_states': target_states, 'entries': []}
+
+    br1, _, _ = best_response(1, pi2, persona1_weights,
+                              log_collector=log_p1, beta=beta)
+    br2, _, _ = best_response(2, pi1, persona2_weights,
+                              log_collector=log_p2, beta=beta)
+
+    entries = []
+    for player_num, log_col, old_pi, br in [
+        (1, log_p1, pi1, br1),
+        (2, log_p2, pi2, br2),
+    ]:
+        states = []
+        for entry in log_col['entries']:
+            t = entry['t']
+            ammo = entry['ammo']
+            p_idx = _p_to_idx(entry['p'])
+            old_probs = old_pi[t][ammo][p_idx]
+            br_probs = br[t][ammo][p_idx]
+            states.append({
+                't': t,
+                'ammo': ammo,
+                'belief': entry['p'],
+                'q_values': entry['q_values'],
+                'br_probs': entry['action_probs'],
+                'damped_probs': {
+                    a: round((1 - IBR_ALPHA) * v +
+                             IBR_ALPHA * br_probs.get(a, 0.0), 4)
+                    for a, v in old_probs.items()
+                },
+            })
+        entries.append({
+            'iteration': k + 1,
+            'player': player_num,
+            'states': states,
+        })
+
+    return br1, br2, entries
 
 
 def _p_to_idx(p):
@@ -406,6 +795,21 @@ def _damp_policy(old_policy, new_policy, alpha):
     return result
 
 
+def _merge_policy(base, update, cells):
+    """base with the entries of the given (t, ammo, p_idx) cells from update."""
+    return {
+        t: {
+            ammo: {
+                p_idx: (update[t][ammo][p_idx]
+                        if (t, ammo, p_idx) in cells else probs)
+                for p_idx, probs in base[t][ammo].items()
+            }
+            for ammo in base[t]
+        }
+        for t in base
+    }
+
+
 def _avg_policies(policies):
     """Average a list of policies element-wise for stabilization."""
     n = len(policies)
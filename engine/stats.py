@@ -0,0 +1,188 @@
+"""
+Streaming aggregate statistics for simulated episodes.
+
+StreamingStats keeps outcome counts, reward sums, running means and
+variances (for standard errors) and histograms of termination round and
+total reward in O(1) memory, whatever the number of episodes. Aggregates
+built in separate chunks or processes merge exactly.
+"""
+import numpy as np
+from config import T, OUTCOMES
+
+# Per-episode quantities whose means are reported (with standard errors)
+STAT_KEYS = ('p1_win_rate', 'p2_win_rate', 'tie_rate', 'draw_rate',
+             'avg_reward_p1', 'avg_reward_p2', 'avg_termination_round')
+# Outcome -> index into the first four STAT_KEYS (and outcome counts)
+OUTCOME_RATE = {'P1Win': 0, 'P2Win': 1, 'Tie': 2, 'Draw': 3}
+COUNT_KEYS = ('p1_wins', 'p2_wins', 'ties', 'draws')
+# config.OUTCOMES index -> index into OUTCOME_RATE order
+_OUTCOME_RATE_IDX = np.array([OUTCOME_RATE.get(o, 3) for o in OUTCOMES])
+# Width of the total-reward histogram bins
+REWARD_BIN = 1.0
+
+
+def episode_values(ep):
+    """Episode -> vector of STAT_KEYS quantities."""
+    x = np.zeros(len(STAT_KEYS))
+    x[OUTCOME_RATE.get(ep['outcome'], 3)] = 1.0
+    x[4], x[5] = ep['total_rewards']
+    x[6] = ep['termination_round']
+    return x
+
+
+class StreamingStats:
+    """
+    Online aggregate of episode results.
+
+    Feed episodes with add_episode(). Standard errors are computed over
+    'samples' given to add_sample(): one per episode normally, or one
+    per antithetic pair (the pair's mean), so that correlated episodes are
+    not counted as independent. add() does both for a single episode.
+    """
+
+    def __init__(self):
+        self.n_episodes = 0
+        self.counts = np.zeros(len(COUNT_KEYS), dtype=np.int64)
+        self.reward_sums = [0.0, 0.0]
+        # term_counts[r - 1] = episodes ending in round r (T + 1 = draw)
+        self.term_counts = np.zeros(T + 1, dtype=np.int64)
+        # Per player: reward bin (lower edge) -> count
+        self.reward_hist = [{}, {}]
+        # Welford state over samples
+        self.n_samples = 0
+        self.mean = np.zeros(len(STAT_KEYS))
+        self.m2 = np.zeros(len(STAT_KEYS))
+
+    def add_episode(self, ep):
+        """Count one episode; returns its STAT_KEYS value vector."""
+        self.n_episodes += 1
+        self.counts[OUTCOME_RATE.get(ep['outcome'], 3)] += 1
+        for i in [0, 1]:
+            reward = ep['total_rewards'][i]
+            self.reward_sums[i] += reward
+            b = float(np.floor(reward / REWARD_BIN) * REWARD_BIN)
+            self.reward_hist[i][b] = self.reward_hist[i].get(b, 0) + 1
+        self.term_counts[ep['termination_round'] - 1] += 1
+        return episode_values(ep)
+
+    def add_sample(self, x):
+        """One independent sample of the STAT_KEYS vector (Welford)."""
+        self.n_samples += 1
+        delta = x - self.mean
+        self.mean += delta / self.n_samples
+        self.m2 += delta * (x - self.mean)
+
+    def add(self, ep):
+        """Count one episode and use it as one sample."""
+        self.add_sample(self.add_episode(ep))
+
+    def add_arrays(self, outcomes, total_rewards, termination_rounds):
+        """
+        Count a batch of episodes given as arrays, one sample each:
+        outcome indices into config.OUTCOMES, (n, 2) total rewards and
+        termination rounds (T + 1 = draw).
+        """
+        rate = _OUTCOME_RATE_IDX[np.asarray(outcomes)]
+        rewards = np.asarray(total_rewards, dtype=float)
+        rounds = np.asarray(termination_rounds)
+        x = np.zeros((len(rate), len(STAT_KEYS)))
+        x[np.arange(len(rate)), rate] = 1.0
+        x[:, 4:6] = rewards
+        x[:, 6] = rounds
+
+        batch = StreamingStats()
+        batch.n_episodes = len(rate)
+        batch.counts = np.bincount(rate, minlength=len(COUNT_KEYS))
+        batch.reward_sums = rewards.sum(axis=0).tolist()
+        batch.term_counts = np.bincount(rounds - 1, minlength=T + 1)
+        for i in [0, 1]:
+            bins, counts = np.unique(
+                np.floor(rewards[:, i] / REWARD_BIN) * REWARD_BIN,
+                return_counts=True)
+            batch.reward_hist[i] = dict(zip(bins.tolist(), counts.tolist()))
+        if len(rate):
+            batch.n_samples = len(rate)
+            batch.mean = x.mean(axis=0)
+            batch.m2 = ((x - batch.mean) ** 2).sum(axis=0)
+        return self.merge(batch)
+
+    def merge(self, other):
+        """Fold another aggregate into this one (exact; Chan et al.)."""
+        self.n_episodes += other.n_episodes
+        self.counts += other.counts
+        for i in [0, 1]:
+            self.reward_sums[i] += other.reward_sums[i]
+            for b, c in other.reward_hist[i].items():
+                self.reward_hist[i][b] = self.reward_hist[i].get(b, 0) + c
+        self.term_counts += other.term_counts
+
+        n = self.n_samples + other.n_samples
+        if other.n_samples:
+            delta = other.mean - self.mean
+            self.m2 = self.m2 + other.m2 + \
+                delta ** 2 * self.n_samples * other.n_samples / n
+            self.mean = self.mean + delta * other.n_samples / n
+        self.n_samples = n
+        return self
+
+    def se(self):
+        """Standard error of each STAT_KEYS mean (0 below two samples)."""
+        if self.n_samples < 2:
+            return np.zeros(len(STAT_KEYS))
+        return np.sqrt(self.m2 / (self.n_samples - 1) / self.n_samples)
+
+    def stats(self):
+        """
+        Stats dict in the run_batch format. Without episodes the rates
+        and averages (STAT_KEYS) are None.
+        """
+        n = self.n_episodes
+        stats = {'n_episodes': n}
+        for key, count in zip(COUNT_KEYS, self.counts):
+            stats[key] = int(count)
+        means = [stats['p1_wins'], stats['p2_wins'], stats['ties'],
+                 stats['draws'], self.reward_sums[0], self.reward_sums[1],
+                 float(np.dot(np.arange(1, T + 2), self.term_counts))]
+        stats.update({key: total / n if n else None
+                      for key, total in zip(STAT_KEYS, means)})
+        stats.update({
+            'termination_distribution': {
+                r: int(self.term_counts[r - 1]) for r in range(1, T + 2)
+            },
+            'reward_distribution': {
+                'p%d' % (i + 1): {b: self.reward_hist[i][b]
+                                  for b in sorted(self.reward_hist[i])}
+                for i in [0, 1]
+            },
+            'se': dict(zip(STAT_KEYS, self.se().tolist())),
+        })
+        return stats
+
+    def to_state(self):
+        """JSON-serializable state (for checkpoints and other processes)."""
+        return {
+            'n_episodes': self.n_episodes,
+            'counts': self.counts.tolist(),
+            'reward_sums': list(self.reward_sums),
+            'term_counts': self.term_counts.tolist(),
+            'reward_hist': [[[b, c] for b, c in h.items()]
+                            for h in self.reward_hist],
+            'n_samples': self.n_samples,
+            'mean': self.mean.tolist(),
+            'm2': self.m2.tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Inverse of to_state."""
+        agg = cls()
+        agg.n_episodes = state['n_episodes']
+        agg.counts = np.array(state['counts'], dtype=np.int64)
+        agg.reward_sums = list(state['reward_sums'])
+        agg.term_counts = np.array(state['term_counts'], dtype=np.int64)
+        agg.reward_hist = [{float(b): c for b, c in h}
+                           for h in state['reward_hist']]
+        agg.n_samples = state['n_samples']
+        agg.mean = np.array(state['mean'])
+        agg.m2 = np.array(state['m2'])
+        return agg
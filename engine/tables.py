@@ -0,0 +1,173 @@
+"""
+Array encodings of the game rules and policies for vectorized code.
+
+Actions and outcomes are encoded by their position in config.ACTIONS and
+config.OUTCOMES. Policy and Q-table dicts are packed into arrays indexed
+[t, ammo, p_idx, action] with t running 1..T (row 0 is unused), so that
+arr[t] lines up with policy[t].
+"""
+import numpy as np
+from config import T, ACTIONS, OUTCOMES, DELTA, N_BELIEFS
+from engine.game import (legal_actions, outcome, ammo_transition,
+                         stage_utility, outcome_payoff)
+
+N_ACTIONS = len(ACTIONS)
+ACTION_INDEX = {a: i for i, a in enumerate(ACTIONS)}
+OUTCOME_INDEX = {o: i for i, o in enumerate(OUTCOMES)}
+CONTINUE = OUTCOME_INDEX['Continue']
+DRAW = OUTCOME_INDEX['Draw']
+# Smallest signed dtype holding every belief grid index and -1
+BELIEF_INDEX_DTYPE = '<i1' if N_BELIEFS <= np.iinfo(np.int8).max else '<i2'
+
+
+def _build_legal_mask():
+    """LEGAL_MASK[ammo, u] is True when action u is legal with that ammo."""
+    mask = np.zeros((2, N_ACTIONS), dtype=bool)
+    for ammo in [0, 1]:
+        for a in legal_actions(ammo):
+            mask[ammo, ACTION_INDEX[a]] = True
+    return mask
+
+
+def _build_outcome_table():
+    """OUTCOME_TABLE[a1, a2, u1, u2] = outcome index (legal pairs only)."""
+    table = np.full((2, 2, N_ACTIONS, N_ACTIONS), CONTINUE, dtype=np.int8)
+    for a1 in [0, 1]:
+        for a2 in [0, 1]:
+            for u1 in legal_actions(a1):
+                for u2 in legal_actions(a2):
+                    o = outcome((a1, a2), u1, u2)
+                    table[a1, a2, ACTION_INDEX[u1], ACTION_INDEX[u2]] = \
+                        OUTCOME_INDEX[o]
+    return table
+
+
+def _build_next_ammo():
+    """NEXT_AMMO[ammo, u] = T(ammo, u)."""
+    table = np.zeros((2, N_ACTIONS), dtype=np.int8)
+    for ammo in [0, 1]:
+        for a in ACTIONS:
+            table[ammo, ACTION_INDEX[a]] = ammo_transition(ammo, a)
+    return table
+
+
+def _build_reward_table():
+    """
+    REWARD_TABLE[a1, a2, u1, u2] = (G1 + U1(o), G2 + U2(o)), the
+    unweighted rewards of a legal joint action (0 for illegal pairs).
+    """
+    table = np.zeros((2, 2, N_ACTIONS, N_ACTIONS, 2))
+    for a1 in [0, 1]:
+        for a2 in [0, 1]:
+            for u1 in legal_actions(a1):
+                for u2 in legal_actions(a2):
+                    g = stage_utility((a1, a2), u1, u2)
+                    pay = outcome_payoff(outcome((a1, a2), u1, u2))
+                    table[a1, a2, ACTION_INDEX[u1], ACTION_INDEX[u2]] = \
+                        (g[0] + pay[0], g[1] + pay[1])
+    return table
+
+
+LEGAL_MASK = _build_legal_mask()
+OUTCOME_TABLE = _build_outcome_table()
+NEXT_AMMO = _build_next_ammo()
+REWARD_TABLE = _build_reward_table()
+
+
+def persona_reward_table(player, persona_weights):
+    """
+    R[own_ammo, opp_ammo, u_me, u_opp] = G + persona-weighted U(o) of
+    'player' for a legal joint action (0 for illegal pairs), with wins,
+    ties and losses scaled by (w_win, w_lose, w_tie) as in the solver.
+    """
+    w_win, w_lose, w_tie = persona_weights
+    table = np.zeros((2, 2, N_ACTIONS, N_ACTIONS))
+    for own_ammo in [0, 1]:
+        for opp_ammo in [0, 1]:
+            for u_me in legal_actions(own_ammo):
+                for u_opp in legal_actions(opp_ammo):
+                    if player == 1:
+                        state, u1, u2 = (own_ammo, opp_ammo), u_me, u_opp
+                    else:
+                        state, u1, u2 = (opp_ammo, own_ammo), u_opp, u_me
+                    o = outcome(state, u1, u2)
+                    pay = outcome_payoff(o)[player - 1]
+                    if pay > 0:
+                        pay *= w_win
+                    elif o == 'Tie':
+                        pay *= w_tie
+                    elif pay < 0:
+                        pay *= w_lose
+                    table[own_ammo, opp_ammo, ACTION_INDEX[u_me],
+                          ACTION_INDEX[u_opp]] = \
+                        stage_utility(state, u1, u2)[player - 1] + pay
+    return table
+
+
+def p_to_idx(p):
+    """Vectorized belief -> grid index (same rounding as snap_to_grid)."""
+    idx = np.rint(np.asarray(p, dtype=float) / DELTA).astype(np.intp)
+    return np.clip(idx, 0, N_BELIEFS - 1)
+
+
+def encode_actions(actions):
+    """Map action letters to integer indices."""
+    return np.array([ACTION_INDEX[a] for a in actions], dtype=np.intp)
+
+
+def encode_outcomes(outcomes):
+    """Map outcome names to integer indices."""
+    return np.array([OUTCOME_INDEX[o] for o in outcomes], dtype=np.intp)
+
+
+def policy_to_array(policy):
+    """
+    Pack policy[t][ammo][p_idx] = {action: prob} into an array of shape
+    (T + 1, 2, N_BELIEFS, N_ACTIONS). Illegal actions get probability 0.
+    Arrays are passed through unchanged.
+    """
+    if isinstance(policy, np.ndarray):
+        return policy
+    arr = np.zeros((T + 1, 2, N_BELIEFS, N_ACTIONS))
+    for t in policy:
+        for ammo in policy[t]:
+            for p_idx, probs in policy[t][ammo].items():
+                for a, v in probs.items():
+                    arr[t, ammo, p_idx, ACTION_INDEX[a]] = v
+    return arr
+
+
+def q_table_to_array(q_table):
+    """
+    Pack q_table[t][ammo][p_idx] = {action: Q} into an array of the same
+    shape as policy_to_array. Illegal actions are filled with -inf.
+    """
+    if isinstance(q_table, np.ndarray):
+        return q_table
+    arr = np.full((T + 1, 2, N_BELIEFS, N_ACTIONS), -np.inf)
+    for t in q_table:
+        for ammo in q_table[t]:
+            for p_idx, q_values in q_table[t][ammo].items():
+                for a, v in q_values.items():
+                    arr[t, ammo, p_idx, ACTION_INDEX[a]] = v
+    return arr
+
+
+def array_to_policy(arr):
+    """Inverse of policy_to_array: rebuild the nested policy dict."""
+    return {
+        t: {
+            ammo: {
+                p_idx: {a: float(arr[t, ammo, p_idx, ACTION_INDEX[a]])
+                        for a in legal_actions(ammo)}
+                for p_idx in range(N_BELIEFS)
+            }
+            for ammo in [0, 1]
+        }
+        for t in range(1, T + 1)
+    }
+
+
+def array_to_q_table(arr):
+    """Inverse of q_table_to_array: rebuild the nested Q-table dict."""
+    return array_to_policy(arr)
@@ -26,17 +26,77 @@ const API = {
         return this.post('/api/solve', { persona1, persona2 });
     },
 
-    simulate(persona1, persona2, n_episodes, optimal_p1, optimal_p2) {
+    solveBatch(matchups) {
+        return this.post('/api/solve_batch', { matchups });
+    },
+
+    simulate(persona1, persona2, n_episodes, optimal_p1, optimal_p2, beta, options) {
         const body = { persona1, persona2, n_episodes };
         if (optimal_p1 !== undefined) body.optimal_p1 = optimal_p1;
         if (optimal_p2 !== undefined) body.optimal_p2 = optimal_p2;
+        if (beta !== undefined) body.beta = beta;
+        // e.g. { include_episodes: false, include_log: true }
+        Object.assign(body, options || {});
         return this.post('/api/simulate', body);
     },
 
-    simulateStatsOnly(persona1, persona2, n_episodes, optimal_p1, optimal_p2) {
+    // Compiled policy model for local episode generation (see model.js)
+    model(persona1, persona2, beta, options) {
+        const body = { persona1, persona2 };
+        if (beta !== undefined) body.beta = beta;
+        // e.g. { include_policies: true, include_log: true }
+        Object.assign(body, options || {});
+        return this.post('/api/model', body);
+    },
+
+    simulateStatsOnly(persona1, persona2, n_episodes, optimal_p1, optimal_p2, options) {
         const body = { persona1, persona2, n_episodes, include_episodes: false };
         if (optimal_p1 !== undefined) body.optimal_p1 = optimal_p1;
         if (optimal_p2 !== undefined) body.optimal_p2 = optimal_p2;
+        // Variance reduction: crn_seed, antithetic, ci_width, ci_metric
+        Object.assign(body, options || {});
         return this.post('/api/simulate', body);
     },
+
+    // Server-Sent Events progress stream. handlers maps event names
+    // ('iteration', 'log', 'stats') to callbacks. Returns { done, cancel }:
+    // done resolves with the final 'done' payload; cancel() closes the
+    // stream, which also stops the work on the server.
+    stream(url, params, handlers = {}) {
+        const query = new URLSearchParams(params).toString();
+        const source = new EventSource(`${url}?${query}`);
+        let cancel;
+        const done = new Promise((resolve, reject) => {
+            ['iteration', 'log', 'stats'].forEach(name => {
+                source.addEventListener(name, e => {
+                    if (handlers[name]) handlers[name](JSON.parse(e.data));
+                });
+            });
+            source.addEventListener('done', e => {
+                source.close();
+                resolve(JSON.parse(e.data));
+            });
+            // Server-side 'error' events carry data; connection errors do not
+            source.addEventListener('error', e => {
+                source.close();
+                reject(new Error(e.data ? JSON.parse(e.data).error : `${url} stream failed`));
+            });
+            cancel = () => {
+                source.close();
+                reject(new Error('cancelled'));
+            };
+        });
+        return { done, cancel };
+    },
+
+    streamSolve(persona1, persona2, beta, handlers) {
+        const params = { persona1, persona2 };
+        if (beta !== undefined) params.beta = beta;
+        return this.stream('/api/stream/solve', params, handlers);
+    },
+
+    streamSimulate(persona1, persona2, n_episodes, options, handlers) {
+        const params = Object.assign({ persona1, persona2, n_episodes }, options || {});
+        return this.stream('/api/stream/simulate', params, handlers);
+    },
 };
@@ -119,6 +119,21 @@
         progressEl.style.display = 'block';
 
         const nEpisodes = parseInt(document.getElementById('exp-n').value) || 500;
+        // Stop each matchup once its 95% CI is narrow enough (0 = run all
+        // episodes); one shared seed gives every matchup common random numbers
+        const ciWidth = parseFloat(document.getElementById('exp-ci').value) || 0;
+        const simOptions = { crn_seed: Math.floor(Math.random() * 2 ** 31) };
+        if (ciWidth > 0) simOptions.ci_width = ciWidth;
+
+        // Solve all selected pairs up front so the server can shard them
+        // across processes; the per-matchup simulations then hit the cache
+        progressLabel.textContent = `Solving ${matchups.length} matchups in parallel...`;
+        progressFill.style.width = '0%';
+        try {
+            await API.solveBatch(matchups.map(m => m.split(':')));
+        } catch (err) {
+            console.error('Batch solve failed, solving per matchup:', err);
+        }
 
         for (let i = 0; i < matchups.length; i++) {
             const [p1, p2] = matchups[i].split(':');
@@ -128,11 +143,20 @@
             progressLabel.textContent = `Running ${i + 1}/${matchups.length}: ${p1Name} vs ${p2Name}...`;
             progressFill.style.width = `${((i) / matchups.length) * 100}%`;
 
-            // Yield to UI before fetch
-            await sleep(10);
-
             try {
-                const result = await API.simulateStatsOnly(p1, p2, nEpisodes);
+                // Stream partial stats so the label shows live progress
+                const running = `Running ${i + 1}/${matchups.length}: ${p1Name} vs ${p2Name}`;
+                const stream = API.streamSimulate(p1, p2, nEpisodes, simOptions, {
+                    iteration: ev => {
+                        progressLabel.textContent = `${running} — solving, iteration ${ev.iteration}`;
+                    },
+                    stats: ev => {
+                        const s = ev.stats;
+                        progressLabel.textContent = `${running} — ${s.n_episodes} episodes, ` +
+                            `P1 win ${(s.p1_win_rate * 100).toFixed(1)}% ± ${(s.se.p1_win_rate * 100).toFixed(1)}`;
+                    },
+                });
+                const result = await stream.done;
                 expResults[matchups[i]] = result.stats;
             } catch (err) {
                 console.error(`Failed ${p1} vs ${p2}:`, err);
@@ -336,17 +360,17 @@
             const label = matchupLabel(key);
             html += `<tr>
                 <td>${label}</td>
-                <td>${s.total_episodes}</td>
+                <td>${s.n_episodes}</td>
                 <td>${s.p1_wins}</td>
                 <td>${s.p2_wins}</td>
                 <td>${s.ties}</td>
                 <td>${s.draws}</td>
-                <td>${(s.p1_win_rate * 100).toFixed(1)}%</td>
-                <td>${(s.p2_win_rate * 100).toFixed(1)}%</td>
-                <td>${(s.tie_rate * 100).toFixed(1)}%</td>
-                <td>${(s.draw_rate * 100).toFixed(1)}%</td>
-                <td>${s.avg_reward_p1.toFixed(2)}</td>
-                <td>${s.avg_reward_p2.toFixed(2)}</td>
+                <td>${pctWithSe(s, 'p1_win_rate')}</td>
+                <td>${pctWithSe(s, 'p2_win_rate')}</td>
+                <td>${pctWithSe(s, 'tie_rate')}</td>
+                <td>${pctWithSe(s, 'draw_rate')}</td>
+                <td>${s.avg_reward_p1.toFixed(2)} ± ${s.se.avg_reward_p1.toFixed(2)}</td>
+                <td>${s.avg_reward_p2.toFixed(2)} ± ${s.se.avg_reward_p2.toFixed(2)}</td>
                 <td>${s.avg_termination_round.toFixed(1)}</td>
             </tr>`;
         });
@@ -355,6 +379,10 @@
         container.innerHTML = html;
     }
 
+    function pctWithSe(s, key) {
+        return `${(s[key] * 100).toFixed(1)}% ± ${(s.se[key] * 100).toFixed(1)}`;
+    }
+
     // ── CSV Export ──
 
     function exportCSV() {
@@ -363,18 +391,21 @@
 
         const header = 'P1 Persona,P2 Persona,Episodes,P1 Wins,P2 Wins,Ties,Draws,' +
             'P1 Win Rate,P2 Win Rate,Tie Rate,Draw Rate,' +
-            'Avg Reward P1,Avg Reward P2,Avg Termination Round';
+            'Avg Reward P1,Avg Reward P2,Avg Termination Round,' +
+            'SE P1 Win Rate,SE P2 Win Rate,SE Avg Reward P1,SE Avg Reward P2';
 
         const rows = matchups.map(key => {
             const [p1, p2] = key.split(':');
             const s = expResults[key];
             return [
-                nameForId(p1), nameForId(p2), s.total_episodes,
+                nameForId(p1), nameForId(p2), s.n_episodes,
                 s.p1_wins, s.p2_wins, s.ties, s.draws,
                 s.p1_win_rate.toFixed(4), s.p2_win_rate.toFixed(4),
                 s.tie_rate.toFixed(4), s.draw_rate.toFixed(4),
                 s.avg_reward_p1.toFixed(4), s.avg_reward_p2.toFixed(4),
                 s.avg_termination_round.toFixed(2),
+                s.se.p1_win_rate.toFixed(4), s.se.p2_win_rate.toFixed(4),
+                s.se.avg_reward_p1.toFixed(4), s.se.avg_reward_p2.toFixed(4),
             ].join(',');
         });
 
@@ -403,8 +434,4 @@
         const [p1, p2] = key.split(':');
         return `${nameForId(p1)} vs ${nameForId(p2)}`;
     }
-
-    function sleep(ms) {
-        return new Promise(resolve => setTimeout(resolve, ms));
-    }
 })();
@@ -0,0 +1,153 @@
+/**
+ * Client-side episode generator over a compiled policy model (/api/model).
+ * Produces episodes in the same format as the server's run_episode, so the
+ * replay tab can step through them without shipping episodes over the wire.
+ */
+class CompiledModel {
+    constructor(model) {
+        this.m = model;
+    }
+
+    // First k with cdf[k] > u (np.searchsorted side='right'), clamped
+    static sampleIndex(cdf, u) {
+        for (let k = 0; k < cdf.length; k++) {
+            if (cdf[k] > u) return k;
+        }
+        return cdf.length - 1;
+    }
+
+    chooseAction(player, t, ammo, pIdx, optimal, rand) {
+        const tables = player === 1 ? this.m.player1 : this.m.player2;
+        let k;
+        if (optimal) {
+            k = tables.greedy[t][ammo][pIdx];
+        } else {
+            k = CompiledModel.sampleIndex(tables.soft_cdf[t][ammo][pIdx], rand());
+        }
+        return this.m.legal_actions[ammo][k];
+    }
+
+    // Legal action -> value dict for one cell (action probs or Q-values)
+    cellDict(values, ammo) {
+        const out = {};
+        this.m.legal_actions[ammo].forEach((a, k) => { out[a] = values[k]; });
+        return out;
+    }
+
+    runEpisode(optimalP1 = true, optimalP2 = true, rand = Math.random) {
+        const m = this.m;
+        const aIdx = a => m.actions.indexOf(a);
+        let a1 = 0, a2 = 0;
+        let i1 = m.initial_belief_idx, i2 = m.initial_belief_idx;
+        let total1 = 0, total2 = 0;
+        let finalOutcome = 'Draw';
+        let termRound = m.T + 1;
+        const rounds = [];
+
+        for (let t = 1; t <= m.T; t++) {
+            const u1 = this.chooseAction(1, t, a1, i1, optimalP1, rand);
+            const u2 = this.chooseAction(2, t, a2, i2, optimalP2, rand);
+            const k1 = aIdx(u1), k2 = aIdx(u2);
+            const o = m.outcomes[m.outcome_table[a1][a2][k1][k2]];
+            const [r1, r2] = m.reward_table[a1][a2][k1][k2];
+            total1 += r1;
+            total2 += r2;
+
+            const round = {
+                round: t,
+                state: [a1, a2],
+                actions: [u1, u2],
+                outcome: o,
+                rewards: [r1, r2],
+                beliefs_before: [m.belief_grid[i1], m.belief_grid[i2]],
+                ammo_before: [a1, a2],
+                p1_action_probs: this.cellDict(m.player1.probs[t][a1][i1], a1),
+                p2_action_probs: this.cellDict(m.player2.probs[t][a2][i2], a2),
+                p1_threshold: m.player1.thresholds[`${t},${a1}`],
+                p2_threshold: m.player2.thresholds[`${t},${a2}`],
+                p1_q_values: this.cellDict(m.player1.q_values[t][a1][i1], a1),
+                p2_q_values: this.cellDict(m.player2.q_values[t][a2][i2], a2),
+            };
+
+            if (o !== 'Continue') {
+                round.beliefs_after = round.beliefs_before.slice();
+                round.ammo_after = [a1, a2];
+                rounds.push(round);
+                finalOutcome = o;
+                termRound = t;
+                break;
+            }
+
+            const next1 = m.next_ammo[a1][k1];
+            const next2 = m.next_ammo[a2][k2];
+            i1 = m.player1.next_belief[t][a1][i1][k1];
+            i2 = m.player2.next_belief[t][a2][i2][k2];
+            round.beliefs_after = [m.belief_grid[i1], m.belief_grid[i2]];
+            round.ammo_after = [next1, next2];
+            rounds.push(round);
+            a1 = next1;
+            a2 = next2;
+        }
+
+        if (finalOutcome === 'Draw') {
+            total1 += m.draw_payoff[0];
+            total2 += m.draw_payoff[1];
+            if (rounds.length) rounds[rounds.length - 1].outcome = 'Draw';
+        }
+
+        return {
+            rounds,
+            outcome: finalOutcome,
+            total_rewards: [total1, total2],
+            termination_round: termRound,
+        };
+    }
+
+    runBatch(n, optimalP1 = true, optimalP2 = true, rand = Math.random) {
+        const episodes = [];
+        for (let i = 0; i < n; i++) {
+            episodes.push(this.runEpisode(optimalP1, optimalP2, rand));
+        }
+        return episodes;
+    }
+
+    // Aggregate stats of episodes, in the run_batch format (StreamingStats)
+    static batchStats(episodes, T) {
+        const n = episodes.length;
+        const rateKeys = { P1Win: 'p1_win_rate', P2Win: 'p2_win_rate', Tie: 'tie_rate', Draw: 'draw_rate' };
+        const keys = ['p1_win_rate', 'p2_win_rate', 'tie_rate', 'draw_rate',
+                      'avg_reward_p1', 'avg_reward_p2', 'avg_termination_round'];
+        const values = episodes.map(ep => {
+            const x = { p1_win_rate: 0, p2_win_rate: 0, tie_rate: 0, draw_rate: 0 };
+            x[rateKeys[ep.outcome] || 'draw_rate'] = 1;
+            x.avg_reward_p1 = ep.total_rewards[0];
+            x.avg_reward_p2 = ep.total_rewards[1];
+            x.avg_termination_round = ep.termination_round;
+            return x;
+        });
+
+        const stats = { n_episodes: n, se: {} };
+        keys.forEach(key => {
+            const mean = n ? values.reduce((s, x) => s + x[key], 0) / n : 0;
+            const ss = values.reduce((s, x) => s + (x[key] - mean) ** 2, 0);
+            stats[key] = n ? mean : null;
+            stats.se[key] = n > 1 ? Math.sqrt(ss / (n - 1) / n) : 0;
+        });
+        stats.p1_wins = Math.round(stats.p1_win_rate * n);
+        stats.p2_wins = Math.round(stats.p2_win_rate * n);
+        stats.ties = Math.round(stats.tie_rate * n);
+        stats.draws = Math.round(stats.draw_rate * n);
+
+        stats.termination_distribution = {};
+        for (let r = 1; r <= T + 1; r++) stats.termination_distribution[r] = 0;
+        stats.reward_distribution = { p1: {}, p2: {} };
+        episodes.forEach(ep => {
+            stats.termination_distribution[ep.termination_round] += 1;
+            ['p1', 'p2'].forEach((p, i) => {
+                const bin = Math.floor(ep.total_rewards[i]);
+                stats.reward_distribution[p][bin] = (stats.reward_distribution[p][bin] || 0) + 1;
+            });
+        });
+        return stats;
+    }
+}
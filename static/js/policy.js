@@ -12,6 +12,8 @@ let policyChart = null;
 /* Cached data so the round selector can redraw without re-fetching */
 let _cachedPolicy1 = null;
 let _cachedPolicy2 = null;
+let _cachedSummary1 = null;
+let _cachedSummary2 = null;
 let _cachedNBeliefs = 21;
 let _cachedDelta = 0.05;
 
@@ -40,6 +42,8 @@ async function showPolicy() {
 
         _cachedPolicy1 = lastSimResult.policy1;
         _cachedPolicy2 = lastSimResult.policy2;
+        _cachedSummary1 = lastSimResult.policy_summary1 || null;
+        _cachedSummary2 = lastSimResult.policy_summary2 || null;
         _cachedNBeliefs = lastSimResult.n_beliefs || 21;
         _cachedDelta = lastSimResult.delta || 0.05;
         setStatus('pol-status', 'Using policy from last simulation', 'success');
@@ -71,6 +75,21 @@ function getRoundActionProb(policy, round, ammo, actionKey, nBeliefs) {
     return probs;
 }
 
+/**
+ * Precomputed server-side threshold for (round, ammo), or null.
+ */
+function getThreshold(summary, round, ammo) {
+    if (!summary || !summary.thresholds) return null;
+    const tData = summary.thresholds[String(round)];
+    if (!tData || tData[String(ammo)] === undefined) return null;
+    return tData[String(ammo)];
+}
+
+function thresholdLabel(name, summary, round, ammo) {
+    const th = getThreshold(summary, round, ammo);
+    return th === null ? name : `${name} (threshold p=${th.toFixed(2)})`;
+}
+
 function renderPolicyChart(policy1, policy2, nBeliefs, delta, round) {
     const ctx = document.getElementById('chart-policy').getContext('2d');
     if (policyChart) policyChart.destroy();
@@ -85,7 +104,7 @@ function renderPolicyChart(policy1, policy2, nBeliefs, delta, round) {
 
     const datasets = [
         {
-            label: 'Player 1',
+            label: thresholdLabel('Player 1', _cachedSummary1, round, ammo),
             data: p1Probs,
             borderColor: '#6c5ce7',
             backgroundColor: 'rgba(108, 92, 231, 0.08)',
@@ -98,7 +117,7 @@ function renderPolicyChart(policy1, policy2, nBeliefs, delta, round) {
 
         },
         {
-            label: 'Player 2',
+            label: thresholdLabel('Player 2', _cachedSummary2, round, ammo),
             data: p2Probs,
             borderColor: '#00b894',
             backgroundColor: 'rgba(0, 184, 148, 0.08)',
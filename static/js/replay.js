@@ -62,8 +62,8 @@ function renderReplay() {
     if (r.p1_action_probs && r.p2_action_probs) {
         explanationHtml = `
             <div class="decision-explanation">
-                ${buildExplanation(1, r.p1_action_probs, r.beliefs_before[0], r.p1_threshold, r.ammo_before[0], r.actions[0], r.p1_q_values)}
-                ${buildExplanation(2, r.p2_action_probs, r.beliefs_before[1], r.p2_threshold, r.ammo_before[1], r.actions[1], r.p2_q_values)}
+                ${buildExplanation(1, r.p1_action_probs, r.beliefs_before[0], r.p1_threshold, r.ammo_before[0], r.actions[0], r.p1_q_values, summaryGreedy(lastSimResult?.policy_summary1, r.round, r.ammo_before[0], r.beliefs_before[0]))}
+                ${buildExplanation(2, r.p2_action_probs, r.beliefs_before[1], r.p2_threshold, r.ammo_before[1], r.actions[1], r.p2_q_values, summaryGreedy(lastSimResult?.policy_summary2, r.round, r.ammo_before[1], r.beliefs_before[1]))}
             </div>`;
     }
 
@@ -127,15 +127,28 @@ function renderReplay() {
     });
 }
 
-function buildExplanation(playerNum, actionProbs, belief, threshold, ammo, action, qValues) {
+/**
+ * Policy recommendation precomputed by the server for (round, ammo, belief),
+ * or null when the summary is unavailable.
+ */
+function summaryGreedy(summary, round, ammo, belief) {
+    if (!summary || !summary.greedy) return null;
+    const cells = summary.greedy[String(round)]?.[String(ammo)];
+    if (!cells) return null;
+    const delta = lastSimResult?.delta || 0.05;
+    const pidx = Math.max(0, Math.min(Math.round(belief / delta), cells.length - 1));
+    return cells[pidx];
+}
+
+function buildExplanation(playerNum, actionProbs, belief, threshold, ammo, action, qValues, greedyAction) {
     const actionNames = { S: 'Shoot', B: 'Block', R: 'Reload' };
     const chosenName = actionNames[action] || action;
 
-    // Find the highest-probability action (policy recommendation)
+    // Highest-probability action (policy recommendation)
     const sorted = Object.entries(actionProbs)
         .filter(([, p]) => p > 0.001)
         .sort((a, b) => b[1] - a[1]);
-    const bestAction = sorted[0][0];
+    const bestAction = greedyAction || sorted[0][0];
     const isDeviation = action !== bestAction;
 
     // Build probability summary for all actions
@@ -147,7 +160,10 @@ function buildExplanation(playerNum, actionProbs, belief, threshold, ammo, actio
         ? ` <span class="deviation-badge" title="Sampled low-probability action (mixed strategy)">rolled ${chosenProb}</span>`
         : '';
 
-    const reasoning = `Belief=${belief.toFixed(3)} | ${probParts.join(', ')} &rarr; ${chosenName}${deviationTag}`;
+    const thresholdTag = threshold !== undefined && threshold !== null
+        ? ` (threshold ${threshold.toFixed(2)})`
+        : '';
+    const reasoning = `Belief=${belief.toFixed(3)}${thresholdTag} | ${probParts.join(', ')} &rarr; ${chosenName}${deviationTag}`;
 
     // Build Q-value delta section
     let qHtml = '';
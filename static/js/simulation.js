@@ -5,31 +5,62 @@ let simChartOutcomes = null;
 let simChartScores = null;
 let simChartTerm = null;
 let lastSimResult = null;
+let simSolveStream = null;
 
 document.addEventListener('DOMContentLoaded', () => {
     document.getElementById('btn-simulate').addEventListener('click', runSimulation);
+    document.getElementById('btn-cancel-sim').addEventListener('click', () => {
+        if (simSolveStream) simSolveStream.cancel();
+    });
 });
 
 async function runSimulation() {
     const p1 = document.getElementById('sim-p1').value;
     const p2 = document.getElementById('sim-p2').value;
-    const n = parseInt(document.getElementById('sim-n').value) || 500;
+    const n = Math.max(1, parseInt(document.getElementById('sim-n').value) || 500);
     const optimalP1 = document.getElementById('sim-optimal-p1').checked;
     const optimalP2 = document.getElementById('sim-optimal-p2').checked;
+    const beta = parseFloat(document.getElementById('sim-beta').value) || undefined;
     const btn = document.getElementById('btn-simulate');
+    const cancelBtn = document.getElementById('btn-cancel-sim');
 
     btn.disabled = true;
-    setStatus('sim-status', 'Solving + simulating... (this may take a moment)', 'loading');
+    setStatus('sim-status', 'Solving...', 'loading');
 
     try {
-        const data = await API.simulate(p1, p2, n, optimalP1, optimalP2);
+        // Solve with live convergence progress (cached pairs finish at once);
+        // the model request below then hits the solver cache
+        simSolveStream = API.streamSolve(p1, p2, beta, {
+            iteration: e => setStatus('sim-status',
+                `Solving... IBR iteration ${e.iteration} (β=${e.beta.toFixed(2)}), ` +
+                `residual ${Math.max(...e.residual).toExponential(2)}`, 'loading'),
+        });
+        cancelBtn.disabled = false;
+        const solver = await simSolveStream.done;
+        simSolveStream = null;
+        cancelBtn.disabled = true;
+
+        setStatus('sim-status', 'Simulating...', 'loading');
+        // Episodes are generated locally from the compiled model and the
+        // stats computed from them, so replays match the charts and the
+        // server does no simulation work
+        const data = await API.model(p1, p2, beta,
+                                     { include_policies: true, include_log: true });
+        data.episodes = new CompiledModel(data).runBatch(n, optimalP1, optimalP2);
+        data.stats = CompiledModel.batchStats(data.episodes, data.T);
+        data.solver_iterations = solver.iterations;
+        data.solver_converged = solver.converged;
+        data.solver_exploitability = solver.exploitability;
         data.persona1 = document.getElementById('sim-p1').selectedOptions[0].textContent;
         data.persona2 = document.getElementById('sim-p2').selectedOptions[0].textContent;
         data.optimal_p1 = optimalP1;
         data.optimal_p2 = optimalP2;
         lastSimResult = data;
+        const exploit = data.solver_exploitability
+            ? `, exploitability: ${data.solver_exploitability.total.toFixed(3)}`
+            : '';
         setStatus('sim-status',
-            `Done — ${data.stats.n_episodes} episodes, solver: ${data.solver_iterations} IBR iters (converged: ${data.solver_converged})`,
+            `Done — ${data.stats.n_episodes} episodes, solver: ${data.solver_iterations} IBR iters (converged: ${data.solver_converged}${exploit})`,
             'success');
         renderOutcomeChart(data.stats);
         renderScoreChart(data.stats);
@@ -40,8 +71,11 @@ async function runSimulation() {
         }
         populateReplayDropdown(data.episodes);
     } catch (e) {
-        setStatus('sim-status', 'Error: ' + e.message, 'error');
+        setStatus('sim-status', e.message === 'cancelled'
+            ? 'Solve cancelled.' : 'Error: ' + e.message, 'error');
     } finally {
+        simSolveStream = null;
+        cancelBtn.disabled = true;
         btn.disabled = false;
     }
 }
@@ -128,16 +162,21 @@ function renderTermChart(stats) {
 
 function renderStatsTable(stats) {
     const el = document.getElementById('sim-stats-table');
+    const se = stats.se || {};
+    const pct = key => `${(stats[key] * 100).toFixed(1)}%` +
+        (se[key] !== undefined ? ` ± ${(se[key] * 100).toFixed(1)}` : '');
+    const num = (key, digits) => stats[key].toFixed(digits) +
+        (se[key] !== undefined ? ` ± ${se[key].toFixed(digits)}` : '');
     el.innerHTML = `
         <table>
-            <tr><th>Metric</th><th>Value</th></tr>
-            <tr><td>P1 Win Rate</td><td>${(stats.p1_win_rate * 100).toFixed(1)}%</td></tr>
-            <tr><td>P2 Win Rate</td><td>${(stats.p2_win_rate * 100).toFixed(1)}%</td></tr>
-            <tr><td>Tie Rate</td><td>${(stats.tie_rate * 100).toFixed(1)}%</td></tr>
-            <tr><td>Draw Rate (no terminal by T=5)</td><td>${(stats.draw_rate * 100).toFixed(1)}%</td></tr>
-            <tr><td>Avg Reward P1</td><td>${stats.avg_reward_p1.toFixed(2)}</td></tr>
-            <tr><td>Avg Reward P2</td><td>${stats.avg_reward_p2.toFixed(2)}</td></tr>
-            <tr><td>Avg Termination Round</td><td>${stats.avg_termination_round.toFixed(2)}</td></tr>
+            <tr><th>Metric</th><th>Value (± std. error)</th></tr>
+            <tr><td>P1 Win Rate</td><td>${pct('p1_win_rate')}</td></tr>
+            <tr><td>P2 Win Rate</td><td>${pct('p2_win_rate')}</td></tr>
+            <tr><td>Tie Rate</td><td>${pct('tie_rate')}</td></tr>
+            <tr><td>Draw Rate (no terminal by T=5)</td><td>${pct('draw_rate')}</td></tr>
+            <tr><td>Avg Reward P1</td><td>${num('avg_reward_p1', 2)}</td></tr>
+            <tr><td>Avg Reward P2</td><td>${num('avg_reward_p2', 2)}</td></tr>
+            <tr><td>Avg Termination Round</td><td>${num('avg_termination_round', 2)}</td></tr>
         </table>
     `;
 }
@@ -0,0 +1,56 @@
+"""Tests for opponent-persona inference (engine/inference.py)."""
+import numpy as np
+import pytest
+
+from config import T, SOFTMAX_BETA
+from engine.inference import (OpponentModel, opponent_models,
+                              run_batch_inference)
+from engine.personas import PERSONAS
+from engine.service import SolverService
+from engine.simulation import run_batch_arrays
+
+LABELS = list(PERSONAS)
+WEIGHTS = [PERSONAS[p]['weights'] for p in LABELS]
+
+
+@pytest.fixture(scope='module')
+def service():
+    service = SolverService()
+    service.solve_many([(w1, w2) for w1 in WEIGHTS for w2 in WEIGHTS],
+                       SOFTMAX_BETA, jobs=1)
+    return service
+
+
+@pytest.mark.parametrize('persona1', LABELS)
+@pytest.mark.parametrize('persona2', LABELS)
+def test_terminal_round_leaves_posterior_unchanged(service, persona1,
+                                                   persona2):
+    # Greedy play is deterministic, so every episode follows the same
+    # path: an episode ending in round t must keep the weights it had at
+    # the start of that round
+    models = opponent_models(service, PERSONAS[persona1]['weights'],
+                             PERSONAS[persona2]['weights'], WEIGHTS,
+                             SOFTMAX_BETA, labels=LABELS)
+    run = run_batch_inference(*models, 200, rng=np.random.RandomState(0))
+    for player in [1, 2]:
+        by_round = run['posterior_by_round%d' % player]
+        posterior = run['posterior%d' % player]
+        for t in range(1, T + 1):
+            ended = run['termination_round'] == t
+            np.testing.assert_allclose(
+                posterior[ended], np.broadcast_to(by_round[t - 1],
+                                                  posterior[ended].shape))
+
+
+@pytest.mark.parametrize('optimal', [(True, True), (False, True),
+                                     (False, False)])
+def test_single_candidate_matches_run_batch_arrays(service, optimal):
+    result = service.solve(WEIGHTS[1], WEIGHTS[2], SOFTMAX_BETA)
+    expected = run_batch_arrays(result, 5000, *optimal,
+                                rng=np.random.RandomState(4))
+    run = run_batch_inference(OpponentModel(1, [result]),
+                              OpponentModel(2, [result]), 5000, *optimal,
+                              rng=np.random.RandomState(4))
+    for key, values in expected.items():
+        np.testing.assert_array_equal(run[key], values)
+    np.testing.assert_array_equal(run['posterior1'], 1.0)